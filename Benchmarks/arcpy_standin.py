@@ -0,0 +1,643 @@
+#..............................................................................................................................
+# Creator - Seth Docherty
+# Purpose - In-memory stand-in for the parts of arcpy used by the Budding GDB toolset.  The benchmark suite installs this
+#           module as "arcpy" before importing helper.py so the tool phases can be timed without an ArcGIS license.
+#
+#           Tables and feature classes live in the TABLES dictionary keyed by path.  Feature layers live in LAYERS and keep
+#           their definition query and selection the same way MakeFeatureLayer/SelectLayerBy* layers do.  Geometries
+#           are points or axis aligned rectangles, which is all the generated benchmark data needs.
+#
+#..............................................................................................................................
+import os
+import re
+import struct
+from datetime import datetime
+
+TABLES = dict()
+LAYERS = dict()
+MESSAGES = []
+
+
+class _Env(object):
+    overwriteOutput = True
+    workspace = None
+    extent = None
+    scratchFolder = None
+
+env = _Env()
+
+
+def Reset():
+    '''Remove every table, layer and message from the stand-in.'''
+    TABLES.clear()
+    LAYERS.clear()
+    del MESSAGES[:]
+
+
+def AddMessage(message):
+    MESSAGES.append(message)
+
+AddWarning = AddError = AddMessage
+
+
+def GetMessages(severity=0):
+    return "\n".join(str(message) for message in MESSAGES)
+
+
+PARAMETERS = []
+
+def GetParameterAsText(index):
+    return PARAMETERS[index] if index < len(PARAMETERS) else ''
+
+
+class ExecuteError(Exception):
+    pass
+
+
+#..............................................................................................................................
+# Geometry
+#..............................................................................................................................
+
+class Extent(object):
+    def __init__(self, XMin, YMin, XMax, YMax):
+        self.XMin, self.YMin, self.XMax, self.YMax = XMin, YMin, XMax, YMax
+
+    def __repr__(self):
+        return "Extent({}, {}, {}, {})".format(self.XMin, self.YMin, self.XMax, self.YMax)
+
+
+class Geometry(object):
+    '''
+    Point (xmax/ymax omitted) or axis aligned rectangle.  Only the members of arcpy.Geometry the toolset uses are
+    implemented.
+    '''
+    def __init__(self, xmin, ymin, xmax=None, ymax=None):
+        self.type = 'point' if xmax is None else 'polygon'
+        self.extent = Extent(xmin, ymin, xmin if xmax is None else xmax, ymin if ymax is None else ymax)
+
+    def disjoint(self, other):
+        a, b = self.extent, other.extent
+        return a.XMin > b.XMax or a.XMax < b.XMin or a.YMin > b.YMax or a.YMax < b.YMin
+
+    def equals(self, other):
+        a, b = self.extent, other.extent
+        return (a.XMin, a.YMin, a.XMax, a.YMax) == (b.XMin, b.YMin, b.XMax, b.YMax)
+
+    @property
+    def firstPoint(self):
+        return Point(self.extent.XMin, self.extent.YMin)
+
+    @property
+    def pointCount(self):
+        return 1 if self.type == 'point' else 5
+
+    @property
+    def WKT(self):
+        e = self.extent
+        if self.type == 'point':
+            return "POINT ({} {})".format(e.XMin, e.YMin)
+        return "POLYGON (({0} {1}, {0} {3}, {2} {3}, {2} {1}, {0} {1}))".format(e.XMin, e.YMin, e.XMax, e.YMax)
+
+
+def FromWKT(wkt):
+    #Only the POINT and rectangular POLYGON strings written by Geometry.WKT are supported.
+    numbers = [float(value) for value in wkt[wkt.index('(') :].replace('(', ' ').replace(')', ' ').replace(',', ' ').split()]
+    xs, ys = numbers[0::2], numbers[1::2]
+    if wkt.strip().upper().startswith('POINT'):
+        return Geometry(xs[0], ys[0])
+    return Geometry(min(xs), min(ys), max(xs), max(ys))
+
+
+class Point(object):
+    def __init__(self, X, Y):
+        self.X, self.Y = X, Y
+
+
+#..............................................................................................................................
+# Tables, fields and layers
+#..............................................................................................................................
+
+class Field(object):
+    def __init__(self, name, type, length=None):
+        self.name = name
+        self.type = type
+        self.length = length if length is not None else (255 if type == 'String' else 8)
+        self.editable = type not in ('OID', 'GlobalID')
+
+
+class Table(object):
+    def __init__(self, fields, shapeType=None):
+        self.fields = [Field('OBJECTID', 'OID')]
+        if shapeType:
+            self.fields.append(Field('Shape', 'Geometry'))
+        self.fields.extend(fields)
+        self.shapeType = shapeType
+        self.rows = []
+        self.next_oid = 1
+
+    def field_index(self, name):
+        if name == 'OID@':
+            return 0
+        if name.upper() in ('SHAPE@', 'SHAPE', 'SHAPE@WKT'):
+            return 1
+        upper = name.upper()
+        for i, field in enumerate(self.fields):
+            if field.name.upper() == upper:
+                return i
+        raise RuntimeError("Cannot find field '{}'".format(name))
+
+    def add_field(self, field):
+        self.fields.append(field)
+        for row in self.rows:
+            row.append(None)
+
+    def insert(self, values):
+        row = [self.next_oid] + list(values)
+        for i, field in enumerate(self.fields):
+            if field.type == 'Single' and i < len(row):
+                row[i] = _Stored_Value(field, row[i])
+        self.next_oid += 1
+        self.rows.append(row)
+        return row
+
+
+def _Stored_Value(field, value):
+    # Single fields store single precision floats, so the value read back is rounded the same way ArcGIS rounds it.
+    if field.type == 'Single' and isinstance(value, float):
+        return struct.unpack('f', struct.pack('f', value))[0]
+    return value
+
+
+class Layer(object):
+    def __init__(self, path, where=''):
+        self.path = path
+        self.where = where
+        self.selection = None
+
+
+def _resolve(name):
+    '''Return (table, list of rows) for a table path or layer name, honoring layer queries and selections.'''
+    if name in LAYERS:
+        layer = LAYERS[name]
+        table = TABLES[layer.path]
+        rows = table.rows
+        if layer.where:
+            rows = [row for row in rows if _evaluate(layer.where, table, row)]
+        if layer.selection is not None:
+            rows = [row for row in rows if row[0] in layer.selection]
+        return table, rows
+    if name not in TABLES:
+        raise ExecuteError("Dataset {} does not exist or is not supported".format(name))
+    return TABLES[name], TABLES[name].rows
+
+
+#..............................................................................................................................
+# WHERE clause evaluation for the subset of SQL the toolset generates
+#..............................................................................................................................
+
+_TOKEN = re.compile(r"\s*(?:(?P<string>'(?:[^']|'')*')|(?P<field>\"[^\"]+\"|\[[^\]]+\])|(?P<number>-?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)"
+                    r"|(?P<op><>|>=|<=|=|<|>|\(|\)|,)|(?P<word>[A-Za-z_][A-Za-z0-9_]*))")
+_CACHE = dict()
+
+
+def _compile(where, table):
+    key = (where, tuple(field.name.upper() for field in table.fields))
+    if key in _CACHE:
+        return _CACHE[key]
+    python = []
+    wrap_date = False
+    position = 0
+    where = where.strip()
+    while position < len(where):
+        match = _TOKEN.match(where, position)
+        if not match:
+            raise ExecuteError("Invalid expression: {}".format(where))
+        position = match.end()
+        kind = match.lastgroup
+        token = match.group(kind)
+        if kind == 'string':
+            value = token[1:-1].replace("''", "'")
+            if isinstance(value, str):
+                value = value.decode('utf-8')
+            python.append("_date({!r})".format(value) if wrap_date else repr(value))
+            wrap_date = False
+        elif kind == 'field':
+            python.append("row[{}]".format(table.field_index(token[1:-1])))
+        elif kind == 'number':
+            python.append(token)
+        elif kind == 'op':
+            python.append({'=': '==', '<>': '!='}.get(token, token))
+        else:
+            word = token.upper()
+            if word in ('AND', 'OR', 'NOT', 'IN'):
+                python.append(word.lower())
+            elif word == 'IS':
+                python.append('is')
+            elif word == 'NULL':
+                python.append('None')
+            elif word == 'DATE':
+                wrap_date = True
+            else:
+                python.append("row[{}]".format(table.field_index(token)))
+    source = " ".join(python)
+    # IN lists with a single value need a trailing comma to be a tuple.
+    source = re.sub(r"in \(([^,()]+)\)", r"in (\1,)", source)
+    function = eval("lambda row: " + source, {'_date': _date, 'None': None})
+    _CACHE[key] = function
+    return function
+
+
+def _date(text):
+    for date_format in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(text, date_format)
+        except ValueError:
+            pass
+    raise ExecuteError("Invalid date: {}".format(text))
+
+
+def _evaluate(where, table, row):
+    return _compile(where, table)(row)
+
+
+#..............................................................................................................................
+# Describe / ListFields / Exists
+#..............................................................................................................................
+
+class _Describe(object):
+    def __init__(self, name):
+        if name in LAYERS:
+            path = LAYERS[name].path
+            self.name = name
+        else:
+            path = name
+            self.name = os.path.basename(path)
+        self.catalogPath = path
+        table = TABLES.get(path)
+        self.shapeType = table.shapeType.capitalize() if table is not None and table.shapeType else None
+        self.dataType = 'FeatureClass' if self.shapeType else 'Table'
+        self.fields = table.fields if table is not None else []
+
+
+def Describe(name):
+    if name not in TABLES and name not in LAYERS:
+        # Workspaces and feature datasets exist for any path in the stand-in.
+        return _Workspace(name)
+    return _Describe(name)
+
+
+class _Workspace(object):
+    def __init__(self, path):
+        self.catalogPath = path
+        self.name = os.path.basename(path)
+        self.dataType = 'Workspace'
+
+
+def Exists(name):
+    # Workspaces and feature datasets exist when a table is stored in them (or for any geodatabase path).
+    if name in TABLES or name in LAYERS:
+        return True
+    folder = name.rstrip('/') + '/'
+    return os.path.splitext(name)[1].lower() in ('.gdb', '.mdb', '.sde') or any(path.startswith(folder) for path in TABLES)
+
+
+def ListFields(name, wild_card=None):
+    table, rows = _resolve(name)
+    if not wild_card:
+        return list(table.fields)
+    return [field for field in table.fields if field.name.upper() == wild_card.upper()]
+
+
+def AddFieldDelimiters(datasource, field):
+    return '"{}"'.format(field)
+
+
+class _Result(object):
+    def __init__(self, value):
+        self.value = value
+
+    def getOutput(self, index):
+        return self.value
+
+    def __str__(self):
+        return str(self.value)
+
+
+#..............................................................................................................................
+# Geoprocessing tools
+#..............................................................................................................................
+
+def CreateTable_management(out_path, out_name, template=None):
+    path = os.path.join(out_path, out_name)
+    fields = []
+    if template:
+        fields = [Field(f.name, f.type, f.length) for f in TABLES[template].fields if f.type not in ('OID', 'Geometry')]
+    TABLES[path] = Table(fields)
+    return _Result(path)
+
+
+def CreateFeatureclass_management(out_path, out_name, geometry_type, template=None, *args):
+    path = os.path.join(out_path, out_name)
+    fields = []
+    if template:
+        fields = [Field(f.name, f.type, f.length) for f in _resolve(template)[0].fields if f.type not in ('OID', 'Geometry')]
+    TABLES[path] = Table(fields, str(geometry_type).lower())
+    return _Result(path)
+
+
+def AddField_management(table, field_name, field_type='TEXT', field_precision=None, field_scale=None, field_length=None, **kwargs):
+    types = {'TEXT': 'String', 'SHORT': 'SmallInteger', 'LONG': 'Integer', 'DOUBLE': 'Double', 'FLOAT': 'Single', 'DATE': 'Date'}
+    TABLES[table].add_field(Field(field_name, types.get(field_type, field_type), field_length))
+
+
+def MakeFeatureLayer_management(in_features, out_layer, where_clause='', *args):
+    path = LAYERS[in_features].path if in_features in LAYERS else in_features
+    LAYERS[out_layer] = Layer(path, where_clause)
+    return _Result(out_layer)
+
+MakeTableView_management = MakeFeatureLayer_management
+
+
+def SelectLayerByAttribute_management(layer, selection_type='NEW_SELECTION', where_clause=''):
+    lyr = LAYERS[layer]
+    table = TABLES[lyr.path]
+    candidates = [row for row in table.rows if not lyr.where or _evaluate(lyr.where, table, row)]
+    matched = set(row[0] for row in candidates if not where_clause or _evaluate(where_clause, table, row))
+    _apply_selection(lyr, selection_type, matched, set(row[0] for row in candidates))
+    return _Result(layer)
+
+
+def SelectLayerByLocation_management(layer, overlap_type='INTERSECT', select_features=None, search_distance='', selection_type='NEW_SELECTION'):
+    lyr = LAYERS[layer]
+    table = TABLES[lyr.path]
+    candidates = [row for row in table.rows if not lyr.where or _evaluate(lyr.where, table, row)]
+    all_oids = set(row[0] for row in candidates)
+    if selection_type == 'SWITCH_SELECTION':
+        _apply_selection(lyr, selection_type, set(), all_oids)
+        return _Result(layer)
+    select_table, select_rows = _resolve(select_features)
+    shapes = [row[1] for row in select_rows if row[1] is not None]
+    matched = set()
+    for row in candidates:
+        if row[1] is not None and any(not shape.disjoint(row[1]) for shape in shapes):
+            matched.add(row[0])
+    _apply_selection(lyr, selection_type, matched, all_oids)
+    return _Result(layer)
+
+
+def _apply_selection(lyr, selection_type, matched, all_oids):
+    current = lyr.selection if lyr.selection is not None else set()
+    if selection_type == 'NEW_SELECTION':
+        lyr.selection = matched
+    elif selection_type == 'ADD_TO_SELECTION':
+        lyr.selection = current | matched
+    elif selection_type == 'REMOVE_FROM_SELECTION':
+        lyr.selection = current - matched
+    elif selection_type == 'SUBSET_SELECTION':
+        lyr.selection = current & matched
+    elif selection_type == 'SWITCH_SELECTION':
+        lyr.selection = all_oids - current
+
+
+def Append_management(inputs, target, schema_type='TEST', *args):
+    target_table = TABLES[target] if target in TABLES else TABLES[LAYERS[target].path]
+    for name in (inputs if isinstance(inputs, list) else [inputs]):
+        source_table, rows = _resolve(name)
+        mapping = _field_mapping(source_table, target_table)
+        for row in rows:
+            target_table.insert([row[i] if i is not None else None for i in mapping])
+
+
+def _field_mapping(source_table, target_table):
+    names = dict((f.name.upper(), i) for i, f in enumerate(source_table.fields))
+    mapping = []
+    for i, field in enumerate(target_table.fields[1:], 1):
+        if field.type == 'Geometry':
+            mapping.append(1 if source_table.shapeType else None)
+        else:
+            mapping.append(names.get(field.name.upper()))
+    return mapping
+
+
+def CopyFeatures_management(in_features, out_feature_class, *args):
+    source_table, rows = _resolve(in_features)
+    table = Table([Field(f.name, f.type, f.length) for f in source_table.fields if f.type not in ('OID', 'Geometry')], source_table.shapeType)
+    for row in rows:
+        table.insert(row[1:])
+    TABLES[out_feature_class] = table
+    return _Result(out_feature_class)
+
+CopyRows_management = CopyFeatures_management
+
+
+def Delete_management(name, *args):
+    LAYERS.pop(name, None)
+    TABLES.pop(name, None)
+
+
+def DeleteRows_management(name):
+    table, rows = _resolve(name)
+    doomed = set(row[0] for row in rows)
+    table.rows[:] = [row for row in table.rows if row[0] not in doomed]
+
+
+def TruncateTable_management(name):
+    TABLES[name].rows[:] = []
+
+
+def GetCount_management(name):
+    return _Result(str(len(_resolve(name)[1])))
+
+
+def SpatialJoin_analysis(target_features, join_features, out_feature_class, join_operation='JOIN_ONE_TO_ONE',
+                         join_type='KEEP_ALL', field_mapping='', match_option='INTERSECT', *args):
+    '''
+    JOIN_ONE_TO_MANY spatial join with INTERSECT.  Join features are bucketed on a coarse grid so the stand-in does
+    not dominate the timings of the tool phases.
+    '''
+    target_table, target_rows = _resolve(target_features)
+    join_table, join_rows = _resolve(join_features)
+    if env.extent is not None:
+        envelope = Geometry(env.extent.XMin, env.extent.YMin, env.extent.XMax, env.extent.YMax)
+        target_rows = [row for row in target_rows if row[1] is not None and not row[1].disjoint(envelope)]
+    target_fields = [f for f in target_table.fields if f.type not in ('OID', 'Geometry')]
+    names = set(f.name.upper() for f in target_fields)
+    join_fields = []
+    for f in join_table.fields:
+        if f.type in ('OID', 'Geometry') or f.name.upper() in ('SHAPE_LENGTH', 'SHAPE_AREA'):
+            continue
+        name = f.name
+        while name.upper() in names:
+            name = name + "_1"
+        names.add(name.upper())
+        join_fields.append((join_table.fields.index(f), Field(name, f.type, f.length)))
+    out = Table([Field('Join_Count', 'Integer'), Field('TARGET_FID', 'Integer'), Field('JOIN_FID', 'Integer')] +
+                target_fields + [field for i, field in join_fields], target_table.shapeType)
+    target_index = [target_table.fields.index(f) for f in target_fields]
+
+    grid = _Grid([(row[1], row) for row in join_rows if row[1] is not None])
+    for row in target_rows:
+        geometry = row[1]
+        matches = [] if geometry is None else [j for j in grid.query(geometry) if not j[1].disjoint(geometry)]
+        if join_operation == 'JOIN_ONE_TO_MANY':
+            if not matches and join_type == 'KEEP_ALL':
+                out.insert([geometry, 0, row[0], -1] + [row[i] for i in target_index] + [None] * len(join_fields))
+            for j in matches:
+                out.insert([geometry, 1, row[0], j[0]] + [row[i] for i in target_index] + [j[i] for i, field in join_fields])
+        else:
+            if not matches and join_type != 'KEEP_ALL':
+                continue
+            first = matches[0] if matches else None
+            out.insert([geometry, len(matches), row[0], first[0] if first else -1] + [row[i] for i in target_index] +
+                       [first[i] if first else None for i, field in join_fields])
+    TABLES[out_feature_class] = out
+    return _Result(out_feature_class)
+
+
+class _Grid(object):
+    def __init__(self, items, cells=64):
+        self.items = items
+        if not items:
+            self.buckets = dict()
+            return
+        self.xmin = min(g.extent.XMin for g, item in items)
+        self.ymin = min(g.extent.YMin for g, item in items)
+        xmax = max(g.extent.XMax for g, item in items)
+        ymax = max(g.extent.YMax for g, item in items)
+        self.size = max(xmax - self.xmin, ymax - self.ymin, 1e-9) / cells
+        self.buckets = dict()
+        for geometry, item in items:
+            for cell in self._cells(geometry.extent):
+                self.buckets.setdefault(cell, []).append(item)
+
+    def _cells(self, e):
+        x0, x1 = int((e.XMin - self.xmin) // self.size), int((e.XMax - self.xmin) // self.size)
+        y0, y1 = int((e.YMin - self.ymin) // self.size), int((e.YMax - self.ymin) // self.size)
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                yield (x, y)
+
+    def query(self, geometry):
+        if not self.items:
+            return []
+        seen = dict()
+        for cell in self._cells(geometry.extent):
+            for item in self.buckets.get(cell, ()):
+                seen[item[0]] = item
+        return seen.values()
+
+
+class management(object):
+    CreateTable = staticmethod(CreateTable_management)
+    Delete = staticmethod(Delete_management)
+
+
+#..............................................................................................................................
+# Data access cursors
+#..............................................................................................................................
+
+class _Cursor(object):
+    def __init__(self, in_table, field_names, where_clause=None, *args, **kwargs):
+        if isinstance(field_names, basestring):
+            field_names = [name.strip() for name in field_names.split(";")]
+        self.table, rows = _resolve(in_table)
+        self.fields = list(field_names)
+        self.index = [self.table.field_index(name) for name in self.fields]
+        if where_clause:
+            rows = [row for row in rows if _evaluate(where_clause, self.table, row)]
+        self.rows = rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        pass
+
+
+class SearchCursor(_Cursor):
+    def __iter__(self):
+        index = self.index
+        wkt = [name.upper() == 'SHAPE@WKT' for name in self.fields]
+        for row in self.rows:
+            yield tuple([row[i].WKT if as_wkt and row[i] is not None else row[i] for i, as_wkt in zip(index, wkt)])
+
+    def next(self):
+        if not hasattr(self, '_iterator'):
+            self._iterator = iter(self)
+        return self._iterator.next()
+
+    def reset(self):
+        self._iterator = iter(self)
+
+
+class UpdateCursor(_Cursor):
+    def __iter__(self):
+        index = self.index
+        self._deleted = set()
+        for row in list(self.rows):
+            self._current = row
+            yield [row[i] for i in index]
+        if self._deleted:
+            self.table.rows[:] = [row for row in self.table.rows if row[0] not in self._deleted]
+
+    def updateRow(self, values):
+        for i, value in zip(self.index, values):
+            if i != 0:
+                self._current[i] = _Stored_Value(self.table.fields[i], value)
+
+    def deleteRow(self):
+        self._deleted.add(self._current[0])
+
+
+class InsertCursor(object):
+    def __init__(self, in_table, field_names):
+        self.table = TABLES[in_table]
+        self.index = [self.table.field_index(name) for name in field_names]
+        self.wkt = [name.upper() == 'SHAPE@WKT' for name in field_names]
+        self.width = len(self.table.fields)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def insertRow(self, values):
+        row = [None] * (self.width - 1)
+        for i, value, as_wkt in zip(self.index, values, self.wkt):
+            if as_wkt and value is not None:
+                value = FromWKT(value)
+            if i != 0:
+                row[i - 1] = value
+        return self.table.insert(row)[0]
+
+
+class Editor(object):
+    def __init__(self, workspace):
+        self.workspace = workspace
+        self.isEditing = False
+
+    def startEditing(self, with_undo=True, multiuser_mode=True):
+        self.isEditing = True
+
+    def stopEditing(self, save_changes=True):
+        self.isEditing = False
+
+    def startOperation(self):
+        pass
+
+    def stopOperation(self):
+        pass
+
+    def abortOperation(self):
+        pass
+
+
+class da(object):
+    SearchCursor = SearchCursor
+    UpdateCursor = UpdateCursor
+    InsertCursor = InsertCursor
+    Editor = Editor
@@ -0,0 +1,136 @@
+#..............................................................................................................................
+# Creator - Seth Docherty
+# Purpose - Synthetic data generator for the benchmark suite.  Builds a Budding GDB layout in the arcpy stand-in:
+#
+#               - Master.gdb/Samples                      Parent point feature class (Location_ID is the unique ID)
+#               - Project.gdb/Report_Figure_Extent        Figure extent polygons (Figure_Name, Scale)
+#               - Project.gdb/Report_Boundary_Extent      Secondary boundary polygon for each figure
+#               - Project.gdb/Report_Samples              Child report feature class.  Most of the master features in
+#                                                         each figure boundary with a few attributes out of date, so
+#                                                         the new-feature and update phases both have work to do.
+#               - Project.gdb/Lab_Results                 Table that is most of the rows in Lab_Results.csv
+#
+#           Scales from 10k to 10M features and 10 to 1000 figures are supported.  The larger scales need several GB
+#           of memory since every feature is a python object in the stand-in.
+#
+#..............................................................................................................................
+import csv
+import math
+import os
+import random
+from datetime import datetime, timedelta
+
+import arcpy_standin as arcpy
+
+MASTER = 'C:/Benchmark/Master.gdb/Samples'
+FIGURE_EXTENT = 'C:/Benchmark/Project.gdb/Report_Figure_Extent'
+BOUNDARY_EXTENT = 'C:/Benchmark/Project.gdb/Report_Boundary_Extent'
+CHILD = 'C:/Benchmark/Project.gdb/Report_Samples'
+RECORDS = 'C:/Benchmark/Project.gdb/Lab_Results'
+SCRATCH_FD = 'C:/Benchmark/Scratch.gdb/Report'
+SCRATCH_GDB = 'C:/Benchmark/Scratch.gdb'
+
+KEY_FIELD = 'Location_ID'
+FIGURE_FIELD = 'Figure_Name'
+UPDATE_FIELDS = ['Sample_Type', 'Status', 'Elevation']
+SAMPLE_TYPES = ['SB', 'MW', 'PE', 'SS', 'SED']
+STATUS = ['Active', 'Abandoned', 'Proposed', 'Destroyed']
+
+
+def Build_Datasets(feature_count, figure_count, csv_folder, seed=0, new_ratio=0.1, stale_ratio=0.05):
+    '''
+    Populate the arcpy stand-in with a master/child/figure-extent dataset and write the lab results .csv file.
+
+    Required input:
+        Number of master features
+        Number of figures
+        Folder for the lab results .csv file
+    Optional input:
+        Random seed
+        Fraction of the features in each figure that are missing from the child (new features)
+        Fraction of the child features with out of date attributes
+
+    Returns a dictionary with the dataset paths and sizes.
+    '''
+    rng = random.Random(seed)
+    arcpy.Reset()
+
+    # Roughly one feature per 100 square units.  Figures cover about half of the site.
+    site = math.sqrt(feature_count) * 10.0
+    figure_size = site / math.sqrt(figure_count) * 0.7
+
+    master = arcpy.Table([arcpy.Field(KEY_FIELD, 'String', 20), arcpy.Field('Sample_Type', 'String', 10),
+                          arcpy.Field('Status', 'String', 20), arcpy.Field('Elevation', 'Double')], 'point')
+    for i in xrange(feature_count):
+        x, y = rng.uniform(0, site), rng.uniform(0, site)
+        master.insert([arcpy.Geometry(x, y), 'L{}'.format(i), rng.choice(SAMPLE_TYPES), rng.choice(STATUS), round(rng.uniform(0, 20), 3)])
+    arcpy.TABLES[MASTER] = master
+
+    figures = arcpy.Table([arcpy.Field(FIGURE_FIELD, 'String', 50), arcpy.Field('Scale', 'Integer')], 'polygon')
+    boundaries = arcpy.Table([arcpy.Field(FIGURE_FIELD, 'String', 50)], 'polygon')
+    for i in xrange(figure_count):
+        x, y = rng.uniform(0, site - figure_size), rng.uniform(0, site - figure_size)
+        name = 'Figure {}'.format(i + 1)
+        figures.insert([arcpy.Geometry(x, y, x + figure_size, y + figure_size), name, rng.choice([100, 200, 400])])
+        inset = figure_size * 0.2
+        boundaries.insert([arcpy.Geometry(x + inset, y + inset, x + figure_size - inset, y + figure_size - inset), name])
+    arcpy.TABLES[FIGURE_EXTENT] = figures
+    arcpy.TABLES[BOUNDARY_EXTENT] = boundaries
+
+    # Child report feature class: master features inside each figure boundary, tied to the figure.
+    child = arcpy.Table([arcpy.Field(f.name, f.type, f.length) for f in master.fields[2:]] +
+                        [arcpy.Field(FIGURE_FIELD, 'String', 50), arcpy.Field('Scale', 'Integer')], 'point')
+    grid = arcpy._Grid([(row[1], row) for row in boundaries.rows])
+    scales = dict((row[2], row[3]) for row in figures.rows)
+    for row in master.rows:
+        for boundary in grid.query(row[1]):
+            if boundary[1].disjoint(row[1]) or rng.random() < new_ratio:
+                continue
+            values = list(row[1:])
+            if rng.random() < stale_ratio:
+                values[3] = rng.choice(STATUS)
+                values[4] = round(rng.uniform(0, 20), 3)
+            child.insert(values + [boundary[2], scales[boundary[2]]])
+    arcpy.TABLES[CHILD] = child
+
+    # Lab results: the table already holds most of the rows in the .csv file.
+    records = arcpy.Table([arcpy.Field('Sample_ID', 'String', 20), arcpy.Field('Parameter', 'String', 30),
+                           arcpy.Field('Result', 'Double'), arcpy.Field('Date_Sampled', 'Date')])
+    csv_path = os.path.join(csv_folder, 'Lab_Results.csv')
+    start = datetime(1995, 1, 1)
+    with open(csv_path, 'wb') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Sample_ID', 'Parameter', 'Result', 'Date_Sampled', 'Lab_Qualifier'])
+        for i in xrange(feature_count):
+            date = start + timedelta(days=rng.randint(0, 9000))
+            row = ['L{}-{}'.format(i, rng.randint(0, 3)), rng.choice(['Arsenic', 'Lead', 'Benzene, total']),
+                   float(rng.randint(1, 5000)) / 10, date]
+            writer.writerow(row[:3] + [date.strftime('%m/%d/%Y'), ''])
+            if rng.random() >= new_ratio:
+                records.insert([unicode(row[0]), unicode(row[1]), row[2], row[3]])
+    arcpy.TABLES[RECORDS] = records
+
+    return {'master': MASTER, 'figure_extent': FIGURE_EXTENT, 'boundary_extent': BOUNDARY_EXTENT, 'child': CHILD,
+            'records': RECORDS, 'records_csv': csv_path, 'scratch_fd': SCRATCH_FD, 'scratch_gdb': SCRATCH_GDB,
+            'features': feature_count, 'figures': figure_count, 'child_features': len(child.rows)}
+
+
+def Snapshot():
+    '''Return a copy of every table so a benchmark can restore the inputs between runs.'''
+    return dict((path, _copy_table(table)) for path, table in arcpy.TABLES.items())
+
+
+def Restore(snapshot):
+    '''Replace the stand-in tables with a copy of a snapshot from Snapshot().'''
+    arcpy.Reset()
+    for path, table in snapshot.items():
+        arcpy.TABLES[path] = _copy_table(table)
+
+
+def _copy_table(table):
+    copy = arcpy.Table([], None)
+    copy.fields = list(table.fields)
+    copy.shapeType = table.shapeType
+    copy.rows = [list(row) for row in table.rows]
+    copy.next_oid = table.next_oid
+    return copy
@@ -0,0 +1,287 @@
+#..............................................................................................................................
+# Creator - Seth Docherty
+# Purpose - Time the phases of the Budding GDB tools on synthetic data and compare them against saved baselines.
+#
+#           The arcpy stand-in (arcpy_standin.py) is installed as "arcpy" before helper.py is imported, so the suite runs
+#           without an ArcGIS license.  The Update Attributes and Add New Table Records phases marked (script) run the tool
+#           scripts themselves with Run_Tool_Script.  The other phases time one part of a tool on its own and call the
+#           helper functions that the tool script calls for that part, in the same order.  The phase function names the
+#           script section it mirrors; keep the two in step when the script changes.
+#
+#               Add New Geometry       Initial Setup, Part 1, Part 2, Part 3 (Parts 2+3 parallel with --workers), and the
+#                                      figure selection and Part 1 spatial join with the join cache, first run and reused
+#               Update Attributes      Field update loop (Update_Fields over every figure in one edit session), and
+#                                      Update Attributes.py (script) in one edit session and in chunks of CHUNK_FIGURES figures
+#               Add New Table Records  CSV diff (Add_New_Records), and Add New Table Records.py (script)
+#
+#           Usage:
+#               python run_benchmarks.py --features 10000,100000 --figures 10,100
+#               python run_benchmarks.py --workers 8                Also time the parallel Part 2 and Part 3
+#               python run_benchmarks.py --save-baseline          Save the timings as the new baseline
+#               python run_benchmarks.py --tolerance 0.25         Fail when a phase is 25% slower than its baseline
+#
+#           Baselines are machine specific.  Save a baseline on the machine the suite is going to be run on.
+#
+#..............................................................................................................................
+import argparse
+import json
+import os
+import runpy
+import shutil
+import sys
+import tempfile
+from timeit import default_timer as timer
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+TOOLBOX_BIN = os.path.join(HERE, os.pardir, 'Budding_GDB_toolset', 'Install', 'Toolbox', 'bin')
+
+import arcpy_standin
+sys.modules['arcpy'] = arcpy_standin
+sys.path.insert(0, os.path.normpath(TOOLBOX_BIN))
+import helper
+import datagen
+
+arcpy = arcpy_standin
+
+#Figures per edit chunk for the chunked Update Attributes.py phase.
+CHUNK_FIGURES = 5
+
+
+class Phase_Timer(object):
+    '''
+    Collect wall clock timings for named phases.  Tool output (print/AddMessage) is discarded while a phase runs so
+    the console does not skew the timings.
+    '''
+    def __init__(self):
+        self.timings = []
+
+    def time(self, name, function, *args):
+        stdout = sys.stdout
+        sys.stdout = open(os.devnull, 'w')
+        start = timer()
+        try:
+            function(*args)
+        finally:
+            elapsed = timer() - start
+            sys.stdout.close()
+            sys.stdout = stdout
+            del arcpy.MESSAGES[:]
+        self.timings.append((name, elapsed))
+        return elapsed
+
+
+#..............................................................................................................................
+# Add New Geometry
+#..............................................................................................................................
+
+#Each Add New Geometry phase mirrors a section of Add New Geometry.py (named after the section).  The script can not be run
+#here since it works out the scratch feature dataset from a Windows catalog path.
+
+def Add_New_Geometry_Setup(ds, state):
+    #Initial Setup: the scratch feature classes and the figure selection (Select_Figures).
+    scratch = ds['scratch_fd']
+    name = os.path.basename(scratch)
+    state['figure_selection'] = os.path.join('in_memory', name + '_FigureSelection')
+    state['spatial_tmp'] = os.path.join('in_memory', name + '_SpatialJoinTemp')
+    state['figure_extent_selection'] = os.path.join(scratch, name + '_FigureExtent_Selection')
+    state['boundary_selection'] = os.path.join(scratch, name + '_BoundaryExtent_Selection')
+    state['final_output'] = os.path.join(scratch, name + '_FinalOutput')
+    for path in (state['figure_extent_selection'], state['boundary_selection'], state['final_output']):
+        helper.FC_Exist(os.path.basename(path), scratch, ds['child'])
+
+    state['figures'] = helper.Get_Figure_List(ds['figure_extent'], datagen.FIGURE_FIELD, '')
+    state['figure_selection'] = helper.Select_Figures(ds['figure_extent'], datagen.FIGURE_FIELD, state['figures'], state['figure_selection'])
+
+
+def Add_New_Geometry_Part1(ds, state):
+    #Part 1: the spatial join of the Parent candidates (Spatial_Join_Figures), Select_and_Append and Delete_Values_From_FC.
+    layer = os.path.basename(ds['master']) + '_Candidates'
+    helper.Create_FL(layer, ds['master'])
+    state['spatial_tmp'] = helper.Spatial_Join_Figures(layer, state['figure_selection'], state['spatial_tmp'])
+    helper.Select_and_Append(state['figure_selection'], state['spatial_tmp'], state['figure_extent_selection'])
+    helper.Delete_Values_From_FC("'SED'", 'Sample_Type', os.path.basename(state['figure_extent_selection']), state['figure_extent_selection'])
+
+
+def Add_New_Geometry_Part2(ds, state):
+    #Part 2 with Figure_Workers at 1.
+    helper.Select_and_Append_Indexed(ds['boundary_extent'], state['figure_extent_selection'], state['boundary_selection'],
+                                     datagen.FIGURE_FIELD, state['figures'])
+
+
+def Add_New_Geometry_Part3(ds, state):
+    #Part 3 with Figure_Workers at 1 and no Unique_ID_Field.
+    helper.Find_New_Features_Indexed(ds['child'], state['boundary_selection'], state['final_output'], datagen.FIGURE_FIELD, state['figures'])
+
+
+def Add_New_Geometry_Join_Cache(ds, state):
+    #The figure selection and the Part 1 spatial join with the join cache on.  Timed twice: the first run fills the cache
+    #and the second run reuses both results.
+    cache = helper.Join_Cache(ds['scratch_gdb'], os.path.basename(ds['scratch_fd']))
+    figure_hash = helper.Join_Cache.key(helper.Figure_Fingerprints([ds['figure_extent']], datagen.FIGURE_FIELD, state['figures'], attributes=True))
+    selection = helper.Select_Figures(ds['figure_extent'], datagen.FIGURE_FIELD, state['figures'], state['figure_selection'], cache, figure_hash)
+    layer = os.path.basename(ds['master']) + '_Candidates'
+    helper.Create_FL(layer, ds['master'])
+    helper.Spatial_Join_Figures(layer, selection, state['spatial_tmp'], cache, figure_hash)
+
+
+def Add_New_Geometry_Parallel(ds, state, workers):
+    #Parts 2 and 3 with Figure_Workers above 1 (Select_and_Find_New_Features_Parallel).
+    scratch = ds['scratch_fd']
+    name = os.path.basename(scratch)
+    selection = os.path.join(scratch, name + '_BoundaryExtent_Selection_Parallel')
+    output = os.path.join(scratch, name + '_FinalOutput_Parallel')
+    for path in (selection, output):
+        helper.FC_Exist(os.path.basename(path), scratch, ds['child'])
+    helper.Select_and_Find_New_Features_Parallel(ds['boundary_extent'], state['figure_extent_selection'], ds['child'], selection, output,
+                                                 datagen.FIGURE_FIELD, state['figures'], workers)
+
+
+#..............................................................................................................................
+# Update Attributes / Add New Table Records
+#..............................................................................................................................
+
+def Run_Tool_Script(script_name, parameters, **settings):
+    '''
+    Run a tool script from the toolbox bin folder the way its script tool does.  The parameters are served by
+    GetParameterAsText and every setting is passed as a BUDDING_GDB_<SETTING> environment variable (see
+    helper.Tool_Setting).  The warm worker is turned off so the script runs in this process.
+    '''
+    environment = dict(('BUDDING_GDB_' + name.upper(), str(value)) for name, value in settings.items())
+    environment['BUDDING_GDB_WARM_WORKER'] = '0'
+    saved = dict((name, os.environ.get(name)) for name in environment)
+    os.environ.update(environment)
+    arcpy.PARAMETERS[:] = parameters
+    try:
+        runpy.run_path(os.path.join(TOOLBOX_BIN, script_name), run_name='__main__')
+    except SystemExit, e:
+        if e.code not in (None, 0):
+            raise RuntimeError("{} stopped with exit status {}".format(script_name, e.code))
+    finally:
+        del arcpy.PARAMETERS[:]
+        for name, value in saved.items():
+            if value is None:
+                del os.environ[name]
+            else:
+                os.environ[name] = value
+
+
+def Update_Attributes(ds, state):
+    #Update_Figures in Update Attributes.py with every figure saved in one edit session, without the script start up.
+    edit_session = helper.start_edit_session(ds['child'])
+    figures = helper.Get_Figure_List(ds['figure_extent'], datagen.FIGURE_FIELD, '')
+    helper.Update_Fields(ds['master'], ds['child'], datagen.KEY_FIELD, datagen.KEY_FIELD, datagen.UPDATE_FIELDS,
+                         datagen.FIGURE_FIELD, figures)
+    helper.stop_edit_session(edit_session)
+
+
+def Update_Attributes_Script(ds, state, chunk_figures):
+    figures = ";".join("'{}'".format(figure) for figure in helper.Get_Figure_List(ds['figure_extent'], datagen.FIGURE_FIELD, ''))
+    Run_Tool_Script('Update Attributes.py', [ds['master'], ds['child'], datagen.KEY_FIELD, datagen.KEY_FIELD, ";".join(datagen.UPDATE_FIELDS),
+                                             ds['figure_extent'], datagen.FIGURE_FIELD, figures],
+                    sync_mode='run', edit_chunk_figures=chunk_figures, edit_chunk_rows=0)
+
+
+def CSV_Diff(ds, state):
+    #Add New Table Records.py: the Add_New_Records call, without the file check and the script start up.
+    helper.Add_New_Records(ds['records_csv'], ds['records'], helper.Extract_Field_NameType(ds['records']))
+
+
+def Add_New_Table_Records_Script(ds, state):
+    Run_Tool_Script('Add New Table Records.py', [ds['records_csv'], ds['records'], ds['scratch_gdb']], sync_mode='run')
+
+
+def Run_Scale(features, figures, folder, seed=0, workers=1):
+    '''Build the datasets for one scale and time every phase.  Returns a list of (phase, seconds).'''
+    ds = datagen.Build_Datasets(features, figures, folder, seed)
+    arcpy.env.scratchFolder = folder
+    snapshot = datagen.Snapshot()
+    timer = Phase_Timer()
+    state = dict()
+    timer.time('Add New Geometry: Initial Setup', Add_New_Geometry_Setup, ds, state)
+    timer.time('Add New Geometry: Part 1', Add_New_Geometry_Part1, ds, state)
+    timer.time('Add New Geometry: Part 2', Add_New_Geometry_Part2, ds, state)
+    timer.time('Add New Geometry: Part 3', Add_New_Geometry_Part3, ds, state)
+    if workers != 1:
+        timer.time('Add New Geometry: Parts 2+3 parallel', Add_New_Geometry_Parallel, ds, state, workers)
+    timer.time('Add New Geometry: Join cache (first run)', Add_New_Geometry_Join_Cache, ds, state)
+    timer.time('Add New Geometry: Join cache (reused)', Add_New_Geometry_Join_Cache, ds, state)
+    datagen.Restore(snapshot)
+    timer.time('Update Attributes: Field update loop', Update_Attributes, ds, state)
+    datagen.Restore(snapshot)
+    timer.time('Update Attributes: script, no chunks', Update_Attributes_Script, ds, state, 0)
+    datagen.Restore(snapshot)
+    timer.time('Update Attributes: script, {} figure chunks'.format(CHUNK_FIGURES), Update_Attributes_Script, ds, state, CHUNK_FIGURES)
+    datagen.Restore(snapshot)
+    timer.time('Add New Table Records: CSV diff', CSV_Diff, ds, state)
+    datagen.Restore(snapshot)
+    timer.time('Add New Table Records: script', Add_New_Table_Records_Script, ds, state)
+    return timer.timings
+
+
+def Scale_Key(features, figures):
+    return "features={},figures={}".format(features, figures)
+
+
+def Compare_To_Baseline(results, baseline, tolerance, noise_floor=0.05):
+    '''Return a list of (scale, phase, baseline seconds, seconds) for every phase slower than the baseline allows.'''
+    regressions = []
+    for scale, timings in sorted(results.items()):
+        for phase, seconds in timings:
+            previous = baseline.get(scale, dict()).get(phase)
+            if previous is None:
+                continue
+            if seconds > previous * (1 + tolerance) and seconds - previous > noise_floor:
+                regressions.append((scale, phase, previous, seconds))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Budding GDB toolset phases on synthetic data.")
+    parser.add_argument('--features', default='10000', help="Comma separated master feature counts (10k to 10M)")
+    parser.add_argument('--figures', default='10,100', help="Comma separated figure counts (10 to 1000)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=1, help="Worker processes for the parallel Part 2 and Part 3 (0 is one per CPU)")
+    parser.add_argument('--baseline', default=os.path.join(HERE, 'baselines.json'))
+    parser.add_argument('--save-baseline', action='store_true', help="Save the timings as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed slowdown before a phase is flagged")
+    args = parser.parse_args(argv)
+
+    folder = tempfile.mkdtemp(prefix='budding_gdb_benchmark_')
+    results = dict()
+    try:
+        for features in [int(value) for value in args.features.split(',')]:
+            for figures in [int(value) for value in args.figures.split(',')]:
+                key = Scale_Key(features, figures)
+                print "\n{}".format(key)
+                results[key] = Run_Scale(features, figures, folder, args.seed, args.workers)
+                for phase, seconds in results[key]:
+                    print "    {0:<45} {1:>10.3f}s".format(phase, seconds)
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+    baseline = dict()
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    if args.save_baseline:
+        for key, timings in results.items():
+            baseline[key] = dict(timings)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print "\nBaseline saved to {}".format(args.baseline)
+        return 0
+
+    regressions = Compare_To_Baseline(results, baseline, args.tolerance)
+    if regressions:
+        print "\nThe following phases are slower than the baseline:"
+        for scale, phase, previous, seconds in regressions:
+            print "    {} {}: {:.3f}s -> {:.3f}s".format(scale, phase, previous, seconds)
+        return 1
+    if baseline:
+        print "\nNo regressions found against {}".format(args.baseline)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,553 @@
+#..............................................................................................................................
+# Creator - Seth Docherty
+# Purpose - Unit tests for the helper functions the tools lean on.  Each test class covers one helper (or one group of helpers
+#           that work together) and checks it against small hand built inputs.
+#
+#           The arcpy stand-in (arcpy_standin.py) is installed as "arcpy" before helper.py is imported, the same way the
+#           benchmark suite does it, so the tests run without an ArcGIS license.
+#
+#           Usage:
+#               python -m unittest test_helper
+#
+#..............................................................................................................................
+import csv
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from datetime import datetime
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+TOOLBOX_BIN = os.path.join(HERE, os.pardir, 'Budding_GDB_toolset', 'Install', 'Toolbox', 'bin')
+
+import arcpy_standin
+sys.modules['arcpy'] = arcpy_standin
+sys.path.insert(0, os.path.normpath(TOOLBOX_BIN))
+
+import helper
+from arcpy_standin import Geometry
+
+
+def Write_CSV(folder, header, rows, name='input.csv'):
+    #Write a .csv file in to a test folder and return its path.
+    filename = os.path.join(folder, name)
+    with open(filename, 'wb') as fp:
+        writer = csv.writer(fp)
+        writer.writerow(header)
+        writer.writerows(rows)
+    return filename
+
+
+class SpatialIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        #A 10 x 10 grid of unit squares, small node capacity so the tree is more than one level deep.
+        self.entries = [((x, y), Geometry(x, y, x + 1, y + 1)) for x in xrange(10) for y in xrange(10)]
+        self.index = helper.Spatial_Index(self.entries, node_capacity=4)
+
+    def test_query_matches_brute_force(self):
+        for extent in [(2.5, 2.5, 2.5, 2.5), (0, 0, 3, 1), (-5, -5, -1, -1), (8.5, 0, 20, 0.5)]:
+            expected = set(item for item, geometry in self.entries
+                           if not (geometry.extent.XMin > extent[2] or geometry.extent.XMax < extent[0] or
+                                   geometry.extent.YMin > extent[3] or geometry.extent.YMax < extent[1]))
+            self.assertEqual(set(item for item, geometry in self.index.query(extent)), expected)
+
+    def test_size_and_empty_index(self):
+        self.assertEqual(len(self.index), 100)
+        empty = helper.Spatial_Index([])
+        self.assertEqual(len(empty), 0)
+        self.assertEqual(empty.query((0, 0, 1, 1)), [])
+
+
+class FigureMembershipTest(unittest.TestCase):
+
+    def setUp(self):
+        self.index = helper.Spatial_Index([('A', Geometry(0, 0, 10, 10)), ('B', Geometry(5, 5, 15, 15)),
+                                           ('B', Geometry(20, 20, 30, 30))])
+
+    def test_every_figure_when_no_figure_is_passed(self):
+        features = [(1, None, Geometry(1, 1)), (2, None, Geometry(7, 7)), (3, None, Geometry(25, 25)),
+                    (4, None, Geometry(50, 50))]
+        membership = helper.Figure_Membership(features, self.index)
+        self.assertEqual(membership, {1: set(['A']), 2: set(['A', 'B']), 3: set(['B']), 4: set()})
+
+    def test_only_the_joined_figure_is_tested(self):
+        #A whole number float figure name (i.e. from a Double key field) matches the text figure name.
+        index = helper.Spatial_Index([('1', Geometry(0, 0, 10, 10)), ('2', Geometry(0, 0, 10, 10))])
+        membership = helper.Figure_Membership([(1, 1.0, Geometry(5, 5)), (2, '2', Geometry(50, 50))], index)
+        self.assertEqual(membership, {1: set(['1']), 2: set()})
+
+
+class UpdateFieldsTest(unittest.TestCase):
+
+    MASTER = 'C:/Test/Master.gdb/Samples'
+    CHILD = 'C:/Test/Project.gdb/Report_Samples'
+
+    def setUp(self):
+        arcpy_standin.Reset()
+        fields = [arcpy_standin.Field('Location_ID', 'String', 20), arcpy_standin.Field('Status', 'String', 20),
+                  arcpy_standin.Field('Figure_Name', 'String', 20)]
+        master = arcpy_standin.Table(fields, 'point')
+        child = arcpy_standin.Table(fields, 'point')
+        for i, (status, figure) in enumerate([(u'Active', u'Figure 1'), (u'Abandoned', u'Figure 3'), (u'Destroyed', u'Figure 2')]):
+            master.insert([Geometry(i, i), u'MW-{}'.format(i + 1), status, figure])
+        for i, figure in enumerate([u'Figure 1', u'Figure 1', u'Figure 2']):
+            child.insert([Geometry(i, i), u'MW-{}'.format(i + 1), u'Proposed', figure])
+        arcpy_standin.TABLES[self.MASTER] = master
+        arcpy_standin.TABLES[self.CHILD] = child
+        self.numpy = helper.np
+
+    def tearDown(self):
+        helper.np = self.numpy
+
+    def Rows(self):
+        return [tuple(row[2:]) for row in arcpy_standin.TABLES[self.CHILD].rows]
+
+    def Check_Figure_Field_Update(self):
+        #The figure field is also one of the fields being updated.  Only the rows tied to Figure 1 are updated.
+        updates = helper.Update_Fields(self.MASTER, self.CHILD, 'Location_ID', 'Location_ID', ['Status', 'Figure_Name', 'Missing'],
+                                       'Figure_Name', ["'Figure 1'"])
+        self.assertEqual(updates, {'Status': 2, 'Figure_Name': 1})
+        self.assertEqual(self.Rows(), [(u'MW-1', u'Active', u'Figure 1'), (u'MW-2', u'Abandoned', u'Figure 3'),
+                                       (u'MW-3', u'Proposed', u'Figure 2')])
+
+    def test_row_compare(self):
+        helper.np = None
+        self.Check_Figure_Field_Update()
+
+    @unittest.skipIf(helper.np is None, "numpy is not installed")
+    def test_columnar_compare(self):
+        self.Check_Figure_Field_Update()
+
+    def test_every_row(self):
+        updates = helper.Update_Fields(self.MASTER, self.CHILD, 'Location_ID', 'Location_ID', ['Status'])
+        self.assertEqual(updates, {'Status': 3})
+        self.assertEqual([row[1] for row in self.Rows()], [u'Active', u'Abandoned', u'Destroyed'])
+
+
+class DeleteValuesTest(unittest.TestCase):
+
+    FC = 'C:/Test/Project.gdb/Report_Samples'
+
+    def setUp(self):
+        arcpy_standin.Reset()
+        fc = arcpy_standin.Table([arcpy_standin.Field('Location_ID', 'String', 20), arcpy_standin.Field('Depth', 'Single'),
+                                  arcpy_standin.Field('Count', 'Integer')], 'point')
+        for values in [(u'MW-1', 2.3, 1), (u'MW-2', 0.1, 2), (u'', None, None), (u'MW-1', 5.0, 3), (None, 2.3, 3)]:
+            fc.insert([Geometry(1, 1)] + list(values))
+        arcpy_standin.TABLES[self.FC] = fc
+
+    def Remaining(self, field):
+        table = arcpy_standin.TABLES[self.FC]
+        index = table.field_index(field)
+        return sorted(row[index] for row in table.rows)
+
+    def test_single_values(self):
+        helper.Delete_Values_From_FC("2.3;NULL;deep", 'Depth', 'Report_Samples', self.FC)
+        self.assertEqual(self.Remaining('Depth'), [helper.Single_Value(0.1), 5.0])
+        self.assertIn("Deleting the following from Report_Samples...........................2.3 (2 deleted)", arcpy_standin.MESSAGES)
+
+    def test_text_values(self):
+        helper.Delete_Values_From_FC("'MW-1';' ';MW-9", 'Location_ID', 'Report_Samples', self.FC)
+        self.assertEqual(self.Remaining('Location_ID'), [None, u'MW-2'])
+
+    def test_integer_values(self):
+        helper.Delete_Values_From_FC("3;2.0", 'Count', 'Report_Samples', self.FC)
+        self.assertEqual(self.Remaining('Count'), [None, 1])
+
+
+class EditCheckpointTest(unittest.TestCase):
+
+    CHILD = 'C:/Test/Project.gdb/Report_Samples'
+
+    def setUp(self):
+        arcpy_standin.Reset()
+        child = arcpy_standin.Table([arcpy_standin.Field('Location_ID', 'String', 20), arcpy_standin.Field('Status', 'String', 20),
+                                     arcpy_standin.Field('Figure_Name', 'String', 20)], 'point')
+        for i, figure in enumerate(['Figure 1', 'Figure 2', 'Figure 3']):
+            child.insert([Geometry(i, i), u'MW-{}'.format(i + 1), u'Active', unicode(figure)])
+        arcpy_standin.TABLES[self.CHILD] = child
+        self.folder = tempfile.mkdtemp()
+        self.scratch = arcpy_standin.env.scratchFolder
+        arcpy_standin.env.scratchFolder = self.folder
+        self.Write_Parent('Abandoned')
+        self.update_fields = helper.Update_Fields
+
+    def tearDown(self):
+        helper.Update_Fields = self.update_fields
+        arcpy_standin.env.scratchFolder = self.scratch
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def Write_Parent(self, status, modified=None):
+        self.csv = Write_CSV(self.folder, ['Location_ID', 'Status'], [['MW-1', status], ['MW-2', status], ['MW-3', status]], 'Parent.csv')
+        if modified is not None:
+            os.utime(self.csv, (modified, modified))
+
+    def Sync(self):
+        snapshot = helper.CSV_Snapshot(self.csv, 'Location_ID', ['Status'], self.CHILD, 'Location_ID')
+        return helper.Update_Fields_Chunked(self.csv, self.CHILD, 'Location_ID', 'Location_ID', ['Status'], 'Figure_Name',
+                                            ['Figure 1', 'Figure 2', 'Figure 3'], chunk_figures=1, snapshot=snapshot)
+
+    def Fail_Sync(self):
+        #The second chunk fails, so only Figure 1 is saved.
+        calls = []
+        def failing_update(*args, **kwargs):
+            calls.append(args)
+            if len(calls) == 2:
+                raise RuntimeError("Lost the connection")
+            return self.update_fields(*args, **kwargs)
+        helper.Update_Fields = failing_update
+        self.assertRaises(RuntimeError, self.Sync)
+        helper.Update_Fields = self.update_fields
+
+    def Statuses(self):
+        return [row[3] for row in arcpy_standin.TABLES[self.CHILD].rows]
+
+    def test_checkpoint_file(self):
+        checkpoint = helper.Edit_Checkpoint({'job': 1}, 'stamp 1')
+        checkpoint.commit(['Figure 1', 2.0])
+        self.assertEqual(helper.Edit_Checkpoint({'job': 1}, 'stamp 1').remaining(['Figure 1', 'Figure 2', 2]), ['Figure 2'])
+        self.assertEqual(helper.Edit_Checkpoint({'job': 2}, 'stamp 1').remaining(['Figure 1']), ['Figure 1'])
+        self.assertEqual(helper.Edit_Checkpoint({'job': 1}, 'stamp 2').remaining(['Figure 1']), ['Figure 1'])
+        checkpoint.finish()
+        self.assertFalse(os.path.exists(checkpoint.path))
+
+    def test_resume(self):
+        self.Fail_Sync()
+        self.assertEqual(self.Statuses(), [u'Abandoned', u'Active', u'Active'])
+        #Figure 1 is edited after the failure.  The resumed run skips it, says so, and finishes the rest.
+        arcpy_standin.TABLES[self.CHILD].rows[0][3] = u'Edited'
+        del arcpy_standin.MESSAGES[:]
+        self.assertEqual(self.Sync(), {'Status': 2})
+        self.assertEqual(self.Statuses(), [u'Edited', u'Abandoned', u'Abandoned'])
+        self.assertTrue(any(message.startswith("Resuming an earlier run: 1 of 3") for message in arcpy_standin.MESSAGES))
+
+    def test_changed_source_starts_over(self):
+        self.Fail_Sync()
+        self.Write_Parent('Destroyed', os.path.getmtime(self.csv) + 10)
+        self.assertEqual(self.Sync(), {'Status': 3})
+        self.assertEqual(self.Statuses(), [u'Destroyed'] * 3)
+
+
+class FindNewFeatureSetsTest(unittest.TestCase):
+
+    def test_feature_sets(self):
+        existing = helper.Spatial_Index([('A', Geometry(1, 1)), ('B', Geometry(2, 2))])
+        candidates = [(1, 'A', Geometry(1, 1)), (2, 'A', Geometry(2, 2)), (3, 'B', Geometry(2, 2)),
+                      (4, "'C'", Geometry(1, 1))]
+        self.assertEqual(helper.Find_New_Feature_Sets(candidates, existing), {'A': [2], 'B': [], 'C': [4]})
+
+
+class CompileWhereClausesTest(unittest.TestCase):
+
+    def setUp(self):
+        arcpy_standin.Reset()
+
+    def test_integer_ranges_and_null(self):
+        clauses = helper.Compile_Where_Clauses('"ID"', 'Integer', ['1', '2', '3', '4', '7', 9, 'NULL', "'10'"])
+        self.assertEqual(clauses, ['"ID" IN (7, 9, 10) OR ("ID" >= 1 AND "ID" <= 4) OR "ID" IS NULL'])
+
+    def test_bad_numbers_are_skipped(self):
+        clauses = helper.Compile_Where_Clauses('"ID"', 'SmallInteger', ['5', 'five', '2.5', ''])
+        self.assertEqual(clauses, ['"ID" = 5'])
+        self.assertEqual(len(arcpy_standin.MESSAGES), 2)
+
+    def test_strings_are_quoted_and_split(self):
+        clauses = helper.Compile_Where_Clauses('"NAME"', 'String', ["O'Hare", 'B', 'C', 'B'], max_items=2)
+        self.assertEqual(clauses, ['"NAME" IN (\'O\'\'Hare\', \'B\')', '"NAME" = \'C\''])
+
+    def test_single_values_use_a_tolerance(self):
+        clauses = helper.Compile_Where_Clauses('"DEPTH"', 'Single', ['2.5'])
+        self.assertEqual(len(clauses), 1)
+        self.assertTrue(clauses[0].startswith('("DEPTH" >= 2.49999') and '"DEPTH" <= 2.50000' in clauses[0])
+
+
+class FindNewFeatureFingerprintsTest(unittest.TestCase):
+
+    def test_fingerprints_match_on_unique_id(self):
+        existing = [(1, 'A', Geometry(1, 1), 'ID1'), (2, 'A', Geometry(2, 2), 'ID2')]
+        candidates = [(10, 'A', Geometry(1.0004, 1), 'ID1'),   #Same feature, coordinate noise
+                      (11, 'A', Geometry(9, 9), 'ID2'),        #Same feature, geometry edited in the report
+                      (12, 'A', Geometry(1, 1), 'ID3'),        #New feature stacked on top of ID1
+                      (13, 'A', Geometry(5, 5), 'ID4'),        #New feature
+                      (14, 'B', Geometry(1, 1), 'ID1')]        #Same ID in a different figure
+        new_features, stacked = helper.Find_New_Feature_Fingerprints(candidates, existing)
+        self.assertEqual(new_features, {'A': [12, 13], 'B': [14]})
+        self.assertEqual(stacked, {'A': 1, 'B': 0})
+
+    def test_fingerprints_without_unique_id(self):
+        #Features without a unique ID are matched on the geometry, once per report feature.
+        existing = [(1, 'A', Geometry(1, 1), None)]
+        candidates = [(10, 'A', Geometry(1, 1), None), (11, 'A', Geometry(1, 1), None), (12, 'A', Geometry(3, 3), None)]
+        new_features, stacked = helper.Find_New_Feature_Fingerprints(candidates, existing)
+        self.assertEqual(new_features, {'A': [11, 12]})
+        self.assertEqual(stacked, {'A': 0})
+
+
+class ChangePlanTest(unittest.TestCase):
+
+    TABLE = 'C:/Test/Project.gdb/Lab_Results'
+    FIELDS = ['Sample_ID', 'Date_Sampled', 'Result']
+
+    def setUp(self):
+        arcpy_standin.Reset()
+        table = arcpy_standin.Table([arcpy_standin.Field('Sample_ID', 'String', 20), arcpy_standin.Field('Date_Sampled', 'Date'),
+                                     arcpy_standin.Field('Result', 'Single')])
+        table.insert([u'MW-1', datetime(2015, 1, 2, 3, 4, 5, 678000), 1.0])
+        table.insert([u'MW-2', datetime(2015, 1, 3), 2.0])
+        arcpy_standin.TABLES[self.TABLE] = table
+        self.folder = tempfile.mkdtemp()
+        self.scratch = arcpy_standin.env.scratchFolder
+        arcpy_standin.env.scratchFolder = self.folder
+
+    def tearDown(self):
+        arcpy_standin.env.scratchFolder = self.scratch
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def Rows(self):
+        table = arcpy_standin.TABLES[self.TABLE]
+        return sorted(tuple(row[table.field_index(field)] for field in self.FIELDS) for row in table.rows)
+
+    def test_plan_and_apply(self):
+        plan = helper.Change_Plan("Test")
+        plan.update(self.TABLE, 'Sample_ID', u'MW-1', [('Date_Sampled', datetime(2015, 1, 2, 3, 4, 5, 678000), datetime(2016, 1, 1, 0, 0, 0, 1)),
+                                                       ('Result', 1.0, helper.Single_Value(2.3))])
+        #MW-2 was edited after the plan was made, so the planned update is a conflict.
+        plan.update(self.TABLE, 'Sample_ID', u'MW-2', [('Result', 9.0, 3.0)])
+        plan.insert(self.TABLE, self.FIELDS, (u'MW-3', datetime(2015, 1, 4, 0, 0, 0, 5), helper.Single_Value(0.1)), skip_existing=True)
+        plan.insert(self.TABLE, self.FIELDS, (u'MW-2', datetime(2015, 1, 3), 2.0), skip_existing=True)
+        path = plan.save(os.path.join(self.folder, 'Test.plan.jsonl.gz'))
+        self.assertEqual(len(arcpy_standin.TABLES[self.TABLE].rows), 2)
+
+        results = helper.Change_Plan.load(path).apply()
+        self.assertEqual(results, [('update', self.TABLE, 1, 1), ('insert', self.TABLE, 1, 1)])
+        self.assertEqual(self.Rows(), [(u'MW-1', datetime(2016, 1, 1, 0, 0, 0, 1), helper.Single_Value(2.3)),
+                                       (u'MW-2', datetime(2015, 1, 3), 2.0),
+                                       (u'MW-3', datetime(2015, 1, 4, 0, 0, 0, 5), helper.Single_Value(0.1))])
+        self.assertRaises(ValueError, helper.Change_Plan.load, path)
+
+
+class CSVSnapshotTest(unittest.TestCase):
+
+    CHILD = 'C:/Test/Project.gdb/Report_Samples'
+
+    def setUp(self):
+        arcpy_standin.Reset()
+        child = arcpy_standin.Table([arcpy_standin.Field('Location_ID', 'String', 20), arcpy_standin.Field('Depth', 'Single'),
+                                     arcpy_standin.Field('Status', 'String', 20)], 'point')
+        child.insert([Geometry(1, 1), u'MW-1', 1.0, u'Active'])
+        child.insert([Geometry(2, 2), u'MW-2', 2.5, u'Active'])
+        child.insert([Geometry(3, 3), u'MW-3', None, u'Active'])
+        arcpy_standin.TABLES[self.CHILD] = child
+        self.folder = tempfile.mkdtemp()
+        self.csv = Write_CSV(self.folder, ['Location ID', 'Depth', 'Status', 'Notes'],
+                             [['MW-1', '1.1', 'Active', 'x'], ['MW-2', '2.5', 'Abandoned', ''], ['MW-3', '0.3', 'Active', '']])
+        self.numpy = helper.np
+
+    def tearDown(self):
+        helper.np = self.numpy
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def Snapshot(self):
+        return helper.CSV_Snapshot(self.csv, 'Location_ID', ['Depth', 'Status', 'Missing'], self.CHILD, 'Location_ID')
+
+    def test_snapshot_rows(self):
+        snapshot = self.Snapshot()
+        self.assertEqual(snapshot.fields, ['Depth', 'Status'])
+        self.assertEqual(snapshot.rows[u'MW-1'], (helper.Single_Value(1.1), u'Active'))
+
+    def Check_Rerun(self):
+        updates = helper.Update_Fields(self.csv, self.CHILD, 'Location_ID', 'Location_ID', ['Depth', 'Status'], snapshot=self.Snapshot())
+        self.assertEqual(updates, {'Depth': 2, 'Status': 1})
+        #The Single values read back from the child are rounded, so nothing has changed on the second run.
+        updates = helper.Update_Fields(self.csv, self.CHILD, 'Location_ID', 'Location_ID', ['Depth', 'Status'], snapshot=self.Snapshot())
+        self.assertEqual(updates, {'Depth': 0, 'Status': 0})
+
+    def test_row_compare(self):
+        helper.np = None
+        self.Check_Rerun()
+
+    @unittest.skipIf(helper.np is None, "numpy is not installed")
+    def test_columnar_compare(self):
+        self.Check_Rerun()
+
+
+class SortMergeDiffTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def test_matches_set_difference(self):
+        left = [(i % 50, 'row {}'.format(i % 50), None if i % 7 else 1.5) for i in xrange(0, 200, 3)]
+        right = [(i % 50, 'row {}'.format(i % 50), None if i % 7 else 1.5) for i in xrange(0, 200, 2)]
+        #A run size of 8 rows spills each side to several files.
+        results = list(helper.Sort_Merge_Diff(iter(left), iter(right), memory_rows=8, removed=True, spill_folder=self.folder))
+        new = [row for kind, row in results if kind == 'new']
+        removed = [row for kind, row in results if kind == 'removed']
+        self.assertEqual(set(new), set(left) - set(right))
+        self.assertEqual(len(new), len(set(new)))
+        self.assertEqual(set(removed), set(right) - set(left))
+        self.assertEqual(len(removed), len(set(removed)))
+        self.assertEqual(os.listdir(self.folder), [])
+
+    def test_removed_rows_are_only_yielded_when_asked(self):
+        results = list(helper.Sort_Merge_Diff([(1,), (2,)], [(2,), (3,)], memory_rows=1, spill_folder=self.folder))
+        self.assertEqual(results, [('new', (1,))])
+
+
+class ValidateFileRecordsTest(unittest.TestCase):
+
+    FIELD_INFO = [['OBJECTID', 'OID'], ['NAME', 'String'], ['COUNT', 'SmallInteger'], ['DEPTH', 'Double'],
+                  ['SAMPLE_DATE', 'Date']]
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def test_good_file(self):
+        filename = Write_CSV(self.folder, ['NAME', 'COUNT', 'DEPTH', 'SAMPLE DATE'],
+                             [['MW-1', '3', '1.5', '01/02/2015'], ['MW-2', '', '', '']])
+        self.assertEqual(helper.Validate_File_Records(filename, self.FIELD_INFO, {'NAME': 10}), [])
+
+    def test_every_problem_is_reported(self):
+        filename = Write_CSV(self.folder, ['NAME', 'COUNT', 'DEPTH'],
+                             [['MW-1', '3', '1.5'],
+                              ['MW-LONG-NAME', '40000', 'nan'],
+                              ['MW-3', 'x', 'inf'],
+                              ['MW-4']])
+        problems = helper.Validate_File_Records(filename, self.FIELD_INFO, {'NAME': 10})
+        self.assertEqual(len(problems), 5)
+        self.assertIn('SAMPLE_DATE', problems[0])
+        self.assertIn('line(s) 5', problems[1])
+        self.assertTrue(problems[2].startswith('NAME (String): 1 value(s)'))
+        self.assertTrue(problems[3].startswith('COUNT (SmallInteger): 2 value(s)'))
+        self.assertIn('outside the SmallInteger range', problems[3])
+        self.assertTrue(problems[4].startswith('DEPTH (Double): 2 value(s)'))
+
+    def test_single_range(self):
+        filename = Write_CSV(self.folder, ['NAME', 'COUNT', 'DEPTH'], [['MW-1', '1', '1e39'], ['MW-2', '2', '3.4e38']])
+        problems = helper.Validate_File_Records(filename, [['NAME', 'String'], ['COUNT', 'Integer'], ['DEPTH', 'Single']])
+        self.assertEqual(len(problems), 1)
+        self.assertIn('line 2', problems[0])
+        self.assertIn('outside the Single range', problems[0])
+
+
+@unittest.skipIf(helper.np is None, "numpy is not installed")
+class ColumnarDiffTest(unittest.TestCase):
+
+    TYPES = ['String', 'Single', 'Integer', 'Date']
+
+    def Columns(self, rows):
+        return helper.Records_To_Columns(rows, self.TYPES, chunk_size=2)
+
+    def test_column_values_round_trip(self):
+        rows = [(u'MW-1', 2.3, 5, datetime(2015, 1, 2)), (None, None, None, None), (u'MW-3', -0.0, -1, datetime(2015, 1, 2, 3, 4, 5, 6))]
+        columns = self.Columns(rows)
+        self.assertEqual([tuple(helper.Column_Value(column, i) for column in columns) for i in xrange(3)],
+                         [(u'MW-1', helper.Single_Value(2.3), 5, datetime(2015, 1, 2)), (None, None, None, None),
+                          (u'MW-3', 0.0, -1, datetime(2015, 1, 2, 3, 4, 5, 6))])
+
+    def test_anti_join_rounds_single_values(self):
+        #The left side holds the unrounded python floats, the right side the values read back from a Single field.
+        left = self.Columns([(u'MW-1', 2.3, 1, None), (u'MW-2', 0.1, 2, None), (u'MW-1', 2.3, 1, None), (u'MW-4', 7.5, 4, None)])
+        right = self.Columns([(u'MW-1', helper.Single_Value(2.3), 1, None), (u'MW-2', helper.Single_Value(0.1), 2, None)])
+        left, right = helper.Align_Columns(left, right)
+        self.assertEqual(helper.Array_Anti_Join(left, right).tolist(), [3])
+
+    def test_changed_rows(self):
+        source = self.Columns([(u'A', 1.1, 1, None), (u'B', 2.2, 2, None), (u'C', 3.3, 3, None)])
+        target = self.Columns([(u'C', helper.Single_Value(3.3), 3, None), (u'A', helper.Single_Value(1.1), 9, None),
+                               (u'D', 4.4, 4, None)])
+        source_keys, target_keys = helper.Align_Columns(source[:1], target[:1])
+        source_values, target_values = helper.Align_Columns(source[1:], target[1:])
+        target_index, source_index = helper.Array_Changed_Rows(source_keys, source_values, target_keys, target_values)
+        self.assertEqual((target_index.tolist(), source_index.tolist()), ([1], [0]))
+
+
+class StreamFileRecordsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.csv = Write_CSV(self.folder, ['Sample ID', 'Notes', 'Result', 'Date Sampled'],
+                             [['MW-1', 'Quoted, with a comma', '1.5', '01/02/2015'],
+                              ['MW-2', 'Two\nlines and "quotes"', '', '2015-01-03'],
+                              [],
+                              ['MW-3', '', '2', '']])
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def test_projection_and_quoting(self):
+        chunks = list(helper.Stream_File_Records(self.csv, ['Notes', 'Sample_ID'], chunk_size=2))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 1])
+        self.assertEqual(chunks[0], [('Quoted, with a comma', 'MW-1'), ('Two\nlines and "quotes"', 'MW-2')])
+
+    def test_conversion(self):
+        field_info = [['Sample_ID', 'String', 20], ['Result', 'Double', None], ['Date_Sampled', 'Date', None]]
+        rows = [row for chunk in helper.Stream_File_Records(self.csv, ['Sample_ID', 'Result', 'Date_Sampled'], field_info) for row in chunk]
+        self.assertEqual(rows, [(u'MW-1', 1.5, datetime(2015, 1, 2)), (u'MW-2', None, datetime(2015, 1, 3)), (u'MW-3', 2.0, None)])
+
+    def test_bad_value_reports_the_line(self):
+        rows = helper.Stream_File_Records(self.csv, ['Notes'], [['Notes', 'Integer', None]])
+        with self.assertRaises(ValueError) as context:
+            list(rows)
+        self.assertIn('line 2', str(context.exception))
+
+
+class AddNewRecordsTest(unittest.TestCase):
+
+    TABLE = 'C:/Test/Project.gdb/Lab_Results'
+
+    def setUp(self):
+        arcpy_standin.Reset()
+        arcpy_standin.TABLES[self.TABLE] = arcpy_standin.Table([arcpy_standin.Field('Sample_ID', 'String', 20),
+                                                                arcpy_standin.Field('Result', 'Single'),
+                                                                arcpy_standin.Field('Qualifier', 'String', 5)])
+        self.folder = tempfile.mkdtemp()
+        self.csv = Write_CSV(self.folder, ['Sample_ID', 'Result', 'Qualifier'],
+                             [['MW-1', '2.3', ''], ['MW-2', '0.1', 'J'], ['MW-3', '', 'U'], ['MW-1', '2.3', '']])
+        self.field_info = helper.Extract_Field_NameType(self.TABLE)
+        self.numpy = helper.np
+
+    def tearDown(self):
+        helper.np = self.numpy
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def Check_Rerun(self):
+        #The first run adds every distinct row.  The second run finds them all in the table, even though the table holds
+        #the Single values rounded to single precision.
+        self.assertEqual(len(helper.Add_New_Records(self.csv, self.TABLE, self.field_info)), 3)
+        self.assertEqual(helper.Add_New_Records(self.csv, self.TABLE, self.field_info), [])
+        self.assertEqual(len(arcpy_standin.TABLES[self.TABLE].rows), 3)
+
+    def test_the_stand_in_rounds_single_values(self):
+        table = arcpy_standin.TABLES[self.TABLE]
+        table.insert([u'MW-9', 2.3, None])
+        self.assertNotEqual(table.rows[-1][2], 2.3)
+        self.assertEqual(table.rows[-1][2], helper.Single_Value(2.3))
+
+    def test_set_diff(self):
+        helper.np = None
+        self.Check_Rerun()
+
+    @unittest.skipIf(helper.np is None, "numpy is not installed")
+    def test_numpy_diff(self):
+        self.Check_Rerun()
+
+    def test_out_of_core_diff(self):
+        memory_rows = helper.Diff_Memory_Rows
+        helper.Diff_Memory_Rows = 1
+        try:
+            self.Check_Rerun()
+        finally:
+            helper.Diff_Memory_Rows = memory_rows
+
+
+if __name__ == '__main__':
+    unittest.main()
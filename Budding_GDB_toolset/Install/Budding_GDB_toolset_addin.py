@@ -1,13 +1,27 @@
 import arcpy
 import pythonaddins
 import os
+import sys
+import subprocess
 from Tkinter import Tk
 
 rel_path = os.path.dirname(__file__)
 toolbox_path = os.path.join(rel_path, r'Toolbox\Toolset.tbx')
+batch_toolbox_path = os.path.join(rel_path, r'Toolbox\Batch_Toolset.pyt')
+bin_path = os.path.join(rel_path, r'Toolbox\bin')
 doc_path = os.path.join(rel_path, r'Excel_Tools')
 arcpy.ImportToolbox(toolbox_path)
 
+#Start the warm worker (Toolbox\bin\warm_worker.py) so the tools do not pay the start up cost on every run.  The worker exits
+#right away when one is already running.  Set BUDDING_GDB_WARM_WORKER to 0 to run every tool in its own process.
+if os.environ.get('BUDDING_GDB_WARM_WORKER', '1') != '0':
+    DETACHED_PROCESS = 0x00000008
+    try:
+        subprocess.Popen([os.path.join(sys.exec_prefix, 'pythonw.exe'), os.path.join(bin_path, 'warm_worker.py')],
+                         cwd=bin_path, creationflags=DETACHED_PROCESS, close_fds=True)
+    except OSError:
+        pass
+
 class btn_add_features(object):
     """Implementation for Budding_GDB_toolset_addin.button_add_features (Button)"""
     def __init__(self):
@@ -56,6 +70,14 @@ class btn_update_attrib_tbl_tbl(object):
     def onClick(self):
         pythonaddins.GPToolDialog(toolbox_path, 'AttributeUpdateTableTable')
 
+class btn_update_attrib_batch(object):
+    """Implementation for Budding_GDB_toolset_addin.button_update_attrib_batch (Button)"""
+    def __init__(self):
+        self.enabled = True
+        self.checked = False
+    def onClick(self):
+        pythonaddins.GPToolDialog(batch_toolbox_path, 'UpdateAttributesBatch')
+
 class btn_xl_batch_query(object):
     """Implementation for Budding_GDB_toolset_addin.button_xl_batch_query (Button)"""
     def __init__(self):
@@ -4,16 +4,20 @@
 #
 # Log:
 #	1. Complete overhaul of code. 08/12/2016
-#   
-# TODO:
-#   1. Add a check to look for geometry  that are stacked on top of each other. 3/31/2015
-#        - Compares the number of records in the output "Locations in secondary output" and the report FC.
-#        - If the number of records are the same, continue with script
-#        - If the number of records are not the same, will need to create a list of locations that are not in the report FC.
-#        - The additional records will be added to the Feature_Check_Selection which is the Sample_Check FC.
+#   2. New features are found by unique ID, so geometry that is stacked on top of each other is found as well, and the stacked
+#      features are reported by geometry fingerprint (Unique_ID_Field).
+#   3. Part 1 only spatially joins the Parent features that intersect the selected figures (Figure_Extent_Pushdown).
+#   4. The figure selection and the Part 1 spatial join are cached in the Scratch GDB and reused when their inputs did not
+#      change (Join_Cache_Entries).
 #
 #..............................................................................................................................
 
+# Hand the run to the warm worker (warm_worker.py) when one is running.  Otherwise the tool runs in this process.
+import sys, warm_worker
+Worker_Status = warm_worker.Run_In_Worker(__file__)
+if Worker_Status is not None:
+    sys.exit(Worker_Status)
+
 # Import arcpy module
 import os, arcpy, sys
 from datetime import datetime
@@ -21,8 +25,9 @@ from os.path import split, join
 from helper import *
 arcpy.env.overwriteOutput = True
 
-startTime = datetime.now()
-print startTime
+Metrics = Run_Metrics("Add New Geometry")
+print Metrics.run.startTime
+Metrics.start("Initial Setup")
 
 try:
 
@@ -59,152 +64,222 @@ try:
 
     #..............................................................................................................................
     #Hard Coded Data
+    #Each setting can be changed with a BUDDING_GDB_ADD_NEW_GEOMETRY_<SETTING> (or BUDDING_GDB_<SETTING>) environment variable,
+    #i.e. BUDDING_GDB_SYNC_MODE=plan.  See Tool_Setting.
     #..............................................................................................................................
 
-    #Check if there is a filepath from the input layers. If not, pre-pend the path. Also extract the FC names.
-    ParentPath, ParentFC = InputCheck(Parent)
-    ChildPath, ChildFC = InputCheck(Child)
-    FigureExtentpath, FigureExtentFC = InputCheck(FigureExtent)
-
-    if Secondary_Boundary:
-        SecondaryBoundarypath, SecondaryBoundaryFC = InputCheck(Secondary_Boundary)
+    #Number of worker processes used to check the figures in Part 2 and Part 3.  1 checks all the figures in this process,
+    #0 uses one worker per CPU.  Each worker checks a partition of the figures and the results are merged in to the Final Output.
+    Figure_Workers = Tool_Setting('Figure_Workers', 1, "Add New Geometry")
+
+    #Incremental mode: only the Parent features added or changed since the figures were last checked are spatially joined.
+    #The watermark (max ObjectID and a fingerprint of every Parent feature) is kept in the Scratch GDB.  Features missing from
+    #the Report FC that did not change since the last run (e.g. new features from an earlier run that were never added, or
+    #features deleted from the Report FC by hand) are only picked up by a full run, so set this to False to run a full check.
+    Incremental_Mode = Tool_Setting('Incremental_Mode', False, "Add New Geometry")
+
+    #Memory only mode: the Figure Extent and Secondary Boundary selections are kept in the in_memory workspace and in python
+    #lists, and only the Final Output is written to the Scratch GDB.  Memory only mode checks the figures in this process.
+    Memory_Only = Tool_Setting('Memory_Only', False, "Add New Geometry")
+
+    #Unique ID field in the Parent and Report FC.  New features are found by comparing the unique IDs in each figure, so features
+    #stacked on top of a feature that is already in the figure are found as well.  The geometry (snapped to a grid of
+    #Fingerprint_Tolerance map units) is used to report the new features stacked on a feature with a different unique ID, and to
+    #match features with no unique ID.  Leave blank to find the new features with an intersect check instead (stacked features
+    #are missed).
+    Unique_ID_Field = Tool_Setting('Unique_ID_Field', "Location_ID", "Add New Geometry")
+    Fingerprint_Tolerance = Tool_Setting('Fingerprint_Tolerance', 0.001, "Add New Geometry")
+
+    #Join cache: the figure selection and the Part 1 spatial join are kept in the Scratch GDB, keyed by a hash of the Parent
+    #features that fall in the figures, the selected figures (geometry, attributes and fields) and the figure list, and reused
+    #by later runs when none of them changed.  Up to Join_Cache_Entries results are kept for up to Join_Cache_Days days.  Set
+    #Join_Cache_Entries to 0 to turn the cache off.  The cache is not used in memory only mode or for the incremental mode
+    #spatial join of the changed features.
+    Join_Cache_Entries = Tool_Setting('Join_Cache_Entries', 5, "Add New Geometry")
+    Join_Cache_Days = Tool_Setting('Join_Cache_Days', 30, "Add New Geometry")
+
+    #Plan/apply mode.  'run' finds the new features and saves them to the Final Output for review.  'plan' also saves the new
+    #features to Plan_File.  'apply' skips the comparison and appends the new features saved in Plan_File to the Report FC.
+    Sync_Mode = Tool_Setting('Sync_Mode', 'run', "Add New Geometry", ['run', 'plan', 'apply'])
+    Plan_File = Tool_Setting('Plan_File', Change_Plan.default_path("Add New Geometry"), "Add New Geometry")
+
+    if Sync_Mode == 'apply':
+        Metrics.stop()
+        Metrics.start("Apply Plan")
+        Change_Plan.load(Plan_File).apply()
     else:
-        SecondaryBoundarypath, SecondaryBoundaryFC = InputCheck(FigureExtent)
-
-    #Check to see if all the Report feature classes have the FigureExtent Keyfield.
-    if not all((FieldExist(ChildPath,FigureExtent_KeyField), FieldExist(FigureExtentpath,FigureExtent_KeyField), FieldExist(SecondaryBoundarypath,FigureExtent_KeyField))):
-        arcpy.AddError(("The field {} does not exist in {}, {} or {}".format(FigureExtent_KeyField,ChildFC,FigureExtentFC,SecondaryBoundaryFC)))
-        sys.exit()
-
-    #Extracting File Paths for Feature Dataset and Scratch File Geodatabase
-    Scratch_FDPath = join(arcpy.Describe(Input_ScratchFD).catalogPath,(Input_ScratchFD))
-    Scratch_FD = Scratch_FDPath.rsplit("\\",1)[1]
-    in_mem_path = "in_memory"
-
-    #Setting the file path for the Temp FC's that will be created in the Scratch GDB.
-    #In Memory Features
-    FigSelection = Scratch_FD + "_FigureSelection"
-    FigSelectionPath = os.path.join(in_mem_path,FigSelection)
-    SpatialTmp = Scratch_FD + "_SpatialJoinTemp"
-    SpatialTmpPath = os.path.join(in_mem_path,SpatialTmp)
-    TempCheck = Scratch_FD + "_Point_CheckTmp"
-    TempCheck_Path = os.path.join(in_mem_path,TempCheck)
-
-    #Temporary features stored in the Scratch Database
-    Figure_Extent_Selection = Scratch_FD + "_FigureExtent_Selection"
-    Figure_Extent_Selection_Path = os.path.join(Scratch_FDPath,Figure_Extent_Selection)
-    Secondary_Boundary_Selection = Scratch_FD + "_BoundaryExtent_Selection"
-    Secondary_Boundary_Selection_Path = os.path.join(Scratch_FDPath,Secondary_Boundary_Selection)
-    Feature_Check_Selection = Scratch_FD + "_FinalOutput"
-    Feature_Check_Selection_Path = os.path.join(Scratch_FDPath,Feature_Check_Selection)
-
-    #Create the 3 Main Features Class's that will be stored in the Scratch GDB
-    FC_Exist(Figure_Extent_Selection, Scratch_FDPath, ChildPath)
-    FC_Exist(Secondary_Boundary_Selection, Scratch_FDPath, ChildPath)
-    FC_Exist(Feature_Check_Selection, Scratch_FDPath, ChildPath)
-
-    #........................................................................................................................................
-    #Setting up the Feature Class that stores the Figure Extent Polygons that will be updated.
-    #........................................................................................................................................
-
-    #Getting the number of figures to update
-    FigureList = Get_Figure_List(FigureExtentpath, FigureExtent_KeyField, input_figures)
-    arcpy.AddMessage("The following figure(s) are going to be updated:")
-    for item in FigureList:
-        arcpy.AddMessage(item)
-
-    #Make Feature Layer from Figure Extent FC
-    OutputLayer_FigureExtentFC = FigureExtentFC + "_Layer" #InputLayer + "_Layer"
-    Create_FL(OutputLayer_FigureExtentFC,FigureExtentpath,"")
-
-    #Selecting the records found the Figure list
-    for value in FigureList:
-        clause = buildWhereClause(OutputLayer_FigureExtentFC, FigureExtent_KeyField, value)
-        arcpy.SelectLayerByAttribute_management(OutputLayer_FigureExtentFC,"ADD_TO_SELECTION", clause)
-
-    #Copy all selected records to a standalone Feature Class which holds the all figure that will be updated.
-    arcpy.CopyFeatures_management(OutputLayer_FigureExtentFC, FigSelectionPath)
-
-    arcpy.Delete_management(OutputLayer_FigureExtentFC)
-    arcpy.AddMessage("Successfully created the Features Class, {}, which contains the figures to be updated.".format(FigSelection))
-    print "Successfully created the Features Class, {}, which contains the figures to be updated.".format(FigSelection)
-
-    print "......................................................................Initial Setup Runtime: {} (Total Runtime: {})".format(datetime.now()-startTime, datetime.now()-startTime)
-    arcpy.AddMessage("......................................................................Initial Setup Runtime: {} (Total Runtime: {})".format(datetime.now()-startTime, datetime.now()-startTime))
-
-
-    #..............................................................................................................................
-    # PART 1
-    # Samples within Figure Extent - Part of the program that performs a spatial join of sample locations from the Source GDB and
-    # the selected figures in the figure selection feature classes
-    #..............................................................................................................................
-    part1time = datetime.now()
-    print "Part 1: Selecting all the features that fall within the figure extents and deleting user specified record values...\n...\n...\n..."
-    arcpy.AddMessage("Part 1: Selecting all the features that fall within the figure extents and deleting user specified record values...\n...\n...\n...")
-
-    arcpy.SpatialJoin_analysis(ParentPath,FigSelectionPath,SpatialTmpPath,"JOIN_ONE_TO_MANY","KEEP_ALL","","INTERSECT", "", "" )
-    Select_and_Append(FigSelectionPath, SpatialTmpPath, Figure_Extent_Selection_Path)
-
-    #...................................................................................................................................
-    # Delete Samples - Part of the program that goes through Figure Extent Selection FC and deletes user specified samples types.
-    #...................................................................................................................................
-
-    Delete_Values_From_FC(What_To_Delete_List, Delete_Field, Figure_Extent_Selection, Figure_Extent_Selection_Path)
-
-    print "......................................................................Part 1 Runtime: {} (Total Runtime: {})".format(datetime.now()-part1time, datetime.now()-startTime)
-    arcpy.AddMessage("......................................................................Part 1 Runtime: {} (Total Runtime: {})".format(datetime.now()-part1time, datetime.now()-startTime))
-
-    #.....................................................................................................................................................
-    # PART 2
-    # Part of the program that goes through the features within the Figure Extent (Figure_Extent_Selection_Path)
-    # and extracts all the features that fall inside a secondary boundary e.g. group location boundary, in each figure and saves to a standalone feature class.
-    # This part of the program basically creates a sub-selection of features that fall inside the figure extent. e.g. 10 features fall inside
-    # figure extent but out of that 10, 5 fall in the boundary exent. If there is no boundary exent, just select the Figure Extent Feature Class.
-    #.....................................................................................................................................................
-    part2time = datetime.now()
-    print "Part 2: Selecting the features within each figure extent that fall within the secondary boundary...\n...\n...\n..."
-    arcpy.AddMessage("Part 2: Selecting the features within each figure extent that fall within the secondary boundary...\n...\n...\n...")
-
-    for value in FigureList:
-        arcpy.AddMessage("Working on figure...................." + str(value))
-        print "Working on figure...................." + str(value)
-        clause = buildWhereClause(Figure_Extent_Selection_Path, FigureExtent_KeyField, value)
-        Select_and_Append(SecondaryBoundarypath, Figure_Extent_Selection_Path, Secondary_Boundary_Selection_Path,clause)
-
-    print "......................................................................Part 2 Runtime: {} (Total Runtime: {})".format(datetime.now()-part2time, datetime.now()-startTime)
-    arcpy.AddMessage("......................................................................Part 2 Runtime: {} Total Runtime: {})".format(datetime.now()-part2time, datetime.now()-startTime))
-
-    #..............................................................................................................................
-    # PART 3
-    # Sample Check - Part of the program that goes through the each group of samples in the boundary extent feature class and compares it against the Report Sample FC.
-    # 
-    # To find the difference between the Report Sample FC and the Sample Bucket FC, a spatial selection is performed to select samples in
-    # in the oundary extent FC that intersetct the Report sample FC.  An inverse selection is performed which now selects features that were
-    # not selected in the intersection.  This selection are the new samples that will be added to the Report sample FC.
-    #..............................................................................................................................
-    part3time = datetime.now()
-    print "Part 3: Find new features in each figure...\n...\n...\n..."
-    arcpy.AddMessage("Part 3: Find new feautres in each figure...\n...\n...\n...")
-
-    #create feature class layer for the Sample Check FC
-    OutputLayer_Feature_Check_Selection = Feature_Check_Selection + "_Layer"
-    Create_FL(OutputLayer_Feature_Check_Selection,Feature_Check_Selection_Path,"")
-
-    #Counter for # of new locations found
-    count = 0
-    for value in FigureList:
-        arcpy.AddMessage("Checking for new features in figure...................." + str(value))
-        print "Checking for new features in figure...................." + str(value)
-        clause = buildWhereClause(ChildPath, FigureExtent_KeyField, value)
-        FC_Exist(TempCheck, in_mem_path, ChildPath)
-        count = Find_New_Features(ChildPath, Secondary_Boundary_Selection_Path, TempCheck_Path, OutputLayer_Feature_Check_Selection, clause, count)
-    arcpy.Delete_management(TempCheck_Path)
-    arcpy.Delete_management(OutputLayer_Feature_Check_Selection)
-    arcpy.AddMessage("...\n...\nA total of {} new features were found which are stored in the Feature Class:\n     {} \nat the following path:\n     {}".format(count,Feature_Check_Selection,Scratch_FDPath))
+        #Check if there is a filepath from the input layers. If not, pre-pend the path. Also extract the FC names.
+        ParentPath, ParentFC = InputCheck(Parent)
+        ChildPath, ChildFC = InputCheck(Child)
+        FigureExtentpath, FigureExtentFC = InputCheck(FigureExtent)
+
+        if Secondary_Boundary:
+            SecondaryBoundarypath, SecondaryBoundaryFC = InputCheck(Secondary_Boundary)
+        else:
+            SecondaryBoundarypath, SecondaryBoundaryFC = InputCheck(FigureExtent)
+
+        #Check to see if all the Report feature classes have the FigureExtent Keyfield.
+        if not all((FieldExist(ChildPath,FigureExtent_KeyField), FieldExist(FigureExtentpath,FigureExtent_KeyField), FieldExist(SecondaryBoundarypath,FigureExtent_KeyField))):
+            arcpy.AddError(("The field {} does not exist in {}, {} or {}".format(FigureExtent_KeyField,ChildFC,FigureExtentFC,SecondaryBoundaryFC)))
+            sys.exit()
+        if Unique_ID_Field and not (FieldExist(ParentPath,Unique_ID_Field) and FieldExist(ChildPath,Unique_ID_Field)):
+            arcpy.AddWarning("The field {} does not exist in {} or {}.  New features are found with an intersect check and stacked features are missed.".format(Unique_ID_Field,ParentFC,ChildFC))
+            Unique_ID_Field = None
+
+        #Extracting File Paths for Feature Dataset and Scratch File Geodatabase
+        Scratch_FDPath = join(arcpy.Describe(Input_ScratchFD).catalogPath,(Input_ScratchFD))
+        Scratch_FD = Scratch_FDPath.rsplit("\\",1)[1]
+        in_mem_path = "in_memory"
+
+        #Setting the file path for the Temp FC's that will be created in the Scratch GDB.
+        #In Memory Features
+        FigSelection = Scratch_FD + "_FigureSelection"
+        FigSelectionPath = os.path.join(in_mem_path,FigSelection)
+        SpatialTmp = Scratch_FD + "_SpatialJoinTemp"
+        SpatialTmpPath = os.path.join(in_mem_path,SpatialTmp)
+
+        #Temporary features stored in the Scratch Database (or in memory when Memory_Only is set)
+        Intermediate_Path = in_mem_path if Memory_Only else Scratch_FDPath
+        Figure_Extent_Selection = Scratch_FD + "_FigureExtent_Selection"
+        Figure_Extent_Selection_Path = os.path.join(Intermediate_Path,Figure_Extent_Selection)
+        Secondary_Boundary_Selection = Scratch_FD + "_BoundaryExtent_Selection"
+        Secondary_Boundary_Selection_Path = os.path.join(Scratch_FDPath,Secondary_Boundary_Selection)
+        Feature_Check_Selection = Scratch_FD + "_FinalOutput"
+        Feature_Check_Selection_Path = os.path.join(Scratch_FDPath,Feature_Check_Selection)
+
+        #Create the 3 Main Features Class's that will be stored in the Scratch GDB.  In memory only mode the secondary boundary
+        #selection is never written.
+        FC_Exist(Figure_Extent_Selection, Intermediate_Path, ChildPath)
+        if not Memory_Only:
+            FC_Exist(Secondary_Boundary_Selection, Scratch_FDPath, ChildPath)
+        FC_Exist(Feature_Check_Selection, Scratch_FDPath, ChildPath)
+
+        #........................................................................................................................................
+        #Setting up the Feature Class that stores the Figure Extent Polygons that will be updated.
+        #........................................................................................................................................
+
+        #Getting the number of figures to update
+        FigureList = Get_Figure_List(FigureExtentpath, FigureExtent_KeyField, input_figures)
+        arcpy.AddMessage("The following figure(s) are going to be updated:")
+        for item in FigureList:
+            arcpy.AddMessage(item)
+
+        #The figure selection is reused from the join cache when the selected figures (geometry, attributes and fields) have not
+        #changed since an earlier run.  A new selection is written straight in to the cache.
+        Cache = Join_Cache(os.path.dirname(Scratch_FDPath), Scratch_FD, Join_Cache_Entries, Join_Cache_Days) if Join_Cache_Entries and not Memory_Only else None
+        Figure_Hash = None
+        if Cache is not None:
+            Figure_Hash = Join_Cache.key(Figure_Fingerprints([FigureExtentpath], FigureExtent_KeyField, FigureList, attributes=True))
+
+        #Copy all selected records to a standalone Feature Class which holds the all figure that will be updated.
+        FigSelectionPath = Select_Figures(FigureExtentpath, FigureExtent_KeyField, FigureList, FigSelectionPath, Cache, Figure_Hash)
+
+        Metrics.stop()
+
+
+        #..............................................................................................................................
+        # PART 1
+        # Samples within Figure Extent - Part of the program that performs a spatial join of sample locations from the Source GDB and
+        # the selected figures in the figure selection feature classes
+        #..............................................................................................................................
+        Metrics.start("Part 1")
+        print "Part 1: Selecting all the features that fall within the figure extents and deleting user specified record values...\n...\n...\n..."
+        arcpy.AddMessage("Part 1: Selecting all the features that fall within the figure extents and deleting user specified record values...\n...\n...\n...")
+
+        Parent_Features = ParentPath
+        if Incremental_Mode:
+            Watermark = Change_Watermark(os.path.dirname(Scratch_FDPath), Scratch_FD, ParentPath)
+            Changed_OIDs = Watermark.changed_oids(Figure_Fingerprints([FigureExtentpath, SecondaryBoundarypath], FigureExtent_KeyField, FigureList))
+            if Changed_OIDs is not None:
+                print "{} feature(s) in {} were added or changed since the last run".format(len(Changed_OIDs), ParentFC)
+                arcpy.AddMessage("{} feature(s) in {} were added or changed since the last run".format(len(Changed_OIDs), ParentFC))
+                Parent_Features = ParentFC + "_Changed"
+                Create_FL_From_OIDs(Parent_Features, ParentPath, Changed_OIDs)
+
+        #Spatial pushdown: only the Parent features that intersect the selected figures are read and written by the spatial join.
+        #The spatial join is reused from the join cache when neither those Parent features nor the selected figures changed.  The
+        #cache is not used for the changed features of the incremental mode.
+        Join_Cache_In_Use = Cache if Parent_Features == ParentPath else None
+        if Parent_Features == ParentPath:
+            Parent_Features = ParentFC + "_Candidates"
+            Create_FL(Parent_Features, ParentPath)
+        SpatialTmpPath = Spatial_Join_Figures(Parent_Features, FigSelectionPath, SpatialTmpPath, Join_Cache_In_Use, Figure_Hash)
+        Select_and_Append(FigSelectionPath, SpatialTmpPath, Figure_Extent_Selection_Path)
+
+        #...................................................................................................................................
+        # Delete Samples - Part of the program that goes through Figure Extent Selection FC and deletes user specified samples types.
+        #...................................................................................................................................
+
+        Delete_Values_From_FC(What_To_Delete_List, Delete_Field, Figure_Extent_Selection, Figure_Extent_Selection_Path)
+
+        Metrics.stop()
+
+        #.....................................................................................................................................................
+        # PART 2
+        # Part of the program that goes through the features within the Figure Extent (Figure_Extent_Selection_Path)
+        # and extracts all the features that fall inside a secondary boundary e.g. group location boundary, in each figure and saves to a standalone feature class.
+        # This part of the program basically creates a sub-selection of features that fall inside the figure extent. e.g. 10 features fall inside
+        # figure extent but out of that 10, 5 fall in the boundary exent. If there is no boundary exent, just select the Figure Extent Feature Class.
+        #.....................................................................................................................................................
+        Metrics.start("Part 2")
+        print "Part 2: Selecting the features within each figure extent that fall within the secondary boundary...\n...\n...\n..."
+        arcpy.AddMessage("Part 2: Selecting the features within each figure extent that fall within the secondary boundary...\n...\n...\n...")
+
+        #All figures are checked in one pass against a spatial index of the secondary boundary polygons.  In parallel and memory
+        #only mode the new features (Part 3) are found at the same time.
+        new_counts = None
+        if Memory_Only:
+            results = [Select_and_Find_New_Features(SecondaryBoundarypath, Figure_Extent_Selection_Path, ChildPath, FigureExtent_KeyField, FigureList,
+                                                    Unique_ID_Field, Fingerprint_Tolerance)]
+            figure_counts, new_counts = Merge_Figure_Results(results, Figure_Extent_Selection_Path, None, Feature_Check_Selection_Path)
+        elif Figure_Workers != 1 and len(FigureList) > 1:
+            figure_counts, new_counts = Select_and_Find_New_Features_Parallel(SecondaryBoundarypath, Figure_Extent_Selection_Path, ChildPath,
+                                                                              Secondary_Boundary_Selection_Path, Feature_Check_Selection_Path,
+                                                                              FigureExtent_KeyField, FigureList, Figure_Workers, Unique_ID_Field,
+                                                                              Fingerprint_Tolerance)
+        else:
+            figure_counts = Select_and_Append_Indexed(SecondaryBoundarypath, Figure_Extent_Selection_Path, Secondary_Boundary_Selection_Path, FigureExtent_KeyField, FigureList)
+        for value in FigureList:
+            arcpy.AddMessage("Features selected in figure {}.................... {}".format(value, figure_counts.get(Figure_Key(value), 0)))
+            print "Features selected in figure {}.................... {}".format(value, figure_counts.get(Figure_Key(value), 0))
+
+        Metrics.stop()
+
+        #..............................................................................................................................
+        # PART 3
+        # Sample Check - Part of the program that goes through the each group of samples in the boundary extent feature class and compares it against the Report Sample FC.
+        # 
+        # To find the difference between the Report Sample FC and the Sample Bucket FC, every feature is fingerprinted by its unique ID and
+        # geometry, and the fingerprints in the boundary extent FC are checked against the fingerprints of the report features of their own
+        # figure.  Features without a matching fingerprint are the new samples that will be added to the Report sample FC.  Without a
+        # unique ID field the report features are loaded into a spatial index and features that do not intersect a report feature are new.
+        #..............................................................................................................................
+        Metrics.start("Part 3")
+        print "Part 3: Find new features in each figure...\n...\n...\n..."
+        arcpy.AddMessage("Part 3: Find new feautres in each figure...\n...\n...\n...")
+
+        #The new features for every figure are found in one pass over the report features.
+        if new_counts is None:
+            new_counts = Find_New_Features_Indexed(ChildPath, Secondary_Boundary_Selection_Path, Feature_Check_Selection_Path, FigureExtent_KeyField, FigureList,
+                                                   Unique_ID_Field, Fingerprint_Tolerance)
+        for value in FigureList:
+            arcpy.AddMessage("Number of new features found in figure {}.................... {}".format(value, new_counts.get(Figure_Key(value), 0)))
+            print "Number of new features found in figure {}.................... {}".format(value, new_counts.get(Figure_Key(value), 0))
+        count = sum(new_counts.values())
+        arcpy.AddMessage("...\n...\nA total of {} new features were found which are stored in the Feature Class:\n     {} \nat the following path:\n     {}".format(count,Feature_Check_Selection,Scratch_FDPath))
+
+        if Sync_Mode == 'plan':
+            Plan = Change_Plan("Add New Geometry")
+            Plan.insert_features(Feature_Check_Selection_Path, ChildPath)
+            Plan.summary()
+            Plan.save(Plan_File)
+        if Incremental_Mode:
+            Watermark.save()
+        if Memory_Only:
+            arcpy.Delete_management(Figure_Extent_Selection_Path)
     
 
-    print "......................................................................Part 3 Runtime: {} (Total Runtime: {})".format(datetime.now()-part3time, datetime.now()-startTime)
-    arcpy.AddMessage("......................................................................Part 3 Runtime: {} (Total Runtime: {})".format(datetime.now()-part3time, datetime.now()-startTime))
+        Metrics.stop()
 
 except Exception, e:
     # If an error occurred, print line number and error message
@@ -221,3 +296,5 @@ except Exception, e:
     print e.message
     arcpy.AddMessage(e.message)
 
+finally:
+    Metrics.close()
@@ -4,19 +4,26 @@
 # Purpose - Update a GIS table with data saved in a .csv files.  The .csv file can consist of data that a user manually inputs or
 #           a query from a database.
 #
-#           The script starts by checking the input file for the following:
-#               - Do the field names match the ArcMap Table.
+#           The script starts by reading the input file once and checking it for the following (Validate_File_Records):
 #               - Are all the fields from the ArcMap table in the input file.
-#               - Do the field types fromt the input file match the ArcMap table.
+#               - Can every value be converted to the ArcMap table field type (and does it fit in text fields).
+#           Every problem is reported at once and nothing is added until the whole file passes.
 #
-#           Once all the checks pass, the input file columns are reordered to match the ArcMap Table. The input file is then compared to
-#           the ArcMap table to find new records.  The new records are exported to a temporary .csv file, imported into ArcMap using the
-#           TabletoTable_Conversion tool, and appened to ArcMap table.
+#           Once all the checks pass, the input file is streamed and each row is converted to the ArcMap Table field types. Rows that
+#           are not already in the ArcMap table are appended directly with an InsertCursor.
 #
 # Log:
 #       1. Complete overhaul of code. 08/12/2016
+#       2. Direct hash-diff ingest. The reorder.csv/schema.ini/TableToTable round trips have been removed.
+#       3. Single pass check of the input file (Validate_File_Records) before any records are added.
 #
 #..............................................................................................................................
+# Hand the run to the warm worker (warm_worker.py) when one is running.  Otherwise the tool runs in this process.
+import sys, warm_worker
+Worker_Status = warm_worker.Run_In_Worker(__file__)
+if Worker_Status is not None:
+    sys.exit(Worker_Status)
+
 import os, csv, arcpy, sys, operator
 from datetime import datetime
 from os.path import split, join
@@ -24,95 +31,10 @@ from string import replace
 from helper import *
 arcpy.env.overwriteOutput = True
 
-#Reorder columns of .csv file to match a specific format
-def Reorder_InputFile(input_file,header,csv_fields):
-    header = schema_header_check(header, csv_fields)
-    reader = csv.reader(open(input_file,'Ur'))
-    output_file_path = os.path.join(os.path.dirname(os.path.normpath(input_file)),"reorder.csv")
-    output_file = open(output_file_path,'wb')
-    writer = csv.writer(output_file)
-    readnames = reader.next()
-    name2index = dict((name, index) for index, name in enumerate(readnames))
-    writeindices = [name2index[name] for name in header]
-    reorderfunc = operator.itemgetter(*writeindices)
-    writer.writerow(header)
-    for row in reader:
-        writer.writerow(reorderfunc(row))
-    output_file.close()
-    return output_file_path
-
-def FC_Field_Type_Check(fc1,fc2):
-    fix_fields=[]
-    fc1_fields = Extract_Field_NameType(fc1)
-    fc2_fields = Extract_Field_NameType(fc2)
-    for x,y in zip(fc1_fields,fc2_fields):
-        if x != y:
-            fix_fields.append(x)
-    if len(fix_fields) != 0:
-        print "\nPlease check the schema.ini file located in the same folder as the input .csv file."
-        print "The following field(s) need to be to be fixed with the proper field type(s) ......\n "
-        print ("{0:<20} {1:>20}".format("Field Name:","Field Type"))
-        arcpy.AddWarning("\nPlease check the schema.ini file located in the same folder as the input .csv file.")
-        arcpy.AddWarning("The following field(s) need to be to be fixed with the proper field type(s)......\n ")
-        arcpy.AddMessage(("{0:<20} {1:>20}".format("Field Name:","Field Type")))
-        for field,type in fix_fields:
-            print ("{0:<20} {1:>20}".format(field,type))
-            arcpy.AddMessage(("{0:<20} {1:>20}".format(field,type)))
-        print "\n"
-        arcpy.AddMessage("\n")
-        sys.exit()
-
-def create_schema_file(file_path, fields, csv_fields):
-    name=[]
-    type=[]
-    for a,b in fields:
-        name.append(a)
-        if b == 'String':
-            type.append('Text')
-        elif b == "SmallInteger":
-            type.append('Short')
-        elif b == "Integer":
-            type.append('Long')
-        else:
-            type.append(b)
-    name = schema_header_check(name, csv_fields)    
-    fields=zip(name,type)
-    
-    directory = os.path.dirname(os.path.normpath(file_path))
-    print ("Creating schema.ini file in {}".format(directory))
-    arcpy.AddMessage(("Creating schema.ini file in {}".format(directory)))
-    schema = directory + "\schema.ini"
-
-    # Set new schema.ini
-    schema_file = open(schema,"w")
-    schema_file.write("[" + os.path.basename(os.path.normpath(file_path)) + "]\n")
-    #schema_file.write("Format=Delimited(,) .csv"
-    #schema_file.write("MaxScanRows=0\n") https://gisnuts.com/terra/blog/2012/06/14/using-the-schemaini-file-to-import-a-csv-file-into-arcgis
-    x=1
-    for name,type in fields:
-        if name.find(" ") > 0:
-            schema_file.write("Col{}=".format(x)+'"{}"'.format(name) + " {}\n".format(type))
-        else:
-            schema_file.write(r"Col{}="'{}'" {}\n".format(x,name,type))
-        x += 1
-
-    schema_file.close()
-
-def schema_header_check(fc_header, csv_header):
-    revised_name=[]
-    for fc_name in fc_header:
-        for file_name in csv_header:
-            if file_name == fc_name:
-                revised_name.append(fc_name)
-            else:
-                file_name2 = file_name.replace(' ','_')
-                if file_name2 == fc_name:
-                    revised_name.append(file_name)
-    return revised_name
-
-startTime = datetime.now()
-print startTime
+Metrics = Run_Metrics("Add New Table Records")
+print Metrics.run.startTime
 
+Changes = None
 try:
 
     #..............................................................................................................................
@@ -123,10 +45,21 @@ try:
     FC_INPUTPATH = arcpy.GetParameterAsText(1) # Inputpath for Feature Class
     INPUT_SCRATCHGDB= arcpy.GetParameterAsText(2) #Input Scratch GDB
 
+    #Every new record is written to a compressed change log (log_format 'jsonl' or 'csv') in the scratch folder.  The geoprocessing
+    #window only shows the number of new records and sample_size example records.
+    Changes = Change_Log("Add New Table Records", log_format='jsonl', sample_size=10)
+
     #..............................................................................................................................
     #Hard Coded Data
+    #Each setting can be changed with a BUDDING_GDB_ADD_NEW_TABLE_RECORDS_<SETTING> (or BUDDING_GDB_<SETTING>) environment
+    #variable, i.e. BUDDING_GDB_SYNC_MODE=plan.  See Tool_Setting.
     #..............................................................................................................................
 
+    #Plan/apply mode.  'run' finds and appends the new records in one run.  'plan' only finds the new records and saves them to
+    #Plan_File for review, nothing is appended.  'apply' skips the comparison and appends the records saved in Plan_File.
+    Sync_Mode = Tool_Setting('Sync_Mode', 'run', "Add New Table Records", ['run', 'plan', 'apply'])
+    Plan_File = Tool_Setting('Plan_File', Change_Plan.default_path("Add New Table Records"), "Add New Table Records")
+
     #Check if there is a filepath from the input layers. If not, pre-pend the path. Also extract the FC names.
     FC_PATH, FC_NAME = InputCheck(FC_INPUTPATH)
 
@@ -138,102 +71,50 @@ try:
     #Preping Data
     #..............................................................................................................................
 
-    # Extract Field Info from input FC and input file
+    Metrics.start("Preping Data")
+
+    # Extract Field Info from input FC
     FIELD_INFO = Extract_Field_NameType(FC_PATH)
-    header=[]
-    for name,type in FIELD_INFO:
-        header.append(name)
-
-    csv_header = Extract_File_Records(FILE_INPUTPATH).pop(0)
-    input_list_header = remove_space(csv_header)
-
-    # check to see if all the fields in the input file match the files in the ArcMap Table. The difference are the fields that
-    # were not matched in the ArcMap table.
-    field_check = list(set(header)-set(input_list_header))
-    if len(field_check) != 0:
-        print "Format error....\n Missing the following fields from the input .csv file: "
-        arcpy.AddWarning("Format error....\n Missing the following fields from the input .csv file: ")
-        for item in field_check:
-            print item
-            arcpy.AddMessage(item)
-        sys.exit()
-
-    #Reorder fields in the inputfile to ensure it matches the FC field order and create schema.ini file.
-    file_input_reorder = Reorder_InputFile(FILE_INPUTPATH,header, csv_header)
-    create_schema_file(file_input_reorder,FIELD_INFO,csv_header)
-
-    #Import .csv to a temp ArcMap table in the user specified scratch FD.
-    temp_table = FC_NAME + "_temp"
-    temp_table_path = os.path.join(Scratch_GDBPath,temp_table)
-    if arcpy.Exists(temp_table_path):
-        arcpy.Delete_management(temp_table_path)
-    arcpy.TableToTable_conversion(file_input_reorder,Scratch_GDBPath,temp_table,"")
-
-    #Check the fields in in the INPUT FC and the temp fc (temp ArcMap table to that is imported
-    FC_Field_Type_Check(FC_PATH,temp_table_path)
-
-    #Create empty lists to store records from the 2 ArcMap tables and Extract Records.
-    file_list = Extract_Table_Records(temp_table_path)
-    fc_list = Extract_Table_Records(FC_PATH)
-
-    #Find Difference between the two lists and export to temp output file if there is a difference
-    difference = list(set(file_list) - set(fc_list))
-    if len(difference) == 0:
-        print "No new record(s) to add"
-        arcpy.AddMessage("No new record(s) to add")
-    else:
-        #Properties for the temp .csv file output
-        OUTFILE_PATH = os.path.join(os.path.dirname(os.path.normpath(FILE_INPUTPATH)),"new_records.csv")
-        OUTFILE = open(OUTFILE_PATH, 'wb')
-        try:
-            OUTPUT = csv.writer((OUTFILE), delimiter=',', quoting=csv.QUOTE_NONE) #, quotechar='') #dialect='excel', 
-        except:
-            import traceback, sys
-            tb = sys.exc_info()[2]
-            arcpy.AddWarning('  If you get the following error:  "Error: need to escape, but no escape char set" \
-                            \n  Try setting quoting=csv.QUOTE_NONNUMERIC, QUOTE_MINIMAL or QUOTE_ALL on line {} of this script \
-                            \n  Quoting is currently set to QUOTE_NONE'.format(tb.tb_lineno))
+
+    # Check the input file against the ArcMap table in one pass before anything is added.  Every missing field and every value that
+    # can not be converted to the ArcMap field type (is out of range for a number field or too long for a text field) is reported at
+    # once.  The plan was checked when it was made, so the file is not checked in apply mode.
+    if Sync_Mode != 'apply':
+        FIELD_LENGTHS = dict((field.name, field.length) for field in List_Fields(FC_PATH) if field.type == 'String')
+        format_problems = Validate_File_Records(FILE_INPUTPATH, FIELD_INFO, FIELD_LENGTHS)
+        if format_problems:
+            print "Format error....\n The input .csv file does not match " + FC_NAME + ": "
+            arcpy.AddError("Format error....\n The input .csv file does not match " + FC_NAME + ": ")
+            for item in format_problems:
+                print item
+                arcpy.AddMessage(item)
             sys.exit()
 
-        print "A total of " + str(len(difference)) + " new record(s) were found.  The new record(s) are:"
-        arcpy.AddMessage("A total of " + str(len(difference)) + " new records were found.  The new records are:")
-        #difference = sorted(difference, key=lambda sl: sl[0])
-        for item in difference:
-            arcpy.AddMessage(item)
-        difference.insert(0,header)
-        for item in difference:
-            OUTPUT.writerow(item)
-        #OUTPUT.writerows(difference)
-        OUTFILE.close()
-
-        create_schema_file(OUTFILE_PATH,FIELD_INFO,Extract_File_Records(OUTFILE_PATH).pop(0))
-
-        #Import temp .csv to a temp ArcMap table in the user specified scratch FD and append to final ArcMap table.
-        if arcpy.Exists(os.path.join(Scratch_GDBPath,FC_NAME + "_Difference")):
-            arcpy.Delete_management(os.path.join(Scratch_GDBPath,FC_NAME + "_Difference"))
-        arcpy.TableToTable_conversion(OUTFILE_PATH,Scratch_GDBPath, FC_NAME + "_Difference")
-        arcpy.AddMessage("\nAppending the new record(s) to " + FC_NAME)
-        print "\nAppending the new record(s) to " + FC_NAME
-        arcpy.Append_management(os.path.join(Scratch_GDBPath,FC_NAME + "_Difference"),FC_PATH,"NO_TEST","","")
-
-    #Remove Temporary Feature Classes from GDB and Temporary Files
-    if arcpy.Exists(os.path.join(Scratch_GDBPath,FC_NAME + "_Difference")):
-        arcpy.Delete_management(os.path.join(Scratch_GDBPath,FC_NAME + "_Difference"))
-    if arcpy.Exists(temp_table_path):
-        arcpy.Delete_management(temp_table_path)
-    if os.path.exists(file_input_reorder):
-        os.remove(file_input_reorder)
-    try:
-        if os.path.exists(OUTFILE_PATH):
-            os.remove(OUTFILE_PATH)
-    except:
-        pass
-
-    print "Temporary files and GDB tables have been deleted"
-    arcpy.AddMessage("Temporary files and GDB tables have been deleted")
-
-    print "......................................................................End Runtime: ", datetime.now()-startTime
-    arcpy.AddMessage("......................................................................End Runtime: " + str(datetime.now()-startTime))
+    Metrics.stop()
+
+    #Stream the input file and add the records that are not in the ArcMap table.  Values are converted to the
+    #ArcMap table field types as the file is read, so no reordered .csv, schema.ini or temp tables are needed.
+    Metrics.start("Add New Records")
+    if Sync_Mode == 'apply':
+        Change_Plan.load(Plan_File).apply(Changes)
+    else:
+        Plan = Change_Plan("Add New Table Records") if Sync_Mode == 'plan' else None
+        difference = Add_New_Records(FILE_INPUTPATH, FC_PATH, FIELD_INFO, plan=Plan)
+        if len(difference) == 0:
+            print "No new record(s) to add"
+            arcpy.AddMessage("No new record(s) to add")
+        elif Plan is not None:
+            print "A total of " + str(len(difference)) + " new record(s) were found.  Run the tool in apply mode to append them to " + FC_NAME + "."
+            arcpy.AddMessage("A total of " + str(len(difference)) + " new records were found.  Run the tool in apply mode to append them to " + FC_NAME + ".")
+        else:
+            print "A total of " + str(len(difference)) + " new record(s) were found and appended to " + FC_NAME + "."
+            arcpy.AddMessage("A total of " + str(len(difference)) + " new records were found and appended to " + FC_NAME + ".")
+            for item in difference:
+                Changes.record('insert', FC_NAME, None, new_value=list(item))
+        if Plan is not None:
+            Plan.summary()
+            Plan.save(Plan_File)
+    Metrics.stop()
 
 except Exception, e:
     # If an error occurred, print line number and error message
@@ -248,4 +129,10 @@ except Exception, e:
         print item
         arcpy.AddMessage(item)
     print e.message
-    arcpy.AddMessage(e.message)
\ No newline at end of file
+    arcpy.AddMessage(e.message)
+
+finally:
+    #The change log is closed even when the tool stops early (i.e. a format error), so the log thread and file are not left open.
+    if Changes is not None:
+        Changes.close()
+    Metrics.close()
@@ -24,9 +24,16 @@
 #           the attributes are not the same, Target FC updates to match the Source FC attributes.
 #
 # Log:
+#       1. Figures can be updated and saved in chunks with a checkpoint, so a failed run can be resumed (Edit_Chunk_Figures).
 #
 #..............................................................................................................................
 
+# Hand the run to the warm worker (warm_worker.py) when one is running.  Otherwise the tool runs in this process.
+import sys, warm_worker
+Worker_Status = warm_worker.Run_In_Worker(__file__)
+if Worker_Status is not None:
+    sys.exit(Worker_Status)
+
 # Import arcpy module
 import arcpy, os, operator, re, sys
 from os.path import split, join
@@ -35,12 +42,27 @@ from string import replace
 from helper import *
 arcpy.env.overwriteOutput = True
 
-startTime = datetime.now()
-print startTime
+Metrics = Run_Metrics("Update Attributes")
+print Metrics.run.startTime
+
+#Each of the settings below can be changed with a BUDDING_GDB_UPDATE_ATTRIBUTES_<SETTING> (or BUDDING_GDB_<SETTING>) environment
+#variable, i.e. BUDDING_GDB_SYNC_MODE=plan.  See Tool_Setting.
+
+#Plan/apply mode.  'run' finds and applies the changes in one run.  'plan' only finds the changes and saves them to Plan_File
+#for review, nothing is updated.  'apply' skips the comparison and applies the changes saved in Plan_File.
+Sync_Mode = Tool_Setting('Sync_Mode', 'run', "Update Attributes", ['run', 'plan', 'apply'])
+Plan_File = Tool_Setting('Plan_File', Change_Plan.default_path("Update Attributes"), "Update Attributes")
+
+#Edit chunks (off by default).  When a limit is set, the figures are updated and saved in chunks of Edit_Chunk_Figures figures (or
+#about Edit_Chunk_Rows report rows, whichever fills first) in run mode and the saved figures are kept in a checkpoint file in the
+#scratch folder.  If a run fails, running the tool again with the same inputs resumes after the last saved chunk, unless the
+#parent changed in between.  0 turns a limit off.  With both limits off every figure is saved in one edit session.
+Edit_Chunk_Figures = Tool_Setting('Edit_Chunk_Figures', 0, "Update Attributes")
+Edit_Chunk_Rows = Tool_Setting('Edit_Chunk_Rows', 0, "Update Attributes")
 
 def Does_Figure_Exist(childFCpath, childFC, figure, child_figure_list, figure_key_field):
-    print "Runtime: ", datetime.now()-startTime
-    arcpy.AddMessage(75*'.' + "Runtime: {}".format((datetime.now()-startTime)))
+    print "Runtime: ", datetime.now()-Metrics.run.startTime
+    arcpy.AddMessage(75*'.' + "Runtime: {}".format((datetime.now()-Metrics.run.startTime)))
     print "Figure Name: {}" + str(figure)
     arcpy.AddMessage(75*'.' + "Updating Figure: {}".format(str(figure)))
     clause = buildWhereClause(childFCpath, figure_key_field, figure)
@@ -54,62 +76,21 @@ def Does_Figure_Exist(childFCpath, childFC, figure, child_figure_list, figure_ke
     else:
         return clause
 
-def Update_Field(Sourcepath, targetpath, SourceTableField, TargetTableField, field, clause=''):
-    SourceFCpath, SourceFC = InputCheck(Sourcepath)
-    targetFCpath, targetFC = InputCheck(targetpath)
-
-    print "."*25 + "Updating the following field: " + field + " (" + str(datetime.now()-startTime)+")"
-    arcpy.AddMessage("."*25 + "Updating the following field: " + field + " (" + str(datetime.now()-startTime)+")")
-
-    if Get_Field_Type(SourceFCpath,field) != Get_Field_Type(targetFCpath,field):
-        arcpy.AddWarning("....\n.... \
-                         \nThe field, {}, in {} and {} do not have matching data types. Please correct by updating the field data type to {} for the field, {},z in {}. \
-                         \nSkipping to next field................. \
-                         \n....\n....".format(field, SourceFC, targetFC, str(Get_Field_Type(SourceFCpath,field)), field, targetFC))
-        return
-
-    Source_dict = dict([(r[0], (r[1])) for r in arcpy.da.SearchCursor(SourceFCpath, [SourceTableField,field])])
-    Target_dict = dict([(r[0], (r[1])) for r in arcpy.da.SearchCursor(targetFCpath,[TargetTableField,field],clause)])
-    updateRows = arcpy.da.UpdateCursor(targetFCpath,[TargetTableField,field],clause) #Cursor to be used to update attributes in project FC
-    Source_dictSet = set(Source_dict)
-    Target_dictSet = set(Target_dict)
-    Source_dictUpdate = dict()
-    for key in Source_dictSet.intersection(Target_dictSet):
-        if key not in Source_dictUpdate:
-            Source_dictUpdate[key] = dict()
-        Source_dictUpdate[key] = Source_dict[key]
-    ls = []
-    record_check = [Source_dictUpdate[k] == v for k, v in Target_dict.iteritems() if k in Source_dictUpdate] #Getting a count of values that are not the same in A:value and B:value
-    if record_check.count(False) == 0: #Count
-        print ("There are no records to update in {}".format(field))
-        arcpy.AddMessage(("There are no records to update in {}".format(field)))
-    else:
-        for updateRow in updateRows:
-            source_join = updateRow
-            if source_join[0] in Source_dictUpdate:
-                if source_join[1] != Source_dictUpdate[source_join[0]]:
-                    print ("Updating {} to {}".format(source_join[0], Source_dictUpdate[source_join[0]]))
-                    arcpy.AddMessage(("Updating {} to {}".format(source_join[0], Source_dictUpdate[source_join[0]])))
-                    updateRow[1] = Source_dictUpdate[source_join[0]]
-            updateRows.updateRow(updateRow)
-        del updateRow, updateRows
-
-def Update_Figures(Report_Sample, MasterSample, FigureExtent, FigureExtent_KeyField, SourceTableField, TargetTableField, input_field, input_figures):
+def Update_Figures(Report_Sample, MasterSample, FigureExtent, FigureExtent_KeyField, SourceTableField, TargetTableField, input_field, input_figures, change_log=None, plan=None):
     MasterSamplepath, MasterSampleFC = InputCheck(MasterSample)
     Report_SampleFCpath, Report_SampleFC = InputCheck(Report_Sample)
 
-    edit_session = start_edit_session(Report_SampleFCpath)
+    #Formatting the input fields to be updated
+    Field_to_update = input_field.split(";")
+    Field_to_update = convert_invalid_values(Field_to_update)
+    arcpy.AddMessage("The following fields are going to be updated: {}".format(str(Field_to_update)))
+
+    #Nothing is written in plan mode, so no edit session is needed.  Chunked figures are saved by Update_Fields_Chunked.
+    chunked = bool(input_figures) and plan is None and bool(Edit_Chunk_Figures or Edit_Chunk_Rows)
+    edit_session = start_edit_session(Report_SampleFCpath) if plan is None and not chunked else None
 
     if not input_figures:
-        #Formatting the input fields to be updated
-        Field_to_update = input_field.split(";")
-        Field_to_update = convert_invalid_values(Field_to_update)
-        arcpy.AddMessage("The following fields are going to be updated: {}".format(str(Field_to_update)))
-        for field in Field_to_update:
-            if (not FieldExist(MasterSamplepath,field)):
-                arcpy.AddMessage(("{} is not in {}.  Skipping to next field.".format(field,MasterSampleFC)))
-            else:
-                Update_Field(MasterSamplepath, Report_SampleFCpath, SourceTableField, TargetTableField, field)
+        Update_Fields(MasterSamplepath, Report_SampleFCpath, SourceTableField, TargetTableField, Field_to_update, change_log=change_log, plan=plan)
     else:
         FigureExtentpath, FigureExtentFC = InputCheck(FigureExtent)
        #Check to see if all the Report feature classes have the FigureExtent Keyfield.
@@ -123,23 +104,17 @@ def Update_Figures(Report_Sample, MasterSample, FigureExtent, FigureExtent_KeyFi
         #Get list of figures in the report FC
         ReportFC_FigureList = unique_values(Report_SampleFCpath,FigureExtent_KeyField)
 
-        #Formatting the input fields to be updated
-        Field_to_update = input_field.split(";")
-        Field_to_update = convert_invalid_values(Field_to_update)
-        arcpy.AddMessage("The following fields are going to be updated: {}".format(str(Field_to_update)))
-
-        #Loop through all figures and update Project Feature Class
-        for figure in FigureList:
-            clause = Does_Figure_Exist(Report_SampleFCpath, Report_SampleFC, figure, ReportFC_FigureList, FigureExtent_KeyField)
-            if clause:
-                for field in Field_to_update:
-                    if (not FieldExist(MasterSamplepath,field)):
-                      arcpy.AddMessage(("{} is not in {}.  Skipping to next field.".format(field,MasterSampleFC)))
-                    else:
-                        Update_Field(MasterSamplepath, Report_SampleFCpath, SourceTableField, TargetTableField, field, clause)
+        #Skip figures that are not in the Project Feature Class and update the rest in a single pass
+        Figures_to_update = [figure for figure in FigureList if Does_Figure_Exist(Report_SampleFCpath, Report_SampleFC, figure, ReportFC_FigureList, FigureExtent_KeyField)]
+        if Figures_to_update and chunked:
+            Update_Fields_Chunked(MasterSamplepath, Report_SampleFCpath, SourceTableField, TargetTableField, Field_to_update, FigureExtent_KeyField, Figures_to_update, Edit_Chunk_Figures, Edit_Chunk_Rows, change_log)
+        elif Figures_to_update:
+            Update_Fields(MasterSamplepath, Report_SampleFCpath, SourceTableField, TargetTableField, Field_to_update, FigureExtent_KeyField, Figures_to_update, change_log, plan)
      
-    stop_edit_session(edit_session)
+    if edit_session is not None:
+        stop_edit_session(edit_session)
            
+Changes = None
 try:
 
     Parent = arcpy.GetParameterAsText(0)
@@ -151,10 +126,19 @@ try:
     FigureExtent_KeyField = arcpy.GetParameterAsText(6)
     input_figures = arcpy.GetParameterAsText(7)
 
-    Update_Figures(Child, Parent, FigureExtent, FigureExtent_KeyField, ParentTableField, ChildTableField, input_field, input_figures)
+    #Every changed value is written to a compressed change log (log_format 'jsonl' or 'csv') in the scratch folder.  The geoprocessing
+    #window only shows the number of updates per field/figure and sample_size example changes per field.
+    Changes = Change_Log("Update Attributes", log_format='jsonl', sample_size=10)
 
-    print "Script Runtime: ", datetime.now()-startTime
-    arcpy.AddMessage("Script Runtime: " + str(datetime.now()-startTime))
+    Metrics.start("Update Figures")
+    if Sync_Mode == 'apply':
+        Change_Plan.load(Plan_File).apply(Changes)
+    else:
+        Plan = Change_Plan("Update Attributes") if Sync_Mode == 'plan' else None
+        Update_Figures(Child, Parent, FigureExtent, FigureExtent_KeyField, ParentTableField, ChildTableField, input_field, input_figures, Changes, Plan)
+        if Plan is not None:
+            Plan.summary()
+            Plan.save(Plan_File)
 
 except Exception, e:
     # If an error occurred, print line number and error message
@@ -169,4 +153,10 @@ except Exception, e:
         print item
         arcpy.AddMessage(item)
     print e.message
-    arcpy.AddMessage(e.message)
\ No newline at end of file
+    arcpy.AddMessage(e.message)
+
+finally:
+    #The change log is closed even when the tool stops early, so the log thread and file are not left open.
+    if Changes is not None:
+        Changes.close()
+    Metrics.close()
@@ -0,0 +1,90 @@
+#..............................................................................................................................
+# Creator - Seth Docherty
+# Purpose - Update the attributes of many project (child) report feature classes from one parent (Master) feature class.  The
+#           parent is read once in to a snapshot and every child listed in the manifest is updated from the snapshot, so a site
+#           with 30 project GDBs does not read the parent 30 times.
+#
+#           The scripts user input requirements:
+#               - Source FC (Master)
+#               - Source Key Field (This is the field that will be used for joining data to the child FCs)
+#               - Manifest (.csv file with one row per child report feature class).  Columns:
+#                   Child               Path to the child report FC
+#                   Child_Key_Field     Field in the child FC that matches the Source Key Field
+#                   Fields              Fields to update, separated with a ;
+#                   Figure_Extent       Figure extent FC (optional.  Leave blank to update every feature in the child FC)
+#                   Figure_Key_Field    Field that stores the figure names in the figure extent and child FC
+#                   Figures             Figures to update, separated with a ; (optional.  Leave blank to update all figures)
+#
+#           The children are synced by a pool of Child_Workers processes.  Children in the same GDB are synced one after
+#           another by the same worker.  An error in one child is reported and the rest of the children are still synced.
+#
+# Log:
+#
+#..............................................................................................................................
+
+# Hand the run to the warm worker (warm_worker.py) when one is running.  Otherwise the tool runs in this process.
+import sys, warm_worker
+Worker_Status = warm_worker.Run_In_Worker(__file__)
+if Worker_Status is not None:
+    sys.exit(Worker_Status)
+
+# Import arcpy module
+import arcpy, os, sys
+from datetime import datetime
+from helper import *
+arcpy.env.overwriteOutput = True
+
+Metrics = Run_Metrics("Update Attributes Batch")
+print Metrics.run.startTime
+
+#Number of worker processes that sync the children.  1 syncs every child in this process, 0 uses one worker per CPU.
+#Can be changed with the BUDDING_GDB_UPDATE_ATTRIBUTES_BATCH_CHILD_WORKERS (or BUDDING_GDB_CHILD_WORKERS) environment variable.
+Child_Workers = Tool_Setting('Child_Workers', 4, "Update Attributes Batch")
+
+try:
+
+    Parent = arcpy.GetParameterAsText(0)
+    ParentTableField = arcpy.GetParameterAsText(1) #The Master/Source key field
+    Manifest = arcpy.GetParameterAsText(2)
+
+    Metrics.start("Read Parent")
+    Jobs = Read_Sync_Manifest(Manifest)
+    Snapshot = Master_Snapshot(Parent, ParentTableField, [field for job in Jobs for field in job['Fields']])
+    Metrics.stop()
+
+    Metrics.start("Sync Children")
+    Results = Fan_Out_Sync(Snapshot, Jobs, Child_Workers)
+    Metrics.stop()
+
+    Failed = 0
+    for child, field_updates, log_path, error in Results:
+        if error is not None:
+            Failed += 1
+            arcpy.AddWarning("Unable to sync {}: {}".format(child, error))
+            continue
+        print "{}.................... {} record(s) updated".format(child, sum(field_updates.values()))
+        arcpy.AddMessage("{}.................... {} record(s) updated".format(child, sum(field_updates.values())))
+        for field in sorted(field_updates):
+            print "    {}: {}".format(field, field_updates[field])
+            arcpy.AddMessage("    {}: {}".format(field, field_updates[field]))
+        arcpy.AddMessage("    Change log: {}".format(log_path))
+    print "{} of {} child feature class(es) synced".format(len(Results) - Failed, len(Results))
+    arcpy.AddMessage("{} of {} child feature class(es) synced".format(len(Results) - Failed, len(Results)))
+
+except Exception, e:
+    # If an error occurred, print line number and error message
+    import traceback, sys
+    tb = sys.exc_info()[2]
+    exc_type, exc_value, exc_traceback = sys.exc_info()
+    traceback.print_exc()
+    tb_error = traceback.format_tb(exc_traceback)
+    print "line %i" % tb.tb_lineno
+    arcpy.AddMessage("line %i" % tb.tb_lineno)
+    for item in tb_error:
+        print item
+        arcpy.AddMessage(item)
+    print e.message
+    arcpy.AddMessage(e.message)
+
+finally:
+    Metrics.close()
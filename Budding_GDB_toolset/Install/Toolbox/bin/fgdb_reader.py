@@ -0,0 +1,385 @@
+#..............................................................................................................................
+# Creator - Seth Docherty
+# Purpose - Read-only File Geodatabase (10.x) table reader.  The .gdbtable/.gdbtablx files of a table are memory-mapped and
+#           the field definitions and rows are decoded in pure python, so attribute reads do not need arcpy or a licensed
+#           ArcGIS process (worker processes, CI, etc.).
+#
+#           Usage:
+#               with Open_Table(r"C:\Data\Master.gdb\Acme_Sample_Locations") as table:
+#                   for oid, location_id in table.rows(["OID@", "Location_ID"]):
+#                       ...
+#
+#           Supported:
+#               - Field types: SmallInteger, Integer, Single, Double, String, Date, OID, Geometry, Blob, Guid, GlobalID, XML
+#               - Column projection.  Fields after the last requested field are not decoded.
+#               - Point geometry is decoded to an (X, Y) tuple.  Other geometry types are returned as the raw shape buffer.
+#           Not supported:
+#               - Raster fields, compressed (CDF) tables and tables with pending edits held by another process' lock.
+#
+#           The file layout follows the OpenFileGDB specification from the GDAL project.
+#
+#..............................................................................................................................
+import os
+import mmap
+import struct
+from datetime import datetime, timedelta
+
+SYSTEM_CATALOG = 'a00000001.gdbtable'
+
+#Field type codes and the matching arcpy field types
+FIELD_TYPES = {0: 'SmallInteger', 1: 'Integer', 2: 'Single', 3: 'Double', 4: 'String', 5: 'Date', 6: 'OID',
+               7: 'Geometry', 8: 'Blob', 9: 'Raster', 10: 'Guid', 11: 'GlobalID', 12: 'XML'}
+
+_FIXED_WIDTH = {'SmallInteger': ('<h', 2), 'Integer': ('<i', 4), 'Single': ('<f', 4), 'Double': ('<d', 8),
+                'Date': ('<d', 8)}
+_EPOCH = datetime(1899, 12, 30)
+_POINT_TYPES = (1, 9, 11, 21)
+
+
+class FileGDB_Error(Exception):
+    pass
+
+
+class FileGDB_Field(object):
+    '''
+    Field definition read from a .gdbtable header.  Mirrors the attributes of arcpy.Field that the helpers use.
+    '''
+    def __init__(self, name, aliasName, type, length=0, isNullable=False):
+        self.name = name
+        self.aliasName = aliasName
+        self.type = type
+        self.length = length
+        self.isNullable = isNullable
+        self.xyOrigin = None
+        self.xyScale = None
+
+    def __repr__(self):
+        return "FileGDB_Field({!r}, {!r})".format(self.name, self.type)
+
+
+def _varuint(buf, pos):
+    result = 0
+    shift = 0
+    while True:
+        byte = ord(buf[pos])
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _utf16(buf, pos, chars):
+    end = pos + chars * 2
+    return buf[pos:end].decode('utf-16-le'), end
+
+
+class FileGDB_Table(object):
+    '''
+    Read-only access to a single File Geodatabase table (.gdbtable and .gdbtablx).
+
+    Required input:
+        Path to the .gdbtable file
+    '''
+    def __init__(self, gdbtable_path, name=None):
+        self.path = gdbtable_path
+        self.name = name or os.path.basename(gdbtable_path)
+        self._files = []
+        self._data = self._map(gdbtable_path)
+        self._index = self._map(os.path.splitext(gdbtable_path)[0] + '.gdbtablx')
+        try:
+            self._read_header()
+            self._read_index()
+        except (struct.error, IndexError, UnicodeDecodeError), e:
+            self.close()
+            raise FileGDB_Error("Unable to read {}: {}".format(gdbtable_path, e))
+
+    def _map(self, path):
+        f = open(path, 'rb')
+        self._files.append(f)
+        if os.fstat(f.fileno()).st_size == 0:
+            return ''
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        for buf in (getattr(self, '_data', None), getattr(self, '_index', None)):
+            if isinstance(buf, mmap.mmap):
+                buf.close()
+        for f in self._files:
+            f.close()
+        self._files = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    #..........................................................................................................................
+    # Header
+    #..........................................................................................................................
+
+    def _read_header(self):
+        buf = self._data
+        magic, self.row_count = struct.unpack_from('<iI', buf, 0)
+        if magic != 3:
+            raise FileGDB_Error("{} is not a File Geodatabase 10.x table".format(self.path))
+        fields_offset = struct.unpack_from('<Q', buf, 32)[0]
+        header_size, version, flags, field_count = struct.unpack_from('<IIIH', buf, fields_offset)
+        if version != 4:
+            raise FileGDB_Error("{} uses an unsupported table version ({})".format(self.path, version))
+        self.geometry_type = flags & 0xFF
+        pos = fields_offset + 14
+        self.fields = []
+        for i in xrange(field_count):
+            length = ord(buf[pos])
+            name, pos = _utf16(buf, pos + 1, length)
+            length = ord(buf[pos])
+            alias, pos = _utf16(buf, pos + 1, length)
+            code = ord(buf[pos])
+            pos += 1
+            if code not in FIELD_TYPES:
+                raise FileGDB_Error("Unknown field type {} for field {}".format(code, name))
+            field_type = FIELD_TYPES[code]
+            field = FileGDB_Field(name, alias, field_type)
+            if field_type == 'OID':
+                pos += 2
+            elif field_type == 'Geometry':
+                pos = self._read_geometry_field(buf, pos, field)
+            elif field_type == 'String':
+                field.length = struct.unpack_from('<I', buf, pos)[0]
+                field.isNullable = bool(ord(buf[pos + 4]) & 1)
+                default_length, pos = _varuint(buf, pos + 5)
+                pos += default_length
+            elif field_type in ('Blob', 'Guid', 'GlobalID', 'XML'):
+                field.length = ord(buf[pos])
+                field.isNullable = bool(ord(buf[pos + 1]) & 1)
+                pos += 2
+            elif field_type == 'Raster':
+                raise FileGDB_Error("Raster field {} is not supported".format(name))
+            else:
+                field.length = ord(buf[pos])
+                field.isNullable = bool(ord(buf[pos + 1]) & 1)
+                pos += 3 + ord(buf[pos + 2])
+            self.fields.append(field)
+        self._nullable_count = sum(1 for field in self.fields if field.isNullable)
+        self._field_index = dict((field.name.upper(), i) for i, field in enumerate(self.fields))
+
+    def _read_geometry_field(self, buf, pos, field):
+        field.isNullable = bool(ord(buf[pos + 1]) & 1)
+        wkt_length = struct.unpack_from('<H', buf, pos + 2)[0]
+        pos += 4 + wkt_length
+        geom_flags = ord(buf[pos])
+        pos += 1
+        has_m = bool(geom_flags & 2)
+        has_z = bool(geom_flags & 4)
+        field.xyOrigin = struct.unpack_from('<dd', buf, pos)
+        field.xyScale = struct.unpack_from('<d', buf, pos + 16)[0]
+        pos += 24
+        if has_m:
+            pos += 16
+        if has_z:
+            pos += 16
+        pos += 8 * (1 + has_m + has_z)      #Tolerances
+        pos += 32                           #Extent
+        #The Z/M extents are only written by some versions.  The spatial index grid sizes (a zero byte and a count of
+        #1 to 3) follow them.
+        for i in xrange(4):
+            if ord(buf[pos]) == 0 and 1 <= struct.unpack_from('<I', buf, pos + 1)[0] <= 3:
+                break
+            pos += 8
+        grid_count = struct.unpack_from('<I', buf, pos + 1)[0]
+        return pos + 5 + 8 * grid_count
+
+    def _read_index(self):
+        buf = self._index
+        magic, block_count, self.total_rows, self._offset_size = struct.unpack_from('<iIII', buf, 0)
+        if magic != 3 or self._offset_size not in (4, 5, 6):
+            raise FileGDB_Error("{} has an unsupported .gdbtablx file".format(self.path))
+        self._blocks = None
+        bitmap_pos = 16 + self._offset_size * 1024 * block_count
+        if block_count and bitmap_pos + 16 <= len(buf):
+            bitmap_words = struct.unpack_from('<I', buf, bitmap_pos)[0]
+            if bitmap_words:
+                #Sparse index: only the 1024 row blocks flagged in the bitmap are stored.
+                words = struct.unpack_from('<{}I'.format(bitmap_words), buf, bitmap_pos + 16)
+                self._blocks = dict()
+                for i in xrange(bitmap_words * 32):
+                    if words[i >> 5] & (1 << (i & 31)):
+                        self._blocks[i] = len(self._blocks)
+
+    def _row_offset(self, row_index):
+        block, slot = divmod(row_index, 1024)
+        if self._blocks is not None:
+            if block not in self._blocks:
+                return 0
+            block = self._blocks[block]
+        pos = 16 + (block * 1024 + slot) * self._offset_size
+        raw = self._index[pos:pos + self._offset_size] + '\x00' * (8 - self._offset_size)
+        return struct.unpack('<Q', raw)[0]
+
+    #..........................................................................................................................
+    # Rows
+    #..........................................................................................................................
+
+    def field(self, name):
+        '''Return the FileGDB_Field for a field name (case insensitive).'''
+        try:
+            return self.fields[self._field_index[name.upper()]]
+        except KeyError:
+            raise FileGDB_Error("Cannot find field '{}' in {}".format(name, self.name))
+
+    def _projection(self, field_names):
+        oid_name = [field.name for field in self.fields if field.type == 'OID']
+        shape_name = [field.name for field in self.fields if field.type == 'Geometry']
+        if field_names is None:
+            field_names = [field.name for field in self.fields]
+        indexes = []
+        for name in field_names:
+            if name == 'OID@':
+                name = oid_name[0] if oid_name else name
+            elif name.upper() in ('SHAPE@', 'SHAPE@XY'):
+                name = shape_name[0] if shape_name else name
+            indexes.append(self._field_index.get(name.upper(), name))
+        missing = [name for name in indexes if not isinstance(name, int)]
+        if missing:
+            raise FileGDB_Error("Cannot find field(s) {} in {}".format(", ".join(missing), self.name))
+        return indexes
+
+    def rows(self, field_names=None):
+        '''
+        Generator of row tuples, in ObjectID order, the same way arcpy.da.SearchCursor returns them.
+
+        Optional input:
+            List of field names to return (column projection).  'OID@' and 'SHAPE@' are accepted.  All fields by default.
+        '''
+        indexes = self._projection(field_names)
+        wanted = set(indexes)
+        last = max(indexes) if indexes else -1
+        fields = self.fields
+        data = self._data
+        null_bytes = (self._nullable_count + 7) // 8
+        for row_index in xrange(self.total_rows):
+            offset = self._row_offset(row_index)
+            if not offset:
+                continue
+            size = struct.unpack_from('<I', data, offset)[0]
+            pos = offset + 4
+            null_flags = data[pos:pos + null_bytes]
+            pos += null_bytes
+            values = dict()
+            nullable = 0
+            for i, field in enumerate(fields):
+                if i > last:
+                    break
+                if field.type == 'OID':
+                    values[i] = row_index + 1
+                    continue
+                if field.isNullable:
+                    is_null = ord(null_flags[nullable >> 3]) & (1 << (nullable & 7))
+                    nullable += 1
+                    if is_null:
+                        values[i] = None
+                        continue
+                pos = self._read_value(data, pos, field, i in wanted, values, i)
+            yield tuple(values[i] for i in indexes)
+
+    def _read_value(self, data, pos, field, decode, values, i):
+        field_type = field.type
+        if field_type in _FIXED_WIDTH:
+            fmt, width = _FIXED_WIDTH[field_type]
+            if decode:
+                value = struct.unpack_from(fmt, data, pos)[0]
+                if field_type == 'Date':
+                    #Dates are stored as days since 12/30/1899.  Round to the second the same way arcpy does.
+                    value = _EPOCH + timedelta(seconds=round(value * 86400))
+                values[i] = value
+            return pos + width
+        if field_type in ('Guid', 'GlobalID'):
+            if decode:
+                raw = data[pos:pos + 16]
+                values[i] = '{' + '{:08X}-{:04X}-{:04X}-'.format(*struct.unpack('<IHH', raw[:8])) + \
+                            raw[8:10].encode('hex').upper() + '-' + raw[10:].encode('hex').upper() + '}'
+            return pos + 16
+        length, pos = _varuint(data, pos)
+        if decode:
+            raw = data[pos:pos + length]
+            if field_type in ('String', 'XML'):
+                values[i] = raw.decode('utf-8')
+            elif field_type == 'Geometry':
+                values[i] = self._decode_geometry(raw, field)
+            else:
+                values[i] = bytearray(raw)
+        return pos + length
+
+    def _decode_geometry(self, raw, field):
+        shape_type, pos = _varuint(raw, 0)
+        if (shape_type & 0xFF) not in _POINT_TYPES:
+            return bytearray(raw)
+        x, pos = _varuint(raw, pos)
+        y, pos = _varuint(raw, pos)
+        if x == 0:
+            return None
+        return ((x - 1) / field.xyScale + field.xyOrigin[0], (y - 1) / field.xyScale + field.xyOrigin[1])
+
+
+class FileGDB(object):
+    '''
+    A File Geodatabase folder.  The table names are read from the GDB_SystemCatalog table.
+
+    Required input:
+        Path to the .gdb folder
+    '''
+    def __init__(self, gdb_path):
+        self.path = gdb_path
+        catalog = os.path.join(gdb_path, SYSTEM_CATALOG)
+        if not os.path.exists(catalog):
+            raise FileGDB_Error("{} is not a File Geodatabase".format(gdb_path))
+        self.tables = dict()
+        with FileGDB_Table(catalog) as table:
+            for oid, name in table.rows(['OID@', 'Name']):
+                self.tables[name.upper()] = (name, oid)
+
+    def table_names(self):
+        return sorted(name for name, oid in self.tables.values())
+
+    def table_path(self, name):
+        if name.upper() not in self.tables:
+            raise FileGDB_Error("Table {} does not exist in {}".format(name, self.path))
+        return os.path.join(self.path, 'a{:08x}.gdbtable'.format(self.tables[name.upper()][1]))
+
+    def table(self, name):
+        if not os.path.exists(self.table_path(name)):
+            raise FileGDB_Error("Table {} is missing from {}".format(name, self.path))
+        return FileGDB_Table(self.table_path(name), self.tables[name.upper()][0])
+
+
+def Split_GDB_Path(path):
+    '''
+    Return (path to .gdb folder, table name) for a table or feature class path in a File Geodatabase, or None when the
+    path is not in a File Geodatabase.  Feature datasets are skipped since the tables are all stored in the .gdb folder.
+    '''
+    parts = os.path.normpath(path).replace('\\', '/').split('/')
+    for i in xrange(len(parts) - 1, 0, -1):
+        if parts[i].lower().endswith('.gdb'):
+            if i == len(parts) - 1:
+                return None
+            return '/'.join(parts[:i + 1]), parts[-1]
+    return None
+
+
+_GDB_CACHE = dict()
+
+def Open_Table(path):
+    '''
+    Open a table or feature class in a File Geodatabase by its catalog path (i.e. C:\\Data\\Master.gdb\\Samples).
+    '''
+    split = Split_GDB_Path(path)
+    if split is None:
+        raise FileGDB_Error("{} is not in a File Geodatabase".format(path))
+    gdb_path, name = split
+    key = os.path.abspath(gdb_path)
+    stamp = os.path.getmtime(os.path.join(gdb_path, SYSTEM_CATALOG))
+    if key not in _GDB_CACHE or _GDB_CACHE[key][0] != stamp:
+        _GDB_CACHE[key] = (stamp, FileGDB(gdb_path))
+    return _GDB_CACHE[key][1].table(name)
@@ -3,11 +3,54 @@ import sys
 import os
 import operator
 import csv
+import math
+import itertools
+import json
+import hashlib
+import gzip
+import threading
+import Queue
+import tempfile
+import shutil
+import struct
+import heapq
+import cPickle
+import multiprocessing
+from contextlib import contextmanager
 from os.path import split, join
 from string import replace
 from datetime import datetime
+import fgdb_reader
+try:
+    import numpy as np
+except ImportError:
+    np = None
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+try:
+    import resource
+except ImportError:
+    resource = None
 arcpy.env.overwriteOutput = True
 
+#Backend for attribute reads (Extract_Table_Records, unique_values, ListRecords, Extract_Field_NameType, etc.).  'fgdb' reads
+#File Geodatabase tables directly with fgdb_reader and uses arcpy for everything else (layers, SDE, shapefiles, in_memory).
+#Set with Set_Read_Backend or the BUDDING_GDB_READ_BACKEND environment variable (picked up by worker processes).
+Read_Backend = os.environ.get('BUDDING_GDB_READ_BACKEND', 'arcpy')
+
+#Row budget for the table diff in Add_New_Records.  When the table and the .csv file have more rows than this between them,
+#they are diffed out of core (Sort_Merge_Diff) with sorted spill files in the scratch folder instead of in memory.  The out of
+#core diff sorts Diff_Spill_Rows rows in memory at a time.  Set with the BUDDING_GDB_DIFF_MEMORY_ROWS and
+#BUDDING_GDB_DIFF_SPILL_ROWS environment variables (picked up by worker processes).
+Diff_Memory_Rows = int(os.environ.get('BUDDING_GDB_DIFF_MEMORY_ROWS', 2000000))
+Diff_Spill_Rows = int(os.environ.get('BUDDING_GDB_DIFF_SPILL_ROWS', 250000))
+
+#Parent snapshots kept between tool runs by the warm worker (warm_worker.py).  None outside of the warm worker, so every run
+#reads the parent.  See Cached_Master_Snapshot.
+Snapshot_Cache = None
+
 #..............................................................................................................................
 # Creator - Seth Docherty
 #
@@ -16,30 +59,145 @@ arcpy.env.overwriteOutput = True
 #
 #..............................................................................................................................
 
-def Add_Records_to_Table(input_list, table_path):
+def Add_New_Records(input_csv, table_path, field_info, chunk_size=10000, plan=None):
     '''
-    Add data from a list to a blank ArcGIS Table.
+    Add the records from a .csv file that are not already in an ArcGIS Table.  The file is streamed and compared to
+    the table in memory, or out of core with Sort_Merge_Diff past Diff_Memory_Rows rows.
 
     Required input:
-        Python list
+        Path to .csv file
         Path to ArcGIS table
+        List of field information - [Field Name, Field Type] (i.e. from Extract_Field_NameType)
+    Optional input:
+        Number of rows read and inserted per chunk
+        Change_Plan.  When a plan is passed in, the new records are recorded in the plan and the table is not changed.
+
+    Returns the list of new records that were added (or planned).
+    '''
+    field_info = [info for info in field_info if info[1] not in ('OID', 'Geometry', 'GlobalID', 'Raster', 'Blob')]
+    fields = [info[0] for info in field_info]
+    table_count = int(arcpy.GetCount_management(table_path).getOutput(0))
+    if table_count + Count_File_Lines(input_csv) - 1 > Diff_Memory_Rows:
+        #Out of core diff: the file and the table are sorted in to spill files and merge-joined with Sort_Merge_Diff.  The
+        #file rows are converted to the field types first (Single values rounded), so they sort and match like the table rows.
+        file_rows = (row for chunk in Stream_File_Records(input_csv, fields, field_info, chunk_size) for row in chunk)
+        new_records = [row for action, row in Sort_Merge_Diff(file_rows, Read_Rows(table_path, fields))]
+        Record_Rows(read=table_count)
+        if plan is not None:
+            for row in new_records:
+                plan.insert(table_path, fields, row, skip_existing=True)
+        else:
+            Bulk_Load_Records(iter(new_records), table_path, fields, chunk_size)
+        return new_records
+    new_records = []
+    if np is not None:
+        #Columnar diff: the table is held as one sorted numpy array and each chunk of the file is compared to it with
+        #Array_Anti_Join, so the file is still streamed.  Only the new rows are kept to catch repeats across chunks.
+        field_types = [info[1] for info in field_info]
+        table_columns = Extract_Table_Columns(table_path, fields, field_types)
+        table_array = Columns_To_Array(table_columns, [('f{}'.format(i), column.dtype) for i, column in enumerate(table_columns)])
+        del table_columns
+        table_rows = np.unique(_Row_View(table_array))
+        dtype = table_array.dtype
+        del table_array
+        added = set()
+        def new_rows():
+            table = [table_rows, dtype]
+            for chunk in Stream_File_Records(input_csv, fields, field_info, chunk_size):
+                file_columns = Records_To_Columns(chunk, field_types)
+                if any(column.dtype.itemsize > table[1][i].itemsize for i, column in enumerate(file_columns)):
+                    #The chunk has a longer string than any in the table, so the table side is widened to match.
+                    widened = table[0].view(table[1])
+                    file_array, widened = Align_Columns(file_columns, [widened[name] for name in table[1].names])
+                    table[:] = [np.unique(_Row_View(widened)), widened.dtype]
+                    del widened
+                else:
+                    file_array = Columns_To_Array(file_columns, table[1])
+                for i in _Anti_Join_Rows(_Row_View(file_array), table[0]):
+                    row = chunk[i]
+                    if row not in added:
+                        added.add(row)
+                        new_records.append(row)
+                        yield row
+    else:
+        existing = set(Extract_Table_Records(table_path, fields))
+        def new_rows():
+            for chunk in Stream_File_Records(input_csv, fields, field_info, chunk_size):
+                for row in chunk:
+                    if row not in existing:
+                        existing.add(row)
+                        new_records.append(row)
+                        yield row
+    if plan is not None:
+        for row in new_rows():
+            plan.insert(table_path, fields, row, skip_existing=True)
+    else:
+        Bulk_Load_Records(new_rows(), table_path, fields, chunk_size)
+    return new_records
+
+
+def Align_Columns(left, right):
+    '''
+    Combine two lists of numpy columns (i.e. from Records_To_Columns) in to two structured arrays with the same
+    dtype.  String columns are widened to the longest value on either side.
+    '''
+    dtype = []
+    for i, (a, b) in enumerate(zip(left, right)):
+        if a.dtype.kind != b.dtype.kind:
+            raise TypeError("Column {} can not be compared: {} and {}".format(i, a.dtype, b.dtype))
+        dtype.append(('f{}'.format(i), a.dtype if a.dtype.itemsize >= b.dtype.itemsize else b.dtype))
+    return [Columns_To_Array(columns, dtype) for columns in (left, right)]
+
+
+def _Row_View(array):
+    #View each row of a structured array as one opaque value so whole rows can be sorted and compared.
+    array = np.ascontiguousarray(array)
+    return array.view(np.dtype((np.void, array.dtype.itemsize))).ravel()
+
+
+def Array_Anti_Join(left, right):
+    '''
+    Return the indexes of the rows in the left structured array that are not in the right one (first occurrence
+    only).  Both arrays must have the same dtype (see Align_Columns).
+    '''
+    return _Anti_Join_Rows(_Row_View(left), np.unique(_Row_View(right)))
+
+
+def _Anti_Join_Rows(left_rows, right_rows):
+    #Array_Anti_Join on row views, with the right rows already sorted and unique.
+    unique_rows, first = np.unique(left_rows, return_index=True)
+    first.sort()
+    if len(right_rows) == 0:
+        return first
+    candidates = left_rows[first]
+    position = np.minimum(np.searchsorted(right_rows, candidates), len(right_rows) - 1)
+    return first[right_rows[position] != candidates]
+
+
+def Array_Changed_Rows(source_keys, source_values, target_keys, target_values):
+    '''
+    Match every target row to the source row with the same key (the last one when a key is repeated) and return the
+    rows where any of the values differ.
+
+    Required input:
+        Source key and value structured arrays
+        Target key and value structured arrays (same dtypes as the source, see Align_Columns)
+
+    Returns a tuple of index arrays (target rows, matching source rows) for the rows that changed.
+    '''
+    source_rows = _Row_View(source_keys)
+    target_rows = _Row_View(target_keys)
+    keys, last = np.unique(source_rows[::-1], return_index=True)
+    if len(keys) == 0:
+        return np.array([], dtype=np.intp), np.array([], dtype=np.intp)
+    last = len(source_rows) - 1 - last
+    position = np.minimum(np.searchsorted(keys, target_rows), len(keys) - 1)
+    target_index = np.nonzero(keys[position] == target_rows)[0]
+    source_index = last[position[target_index]]
+    changed = _Row_View(source_values)[source_index] != _Row_View(target_values)[target_index]
+    return target_index[changed], source_index[changed]
 
-    *Note*
-    Table should be empty before adding data to it.
-    '''
-    input_fields = Extract_Field_Name(table_path)
-    if "GLOBALID" in input_fields:
-        input_fields.remove('GLOBALID')
-    with arcpy.da.InsertCursor(table_path, input_fields) as iCursor:
-        for id, row in enumerate(input_list):
-            row.insert(0,id)
-            try:
-                row = [x if x else None for x in row] #TODO Look into adding a continue statement for the else statement.
-            except:
-                print "Ran in to a Problem adding the following row to the table... {}: Likely an issues with text format i.e. unicode encoding problem. Try fixing the items and run the script again.".format(row)
-            iCursor.insertRow(row)
 
-                
 def buildWhereClause(table, field, value):
     """Constructs a SQL WHERE clause to select rows having the specified value
     within a given field and table (or Feature Class)."""
@@ -64,6 +222,861 @@ def buildWhereClause(table, field, value):
     return whereClause
 
 
+def buildWhereClause_Set(table, field, values, max_items=1000):
+    '''
+    Constructs a list of SQL WHERE clauses that together select the rows having any of the values within a
+    given field and table (or Feature Class).  Use it in place of looping buildWhereClause and
+    "ADD_TO_SELECTION" over a list of values.
+
+    Required input:
+        Path to Table or Feature Class
+        Field name
+        List of values
+    Optional input:
+        Maximum number of values/ranges in a single clause (Oracle limits IN lists to 1000 items)
+
+    *Note*
+    In most cases a single clause is returned.  When more than one is returned, select with the first clause
+    and add the rest to the selection.
+    '''
+    fieldDelimited = arcpy.AddFieldDelimiters(table, field)
+    fieldType = arcpy.ListFields(table, field)[0].type
+    return Compile_Where_Clauses(fieldDelimited, str(fieldType), values, max_items)
+
+
+def Bulk_Load_Records(rows, table_path, fields=None, batch_size=50000, edit_session=None):
+    '''
+    Bulk load rows from any iterable in to an ArcGIS Table or Feature Class, one edit operation per batch.
+
+    Required input:
+        Iterable of rows in the same order as the fields
+        Path to ArcGIS table
+    Optional input:
+        List of fields.  Defaults to all editable fields in the table.
+        Number of rows per batch/edit operation
+        Edit session the caller already holds (i.e. from start_edit_session).  The caller saves or aborts the edits.
+
+    Returns the number of rows loaded.
+    '''
+    if not fields:
+        fields = [f.name for f in arcpy.ListFields(table_path)
+                  if f.type not in ('OID', 'GlobalID', 'Geometry', 'Raster', 'Blob') and f.name.upper() not in ('SHAPE_LENGTH', 'SHAPE_AREA')]
+    edit = None
+    if edit_session is None and not table_path.lower().startswith('in_memory'):
+        edit = arcpy.da.Editor(get_geodatabase_path(table_path))
+        edit.startEditing(False, False)
+    rows = iter(rows)
+    loaded = 0
+    startTime = datetime.now()
+    try:
+        while True:
+            batch = list(itertools.islice(rows, batch_size))
+            if not batch:
+                break
+            if edit:
+                edit.startOperation()
+            with arcpy.da.InsertCursor(table_path, fields) as iCursor:
+                for row in batch:
+                    try:
+                        iCursor.insertRow(row)
+                    except Exception:
+                        print "Ran in to a Problem adding the following row to the table... {}: Likely an issues with text format i.e. unicode encoding problem. Try fixing the items and run the script again.".format(row)
+                        arcpy.AddWarning("Ran in to a Problem adding the following row to the table... {}: Likely an issues with text format i.e. unicode encoding problem. Try fixing the items and run the script again.".format(row))
+                        raise
+            if edit:
+                edit.stopOperation()
+            loaded += len(batch)
+            Record_Rows(written=len(batch))
+            print "Loaded {} rows in to {} ({} rows/sec)".format(loaded, os.path.basename(table_path), Rows_Per_Second(loaded, startTime))
+            arcpy.AddMessage("Loaded {} rows in to {} ({} rows/sec)".format(loaded, os.path.basename(table_path), Rows_Per_Second(loaded, startTime)))
+    except Exception:
+        if edit:
+            edit.abortOperation()
+            edit.stopEditing(False)
+        raise
+    if edit:
+        edit.stopEditing(True)
+    return loaded
+
+
+def Cached_Master_Snapshot(Sourcepath, key_field, fields):
+    '''
+    Return a Master_Snapshot of the source from Snapshot_Cache.  The source is read again when its geodatabase changed
+    since the snapshot was made (Workspace_Stamp), or when a field is asked for that was not asked for before (the new
+    snapshot holds the fields of both).  Returns None when there is no cache (outside the warm worker) or when the
+    source is not in a File Geodatabase.
+    '''
+    if Snapshot_Cache is None:
+        return None
+    path = InputCheck(Sourcepath)[0]
+    stamp = Workspace_Stamp(path)
+    if stamp is None:
+        return None
+    key = (path.lower(), key_field)
+    cached = Snapshot_Cache.get(key)
+    if cached is not None and cached[0] == stamp and set(fields) <= cached[1]:
+        return cached[2]
+    requested = set(fields) | (cached[1] if cached is not None and cached[0] == stamp else set())
+    snapshot = Master_Snapshot(path, key_field, sorted(requested))
+    Snapshot_Cache[key] = (stamp, requested, snapshot)
+    return snapshot
+
+
+class Change_Log(object):
+    '''
+    Buffered audit log of row level changes.  Writing a message to the geoprocessing window for every changed row is slow,
+    so the rows are written to a gzip compressed JSON lines (or csv) file by a background thread and only a sample of the
+    changes is shown in the geoprocessing window when the log is closed.  The per-field/per-figure summary counts are
+    still reported by the tools.
+
+    Each row has: action, table, figure, key, field, old_value, new_value
+
+    Usage:
+        log = Change_Log("Update Attributes")
+        log.record('update', ChildFC, 'MW-1', field='Status', old_value='Active', new_value='Abandoned', figure='Figure 1')
+        log.close()     #Writes the rest of the buffer and shows the sample rows
+
+    The log file is saved to <report folder>/<tool name>_<run id>.jsonl.gz (or .csv.gz).  The report folder defaults to a
+    Budding_GDB_ChangeLogs folder in the arcpy scratch folder.
+    '''
+    COLUMNS = ['action', 'table', 'figure', 'key', 'field', 'old_value', 'new_value']
+
+    def __init__(self, tool_name, log_folder=None, log_format='jsonl', sample_size=10, buffer_size=5000):
+        if log_format not in ('jsonl', 'csv'):
+            raise ValueError("Unknown change log format: {}".format(log_format))
+        if not log_folder:
+            scratch = getattr(arcpy.env, 'scratchFolder', None) or tempfile.gettempdir()
+            log_folder = os.path.join(scratch, 'Budding_GDB_ChangeLogs')
+        if not os.path.exists(log_folder):
+            os.makedirs(log_folder)
+        self.path = os.path.join(log_folder, "{}_{}.{}.gz".format(tool_name.replace(' ', '_'), datetime.now().strftime('%Y%m%d_%H%M%S_%f'), log_format))
+        self.log_format = log_format
+        self.sample_size = sample_size
+        self.buffer_size = buffer_size
+        self.counts = dict()
+        self.samples = dict()
+        self._buffer = []
+        self._error = None
+        self._closed = False
+        self._queue = Queue.Queue(maxsize=8)
+        self._thread = threading.Thread(target=self._write_batches)
+        self._thread.daemon = True
+        self._thread.start()
+        _OPEN_LOGS.append(self)
+
+    def record(self, action, table, key, field=None, old_value=None, new_value=None, figure=None):
+        group = (action, field)
+        count = self.counts.get(group, 0)
+        self.counts[group] = count + 1
+        row = (action, table, figure, key, field, old_value, new_value)
+        if count < self.sample_size:
+            self.samples.setdefault(group, []).append(row)
+        self._buffer.append(row)
+        if len(self._buffer) >= self.buffer_size:
+            self._queue.put(self._buffer)
+            self._buffer = []
+
+    def _write_batches(self):
+        try:
+            with gzip.open(self.path, 'wb') as f:
+                if self.log_format == 'csv':
+                    writer = csv.writer(f)
+                    writer.writerow(self.COLUMNS)
+                while True:
+                    batch = self._queue.get()
+                    if batch is None:
+                        break
+                    if self.log_format == 'csv':
+                        writer.writerows([[u'' if value is None else unicode(value).encode('utf-8') for value in row] for row in batch])
+                    else:
+                        f.write("".join(json.dumps(dict(zip(self.COLUMNS, row)), default=unicode) + "\n" for row in batch))
+        except Exception, e:
+            self._error = e
+            #Keep draining the queue so record() never blocks.
+            while self._queue.get() is not None:
+                pass
+
+    def close(self):
+        '''
+        Write the rest of the buffer, wait for the log file to be written and show the sample rows.  Returns the path
+        to the log file.
+        '''
+        if self._closed:
+            return self.path
+        self._closed = True
+        if self in _OPEN_LOGS:
+            _OPEN_LOGS.remove(self)
+        if self._buffer:
+            self._queue.put(self._buffer)
+            self._buffer = []
+        self._queue.put(None)
+        self._thread.join()
+
+        for group in sorted(self.samples):
+            action, field = group
+            heading = "Example {} changes".format(action) if field is None else "Example {} changes to {}".format(action, field)
+            _Message("{} ({} of {}):".format(heading, len(self.samples[group]), self.counts[group]))
+            for action, table, figure, key, field, old_value, new_value in self.samples[group]:
+                if field is None:
+                    _Message("    {}".format(new_value))
+                else:
+                    _Message("    {} {}: {} -> {}".format(key, field, old_value, new_value))
+        if self._error is not None:
+            arcpy.AddWarning("Unable to save the change log {}: {}".format(self.path, self._error))
+        elif self.counts:
+            _Message("{} change(s) saved to the change log: {}".format(sum(self.counts.values()), self.path))
+        return self.path
+
+
+class Change_Buffer(object):
+    '''
+    Holds the records for a Change_Log until the edits they describe are saved.  Used by Update_Fields_Chunked so the
+    change log only lists the changes of the chunks that were saved.
+
+    Usage:
+        pending = Change_Buffer()
+        Update_Fields(..., change_log=pending)
+        stop_edit_session(edit_session)
+        pending.flush(log)      #Writes the held records to the log
+    '''
+    def __init__(self):
+        self.records = []
+
+    def record(self, *args, **kwargs):
+        self.records.append((args, kwargs))
+
+    def flush(self, change_log):
+        for args, kwargs in self.records:
+            change_log.record(*args, **kwargs)
+        count = len(self.records)
+        self.records = []
+        return count
+
+
+def _Message(text):
+    #print and AddMessage a message.  Values that can not be encoded for the console are replaced.
+    try:
+        print text
+        arcpy.AddMessage(text)
+    except UnicodeError:
+        arcpy.AddMessage(text.encode('ascii', 'replace') if isinstance(text, unicode) else text.decode('ascii', 'replace'))
+
+
+class Change_Plan(object):
+    '''
+    Two phase (plan/apply) sync.  In the plan phase a tool finds the differences as usual, but the inserts and updates
+    are recorded in a Change_Plan instead of being written.  The plan is saved to a gzip JSON lines file so it can be
+    reviewed before anything is changed.  The apply phase loads the plan and writes the changes with bulk cursors, so
+    the comparison is only run once.
+
+    Plan file (one JSON value per line):
+        {"tool", "created"}                                         Header
+        {"operation", "action": "update", "table", "key_field"}     Update operation
+        {"operation", "action": "insert", "table", "fields", "skip_existing"}
+                                                                    Insert operation.  Geometry is stored as WKT (SHAPE@WKT).
+        [operation, key, [[field, old value, new value], ...]]      One planned update (one target row)
+        [operation, row]                                            One planned insert
+        {"applied": operation, "at"}                                The operation was applied
+
+    The planned rows are written to the file as they are recorded, so the plan phase does not hold them in memory.  The
+    apply phase reads the rows back one operation at a time and holds that operation's rows: the updates of a table in a
+    dictionary keyed on the key field, and inserts marked skip_existing in a set while the table is checked for them.
+    Dates are saved with microseconds.  Once an operation is applied it is marked in the plan file, and applying the
+    same plan again skips it.  Loading a plan that was applied in full raises an error.
+
+    When an update is applied, the target values must still match the old values in the plan.  Rows that were edited
+    after the plan was made are skipped and reported as conflicts.  Rows with the same key (i.e. a location in more
+    than one figure) are matched on their old values.  Inserts can be marked skip_existing, so rows that
+    were already added to the table since the plan was made are not added twice.
+
+    Usage:
+        plan = Change_Plan("Update Attributes")
+        Update_Fields(..., plan=plan)        #Plan phase, nothing is written
+        plan.save(plan_path)
+
+        plan = Change_Plan.load(plan_path)
+        plan.apply(change_log)               #Apply phase
+    '''
+    def __init__(self, tool_name):
+        self.tool_name = tool_name
+        self.created = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self.path = None
+        #Operation headers.  'count' is the number of planned rows and is not saved.
+        self.operations = []
+        self.applied = dict()
+        self._index = dict()
+        self._spool = None
+        self._spool_path = None
+
+    @staticmethod
+    def default_path(tool_name):
+        '''
+        Plan file for a tool in the Budding_GDB_Plans folder in the arcpy scratch folder.  The same path is used by the
+        plan and the apply run.
+        '''
+        scratch = getattr(arcpy.env, 'scratchFolder', None) or tempfile.gettempdir()
+        return os.path.join(scratch, 'Budding_GDB_Plans', "{}.plan.jsonl.gz".format(tool_name.replace(' ', '_')))
+
+    @staticmethod
+    def _line(item):
+        def encode(value):
+            #Microseconds are kept, so a date read back from the plan still equals the value in the table.
+            if isinstance(value, datetime):
+                return value.strftime('%Y-%m-%d %H:%M:%S.%f')
+            return unicode(value)
+        return json.dumps(item, default=encode, separators=(',', ':')) + "\n"
+
+    def _write(self, item):
+        #The planned rows are spooled to a temporary file next to the default plan file until the plan is saved.
+        if self._spool is None:
+            folder = os.path.dirname(self.default_path(self.tool_name))
+            if not os.path.exists(folder):
+                os.makedirs(folder)
+            descriptor, self._spool_path = tempfile.mkstemp(suffix='.plan.jsonl.gz', dir=folder)
+            os.close(descriptor)
+            self._spool = gzip.open(self._spool_path, 'wb')
+            self._spool.write(self._line({'tool': self.tool_name, 'created': self.created}))
+        if item is not None:
+            self._spool.write(self._line(item))
+
+    def _operation(self, key, header):
+        index = self._index.get(key)
+        if index is None:
+            index = len(self.operations)
+            self._index[key] = index
+            header['operation'] = index
+            self._write(header)
+            header['count'] = 0
+            self.operations.append(header)
+        self.operations[index]['count'] += 1
+        return index
+
+    def update(self, table, key_field, key, changes):
+        #changes is a list of (field, old value, new value) for one target row.
+        index = self._operation(('update', table, key_field), {'action': 'update', 'table': table, 'key_field': key_field})
+        self._write([index, key, [list(change) for change in changes]])
+
+    def insert(self, table, fields, row, skip_existing=False):
+        index = self._operation(('insert', table, tuple(fields)),
+                                {'action': 'insert', 'table': table, 'fields': list(fields), 'skip_existing': skip_existing})
+        self._write([index, list(row)])
+
+    def insert_features(self, source_path, target_path):
+        '''
+        Plan an insert of every feature in the source in to the target.  Fields are matched by name the same way
+        Copy_Features_By_OID does.  Returns the number of features planned.
+        '''
+        skip_types = ('OID', 'Geometry', 'GlobalID', 'Raster', 'Blob')
+        source_fields = set(Extract_Field_Name(source_path))
+        fields = [f.name for f in arcpy.ListFields(target_path)
+                  if f.type not in skip_types and f.name in source_fields and f.name.upper() not in ('SHAPE_LENGTH', 'SHAPE_AREA')]
+        count = 0
+        with arcpy.da.SearchCursor(source_path, ["SHAPE@WKT"] + fields) as sCursor:
+            for row in sCursor:
+                self.insert(target_path, ["SHAPE@WKT"] + fields, row)
+                count += 1
+        Record_Rows(read=count)
+        return count
+
+    def counts(self):
+        #Number of planned rows for each (action, table).
+        return [(operation['action'], operation['table'], operation['count']) for operation in self.operations]
+
+    def summary(self):
+        if not self.operations:
+            _Message("The plan is empty.  There are no changes to apply.")
+        for action, table, count in self.counts():
+            _Message("Planned {}s in {}.................... {}".format(action, table, count))
+
+    def save(self, path):
+        '''
+        Save the plan to path.  Nothing can be added to the plan once it is saved.
+        '''
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        self._write(None)
+        self._spool.close()
+        self._spool = None
+        if os.path.exists(path):
+            os.remove(path)
+        shutil.move(self._spool_path, path)
+        self.path = path
+        _Message("The plan was saved to: {}".format(path))
+        return path
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            raise IOError("The plan file {} does not exist.  Run the tool in plan mode first.".format(path))
+        plan = cls(None)
+        with gzip.open(path, 'rb') as f:
+            for line in f:
+                item = json.loads(line)
+                if isinstance(item, list):
+                    plan.operations[item[0]]['count'] += 1
+                elif 'applied' in item:
+                    plan.applied[item['applied']] = item['at']
+                elif 'tool' in item:
+                    plan.tool_name, plan.created = item['tool'], item['created']
+                else:
+                    item['count'] = 0
+                    plan.operations.append(item)
+        plan.path = path
+        if plan.operations and len(plan.applied) == len(plan.operations):
+            raise ValueError("The plan {} was already applied on {}.  Run the tool in plan mode again.".format(path, max(plan.applied.values())))
+        _Message("Loaded the {} plan created {} from: {}".format(plan.tool_name, plan.created, path))
+        if plan.applied:
+            _Message("{} of {} operation(s) in the plan were already applied and will be skipped".format(len(plan.applied), len(plan.operations)))
+        return plan
+
+    def _items(self, index):
+        #The planned rows of one operation, read back from the plan file.
+        with gzip.open(self.path, 'rb') as f:
+            for line in f:
+                if line.startswith('[{},'.format(index)):
+                    yield json.loads(line)
+
+    def _mark_applied(self, indexes):
+        if not indexes:
+            return
+        at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        with gzip.open(self.path, 'ab') as f:
+            for index in indexes:
+                f.write(self._line({'applied': index, 'at': at}))
+                self.applied[index] = at
+
+    def apply(self, change_log=None, edit_session=None):
+        '''
+        Apply every operation in a saved plan that was not applied yet.  Each table is updated with one UpdateCursor
+        and inserted in to with Bulk_Load_Records.  Each operation is marked as applied in the plan file once it is
+        saved.  Pass an edit session (i.e. from start_edit_session) to apply the plan inside an edit session the caller
+        already holds, otherwise each operation is saved in its own edit session.  With the caller's edit session the
+        operations are marked when apply returns.  Returns a list of (action, table, rows written, conflicts).
+        '''
+        if self.path is None:
+            raise ValueError("The plan has to be saved before it is applied")
+        results = []
+        applied = []
+        for index, operation in enumerate(self.operations):
+            if index in self.applied:
+                continue
+            items = lambda index=index: self._items(index)
+            if operation['action'] == 'update':
+                results.append(('update', operation['table']) + self._apply_update(operation, items, change_log, edit_session))
+            else:
+                results.append(('insert', operation['table']) + self._apply_insert(operation, items, change_log, edit_session))
+            if edit_session is None:
+                self._mark_applied([index])
+            else:
+                applied.append(index)
+        self._mark_applied(applied)
+        for action, table, written, conflicts in results:
+            _Message("Applied {}s to {}.................... {}".format(action, table, written))
+            if conflicts:
+                arcpy.AddWarning("{} planned {}(s) to {} were skipped because the rows changed after the plan was made".format(conflicts, action, table))
+        return results
+
+    @staticmethod
+    def _converters(table, fields):
+        #Dates are saved as text in the plan.  Convert them back to datetime for Date fields.
+        field_types = dict((f.name, f.type) for f in arcpy.ListFields(table))
+        convert_date = Field_Value_Converter('Date')
+        def convert(value):
+            return convert_date(value) if isinstance(value, basestring) else value
+        return dict((field, convert if field_types.get(field) == 'Date' else None) for field in fields)
+
+    def _apply_update(self, operation, items, change_log, edit_session=None):
+        table, key_field = operation['table'], operation['key_field']
+        fields = sorted(set(change[0] for index, key, row_changes in items() for change in row_changes))
+        position = dict((field, i + 1) for i, field in enumerate(fields))
+        converters = self._converters(table, fields + [key_field])
+        def convert(field, value):
+            return value if converters[field] is None else converters[field](value)
+        changes = dict()
+        for index, key, row_changes in items():
+            row_changes = [(field, convert(field, old_value), convert(field, new_value)) for field, old_value, new_value in row_changes]
+            changes.setdefault(convert(key_field, key), []).append(row_changes)
+        key_type = Get_Field_Type(table, key_field)
+        clauses = Compile_Where_Clauses(arcpy.AddFieldDelimiters(table, key_field), key_type, list(changes))
+        clause = clauses[0] if len(clauses) == 1 else ''
+
+        written = 0
+        scanned = 0
+        own_session = edit_session is None
+        if own_session:
+            edit_session = start_edit_session(table)
+        with arcpy.da.UpdateCursor(table, [key_field] + fields, clause) as updateRows:
+            for updateRow in updateRows:
+                scanned += 1
+                key_changes = changes.get(updateRow[0])
+                if not key_changes:
+                    continue
+                for row_changes in key_changes:
+                    if all(updateRow[position[field]] == old_value for field, old_value, new_value in row_changes):
+                        key_changes.remove(row_changes)
+                        break
+                else:
+                    continue
+                for field, old_value, new_value in row_changes:
+                    updateRow[position[field]] = new_value
+                    if change_log is not None:
+                        change_log.record('update', os.path.basename(table), updateRow[0], field, old_value, new_value)
+                updateRows.updateRow(updateRow)
+                written += 1
+        if own_session:
+            stop_edit_session(edit_session)
+        Record_Rows(read=scanned, written=written)
+        #Planned rows that were not matched were edited after the plan was made or are no longer in the table.
+        return written, sum(len(key_changes) for key_changes in changes.values())
+
+    def _apply_insert(self, operation, items, change_log, edit_session=None):
+        table, fields = operation['table'], operation['fields']
+        converters = self._converters(table, fields)
+        converters = [converters[field] for field in fields]
+        def planned_rows():
+            for index, row in items():
+                yield tuple(value if convert is None else convert(value) for convert, value in zip(converters, row))
+        #Only the planned rows are held in memory.  The table is streamed to find the planned rows it already has.
+        existing = set()
+        if operation.get('skip_existing'):
+            planned = set(planned_rows())
+            scanned = 0
+            for row in Read_Rows(table, fields):
+                scanned += 1
+                if row in planned:
+                    existing.add(row)
+            Record_Rows(read=scanned)
+            del planned
+        skipped = [0]
+        def new_rows():
+            for row in planned_rows():
+                if row in existing:
+                    skipped[0] += 1
+                    continue
+                if operation.get('skip_existing'):
+                    existing.add(row)
+                if change_log is not None:
+                    change_log.record('insert', os.path.basename(table), None, new_value=list(row))
+                yield row
+        written = Bulk_Load_Records(new_rows(), table, fields, edit_session=edit_session)
+        return written, skipped[0]
+
+
+class Change_Watermark(object):
+    '''
+    Watermark for the incremental mode of Add New Geometry.  Two tables are kept in the scratch GDB:
+
+        <name>_Watermark    Layer, Figure, Generation, Max_OID, Figure_Fingerprint, Checked, Layer_Stamp
+                            One row per figure that has been checked against the layer.
+        <name>_Fingerprint  Layer, Feature_OID, Fingerprint, Generation
+                            A fingerprint (attributes and geometry) of every feature in the layer and the generation
+                            (run) in which the feature was last added or changed.  Only used when the layer does not
+                            have editor tracking.
+
+    changed_oids() returns the ObjectIDs added or changed since the figures were last checked, or None when a full run
+    is needed.  The whole layer is only read when it has to be:
+        - When editor tracking is on, only the features above the Max_OID watermark or edited since the figures were
+          last checked are read.
+        - Otherwise, when the table files of the layer have not changed since the last run (Table_Stamp) nothing is
+          read and no features are returned.
+        - Otherwise every feature is fingerprinted and compared to the stored fingerprints.
+
+    A full run is needed when a figure has not been checked before, when the figure extent or secondary boundary of a
+    figure changed, or when the max ObjectID of a layer without editor tracking went down (the layer was reloaded and
+    the ObjectIDs no longer line up with the fingerprints).  save() stores the new watermark and should only be called
+    once the run has finished.
+
+    Usage:
+        watermark = Change_Watermark(scratch_gdb, Scratch_FD, ParentPath)
+        oids = watermark.changed_oids(Figure_Fingerprints([FigSelectionPath, SecondaryBoundarypath], key_field, FigureList))
+        ...
+        watermark.save()
+    '''
+    def __init__(self, scratch_gdb, name, layer_path):
+        self.layer = layer_path
+        self.watermark_table = os.path.join(scratch_gdb, name + "_Watermark")
+        self.fingerprint_table = os.path.join(scratch_gdb, name + "_Fingerprint")
+        self.generation = None
+        self.figure_fingerprints = None
+        self.max_oid = None
+        self.checked = None
+        self.stamp = None
+        self.tracked = False
+        self.changes = None
+
+    def _layer_clause(self, table):
+        return "{} = '{}'".format(arcpy.AddFieldDelimiters(table, "Layer"), self.layer.replace("'", "''"))
+
+    def _create_tables(self):
+        tables = ((self.watermark_table, [("Layer", "TEXT", 255), ("Figure", "TEXT", 255), ("Generation", "LONG", None),
+                                          ("Max_OID", "LONG", None), ("Figure_Fingerprint", "TEXT", 32),
+                                          ("Checked", "DATE", None), ("Layer_Stamp", "TEXT", 64)]),
+                  (self.fingerprint_table, [("Layer", "TEXT", 255), ("Feature_OID", "LONG", None),
+                                            ("Fingerprint", "TEXT", 32), ("Generation", "LONG", None)]))
+        for path, fields in tables:
+            if not arcpy.Exists(path):
+                arcpy.CreateTable_management(*os.path.split(path))
+            #Watermark tables from older versions are missing the newer fields.
+            existing = set(f.name.upper() for f in arcpy.ListFields(path))
+            for field_name, field_type, field_length in fields:
+                if field_name.upper() not in existing:
+                    arcpy.AddField_management(path, field_name, field_type, field_length=field_length)
+
+    def _message(self, message):
+        arcpy.AddMessage(message)
+        print message
+
+    def changed_oids(self, figure_fingerprints):
+        '''
+        Return the set of ObjectIDs added or changed since the figures were last checked, or None when a full run is
+        needed.  figure_fingerprints is a dictionary of figure name: fingerprint (i.e. from Figure_Fingerprints).
+        '''
+        self._create_tables()
+        self.figure_fingerprints = figure_fingerprints
+        desc = arcpy.Describe(self.layer)
+        edited_field = getattr(desc, 'lastEditDateFieldName', None) if getattr(desc, 'editorTrackingEnabled', False) else None
+        self.tracked = bool(edited_field)
+        #Taken before the layer is read, so an edit made during the run is picked up by the next run.
+        self.checked = (datetime.utcnow() if getattr(desc, 'isTimeInUTC', False) else datetime.now()).replace(microsecond=0)
+        self.stamp = Table_Stamp(self.layer)
+
+        watermarks = dict()
+        last_generation = 0
+        last_max_oid = 0
+        with arcpy.da.SearchCursor(self.watermark_table, ["Figure", "Generation", "Max_OID", "Figure_Fingerprint", "Checked", "Layer_Stamp"],
+                                   self._layer_clause(self.watermark_table)) as cursor:
+            for figure, generation, max_oid, fingerprint, checked, stamp in cursor:
+                watermarks[Figure_Key(figure)] = (generation, fingerprint, max_oid, checked, stamp)
+                last_generation = max(last_generation, generation)
+                last_max_oid = max(last_max_oid, max_oid)
+        self.generation = last_generation + 1
+
+        full_run = False
+        for figure, fingerprint in sorted(figure_fingerprints.iteritems()):
+            if figure not in watermarks or watermarks[figure][1] != fingerprint:
+                self._message("Figure {} has not been checked with its current extent. Running a full check.".format(figure))
+                full_run = True
+                break
+        checked = [watermarks[figure] for figure in figure_fingerprints] if not full_run else []
+
+        if self.tracked:
+            oid_field = desc.OIDFieldName
+            clause = None
+            if not full_run:
+                if any(w[3] is None for w in checked):
+                    full_run = True
+                else:
+                    clause = "{} > {} OR {} >= date '{}'".format(
+                        arcpy.AddFieldDelimiters(self.layer, oid_field), min(w[2] for w in checked),
+                        arcpy.AddFieldDelimiters(self.layer, edited_field), min(w[3] for w in checked).strftime('%Y-%m-%d %H:%M:%S'))
+            oids = set()
+            with arcpy.da.SearchCursor(self.layer, ["OID@"], clause) as cursor:
+                for row in cursor:
+                    oids.add(row[0])
+            Record_Rows(read=len(oids))
+            self.max_oid = max([last_max_oid] + list(oids))
+            return None if full_run else oids
+
+        if not full_run and self.stamp is not None and all(w[4] == self.stamp for w in checked):
+            self._message("{} has not changed since the figures were last checked.".format(self.layer))
+            self.max_oid = last_max_oid
+            return set()
+
+        stored = dict()
+        with arcpy.da.SearchCursor(self.fingerprint_table, ["Feature_OID", "Fingerprint", "Generation"],
+                                   self._layer_clause(self.fingerprint_table)) as cursor:
+            for oid, fingerprint, generation in cursor:
+                stored[oid] = (fingerprint, generation)
+
+        #Fingerprint the layer and work out what changed since the last run.
+        skip_types = ('OID', 'Geometry', 'GlobalID', 'Raster', 'Blob')
+        fields = [f.name for f in arcpy.ListFields(self.layer)
+                  if f.type not in skip_types and f.name.upper() not in ('SHAPE_LENGTH', 'SHAPE_AREA')]
+        current = dict()
+        self.max_oid = 0
+        with arcpy.da.SearchCursor(self.layer, ["OID@", "SHAPE@"] + fields) as cursor:
+            for row in cursor:
+                current[row[0]] = Feature_Fingerprint(row[1], row[2:])
+                self.max_oid = max(self.max_oid, row[0])
+        Record_Rows(read=len(current))
+        self.changes = (current, stored)
+
+        if self.max_oid < last_max_oid:
+            arcpy.AddWarning("The max ObjectID of {} went down since the last run. Running a full check.".format(self.layer))
+            print "The max ObjectID of {} went down since the last run. Running a full check.".format(self.layer)
+            self.changes = (current, dict())
+            return None
+        if full_run:
+            return None
+        since = min(w[0] for w in checked)
+        return set(oid for oid, fingerprint in current.iteritems()
+                   if oid not in stored or stored[oid][0] != fingerprint or stored[oid][1] > since)
+
+    def save(self):
+        '''
+        Store a watermark for every figure in the run and, for a layer without editor tracking, the fingerprints of the
+        layer.  Only the fingerprints that were added, changed or deleted are written.
+        '''
+        if self.tracked:
+            #Fingerprints from before editor tracking was turned on are out of date.
+            with arcpy.da.UpdateCursor(self.fingerprint_table, ["Feature_OID"], self._layer_clause(self.fingerprint_table)) as cursor:
+                for row in cursor:
+                    cursor.deleteRow()
+        elif self.changes is not None:
+            current, stored = self.changes
+            if not stored:
+                with arcpy.da.UpdateCursor(self.fingerprint_table, ["Feature_OID"], self._layer_clause(self.fingerprint_table)) as cursor:
+                    for row in cursor:
+                        cursor.deleteRow()
+            else:
+                with arcpy.da.UpdateCursor(self.fingerprint_table, ["Feature_OID", "Fingerprint", "Generation"],
+                                           self._layer_clause(self.fingerprint_table)) as cursor:
+                    for oid, fingerprint, generation in cursor:
+                        if oid not in current:
+                            cursor.deleteRow()
+                        elif current[oid] != fingerprint:
+                            cursor.updateRow([oid, current[oid], self.generation])
+            new_rows = ((self.layer, oid, fingerprint, self.generation) for oid, fingerprint in current.iteritems() if oid not in stored)
+            Bulk_Load_Records(new_rows, self.fingerprint_table, ["Layer", "Feature_OID", "Fingerprint", "Generation"])
+
+        figures = self.figure_fingerprints
+        with arcpy.da.UpdateCursor(self.watermark_table, ["Figure"], self._layer_clause(self.watermark_table)) as cursor:
+            for row in cursor:
+                if Figure_Key(row[0]) in figures:
+                    cursor.deleteRow()
+        with arcpy.da.InsertCursor(self.watermark_table, ["Layer", "Figure", "Generation", "Max_OID", "Figure_Fingerprint", "Checked", "Layer_Stamp"]) as cursor:
+            for figure, fingerprint in sorted(figures.iteritems()):
+                cursor.insertRow([self.layer, figure, self.generation, self.max_oid, fingerprint, self.checked, self.stamp])
+        self._message("Saved the watermark (generation {}) for {} figure(s) to {}".format(self.generation, len(figures), self.watermark_table))
+
+
+#Null markers for the numpy columns.  They sort and compare like any other value.
+_INT_NULL = -2**63
+_STR_NULL = u'\uffff'
+
+def Column_Value(column, index):
+    '''
+    Return the python value (None for nulls) of one row of a numpy column built by Records_To_Columns.
+    '''
+    value = column[index]
+    kind = column.dtype.kind
+    if kind == 'U':
+        value = unicode(value)
+        return None if value == _STR_NULL else value
+    if kind == 'i':
+        value = int(value)
+        return None if value == _INT_NULL else value
+    if kind == 'f':
+        value = float(value)
+        return None if value != value else value
+    return value.item()
+
+
+def Columns_To_Array(columns, dtype):
+    '''
+    Copy a list of numpy columns in to a structured array with fields f0, f1, ... of the given dtype.
+    '''
+    array = np.empty(len(columns[0]) if columns else 0, dtype=dtype)
+    for i, column in enumerate(columns):
+        array['f{}'.format(i)] = column
+    return array
+
+
+def Compile_Where_Clauses(fieldDelimited, fieldType, values, max_items=1000):
+    '''
+    Compile a list of values in to compact WHERE clauses for a delimited field name and field type.
+        - 'NULL' becomes an IS NULL predicate.
+        - String and Date values are quoted.  Single quotes in string values are escaped.
+        - Runs of 3 or more consecutive whole numbers are merged in to a range.
+        - Single values are matched within a small tolerance, since the stored value is rounded to single precision.
+        - Values that are not valid numbers for a numeric field are skipped with a warning.
+        - Everything else is collected in IN lists of at most max_items values.
+    '''
+    is_null = False
+    numbers = set()
+    literals = []
+    single_terms = []
+    seen = set()
+    for value in values:
+        if value is None or value == 'NULL':
+            is_null = True
+            continue
+        if isinstance(value, basestring):
+            value = value.strip("'")
+        if fieldType in ('SmallInteger', 'Integer', 'OID'):
+            if value == '':
+                continue
+            try:
+                numbers.add(Field_Value_Converter(fieldType)(value) if isinstance(value, basestring) else int(value))
+            except ValueError:
+                arcpy.AddWarning("{} is not a valid {} value for {}. Skipping value.".format(value, fieldType, fieldDelimited))
+            continue
+        if fieldType in ('Double', 'Single'):
+            if value == '':
+                continue
+            try:
+                number = float(value)
+            except ValueError:
+                arcpy.AddWarning("{} is not a valid {} value for {}. Skipping value.".format(value, fieldType, fieldDelimited))
+                continue
+            if fieldType == 'Single':
+                #Single fields only hold about 7 significant digits, so the stored value rarely equals the python float.
+                tolerance = abs(number) * 1e-6
+                term = "({0} >= {1} AND {0} <= {2})".format(fieldDelimited, repr(number - tolerance), repr(number + tolerance))
+                if term not in seen:
+                    seen.add(term)
+                    single_terms.append(term)
+                continue
+            literal = repr(number)
+        elif fieldType == 'Date':
+            if value == '':
+                continue
+            if isinstance(value, datetime):
+                value = value.strftime('%Y-%m-%d %H:%M:%S')
+            literal = "date '{}'".format(value)
+        else:
+            literal = "'{}'".format(value.replace("'", "''"))
+        if literal not in seen:
+            seen.add(literal)
+            literals.append(literal)
+
+    #Merge consecutive whole numbers in to ranges.
+    ranges = []
+    run = []
+    for number in sorted(numbers):
+        if run and number == run[-1] + 1:
+            run.append(number)
+            continue
+        if len(run) >= 3:
+            ranges.append((run[0], run[-1]))
+        else:
+            literals.extend(str(n) for n in run)
+        run = [number]
+    if len(run) >= 3:
+        ranges.append((run[0], run[-1]))
+    else:
+        literals.extend(str(n) for n in run)
+
+    terms = ["({0} >= {1} AND {0} <= {2})".format(fieldDelimited, low, high) for low, high in ranges] + single_terms
+    if is_null:
+        terms.append("{} IS NULL".format(fieldDelimited))
+    clauses = []
+    for i in xrange(0, len(literals), max_items):
+        chunk = literals[i:i + max_items]
+        if len(chunk) == 1:
+            clauses.append("{} = {}".format(fieldDelimited, chunk[0]))
+        else:
+            clauses.append("{} IN ({})".format(fieldDelimited, ", ".join(chunk)))
+    for i in xrange(0, len(terms), max_items):
+        clauses.append(" OR ".join(terms[i:i + max_items]))
+
+    #Pack the range/NULL terms in with the IN lists when they fit.
+    if len(clauses) > 1 and len(literals) + len(terms) <= max_items:
+        clauses = [" OR ".join(clauses)]
+    return clauses
+
+
 def Create_Empty_Table(input_field_info, table_name, path):
     '''
     Create an empty table with from a list of input fields.
@@ -91,6 +1104,18 @@ def Create_Empty_Table(input_field_info, table_name, path):
     arcpy.Delete_management(tmp_table)
 
 
+def Create_FL_From_OIDs(LayerName, FCPath, oids):
+    '''
+    Create a Feature layer that only holds the features with the given ObjectIDs.  The ObjectIDs are compiled in to a
+    definition query (Compile_Where_Clauses), so an empty list gives an empty layer rather than the whole feature class.
+    '''
+    oid_field = [f.name for f in arcpy.ListFields(FCPath) if f.type == 'OID'][0]
+    fieldDelimited = arcpy.AddFieldDelimiters(FCPath, oid_field)
+    clauses = Compile_Where_Clauses(fieldDelimited, 'OID', oids)
+    expression = " OR ".join("({})".format(clause) for clause in clauses) or "{} IS NULL".format(fieldDelimited)
+    return Create_FL(LayerName, FCPath, expression)
+
+
 def Create_FL(LayerName, FCPath, expression = ''):
     '''
     Create a Feature layer from a feature class. Optionally, an expression clause can be passed in to
@@ -116,6 +1141,54 @@ def Compare_Fields(fc1_path,fc2_path):
         return False
 
 
+def Copy_Features_By_OID(source_path, target_path, oids):
+    '''
+    Copy the features with the given ObjectIDs from one feature class to another with a single pair of cursors.
+    Fields are matched by name the same way Append_management with "NO_TEST" does.
+
+    Required input:
+        Path to source Feature Class
+        Path to target Feature Class
+        Collection of ObjectIDs from the source to copy
+
+    Returns the number of features copied.
+    '''
+    oids = set(oids)
+    if not oids:
+        return 0
+    skip_types = ('OID', 'Geometry', 'GlobalID', 'Raster', 'Blob')
+    source_fields = set(Extract_Field_Name(source_path))
+    fields = [f.name for f in arcpy.ListFields(target_path)
+              if f.type not in skip_types and f.name in source_fields and f.name.upper() not in ('SHAPE_LENGTH', 'SHAPE_AREA')]
+    copied = 0
+    scanned = 0
+    with arcpy.da.SearchCursor(source_path, ["OID@", "SHAPE@"] + fields) as sCursor:
+        with arcpy.da.InsertCursor(target_path, ["SHAPE@"] + fields) as iCursor:
+            for row in sCursor:
+                scanned += 1
+                if row[0] in oids:
+                    iCursor.insertRow(row[1:])
+                    copied += 1
+    Record_Rows(read=scanned, written=copied)
+    return copied
+
+
+def Count_File_Lines(filename, block_size=1048576):
+    '''
+    Count the lines in a text file (header included) without parsing it.
+    '''
+    lines = 0
+    last = '\n'
+    with open(filename, 'rb') as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            lines += block.count('\n')
+            last = block[-1]
+    return lines + (last != '\n')
+
+
 def convert_invalid_values(input_list):
     '''
     Due to python script validation, <Null> values can not be populated in a value list since <Null> is a None type in python.
@@ -133,58 +1206,128 @@ def convert_invalid_values(input_list):
     return input_list
 
 
-def csv_to_table(input_csv, input_fc, selection_fields, ParentField,scratch_gdb):
-    # Getting Filepath/name of input csv/fc
-    csv_path, csv_name = InputCheck(input_csv)
-    fc_path, fc_name = InputCheck(input_fc)
-    
-    #Extracting CSV stuff
-    csv_list = Extract_File_Records(csv_path,"No")
-    header = Space2Underscore(csv_list.pop(0))
-    fields = Extract_input_fields_from_csv(selection_fields, ParentField, header)
-    field_index = get_column_index(header,fields)
-    csv_list = extract_list_columns(csv_list, field_index, "No")
-
-    #Creating blank table and appending csv list
-    name = "csv2table_temp"
-    header_fieldInfo = get_Data_Type_FromGIS(fields, fc_path)
-    Create_Empty_Table(header_fieldInfo, name, scratch_gdb)
-    Add_Records_to_Table(csv_list, os.path.join(scratch_gdb, name))
-    return os.path.join(scratch_gdb, name)
-   
-
 def Delete_Values_From_FC(values_to_delete, key_field, FC, FC_Path):
-    FC = str(FC) + "_Layer"
-    Create_FL(FC,FC_Path,"")
-    What_to_Delete = []
+    '''
+    Delete every feature whose key field value is in a semicolon delimited list of values.  The values are
+    converted to the key field type and all of them are removed in a single UpdateCursor pass.
 
+    'NULL' deletes features with a <Null> value and ' ' deletes features with an empty string, the same way
+    convert_invalid_values and buildWhereClause treat those values.  Single values are matched at single precision.
+    '''
     if not values_to_delete:
         print "No features were selected to be deleted"
         arcpy.AddMessage("No features were selected to be deleted")
-    else:
-        values_to_delete = values_to_delete.split(";")
-        values_to_delete = convert_invalid_values(values_to_delete)
-        for value in values_to_delete:
-            arcpy.AddMessage("Deleting the following from {}...........................{}".format(FC,value))
-            print "Deleting the following from {}...........................{}".format(FC,value)
-            clause = buildWhereClause(FC_Path, key_field, value)
-            arcpy.SelectLayerByAttribute_management(FC, "NEW_SELECTION", clause)
-            arcpy.DeleteRows_management(FC)
-    arcpy.Delete_management(FC)
+        return
+
+    values_to_delete = values_to_delete.split(";")
+    values_to_delete = convert_invalid_values(values_to_delete)
+    field_type = Get_Field_Type(FC_Path, key_field)
+    convert = Field_Value_Converter(field_type)
+    delete_set = dict()
+    for value in values_to_delete:
+        if value == 'NULL':
+            delete_set[None] = value
+            continue
+        value = value.strip("'")
+        if value == '':
+            if field_type == 'String':
+                delete_set[''] = "''"
+            continue
+        try:
+            delete_set[convert(value)] = value
+        except ValueError:
+            arcpy.AddWarning("{} is not a valid {} value for {}. Skipping value.".format(value, field_type, key_field))
+
+    #The converted Single values are rounded to single precision.  The values read back are rounded the same way, in case
+    #the cursor hands them back at a different precision.
+    stored = Single_Value if field_type == 'Single' else None
+    deleted = dict((value, 0) for value in delete_set)
+    scanned = 0
+    with arcpy.da.UpdateCursor(FC_Path, [key_field]) as uCursor:
+        for row in uCursor:
+            scanned += 1
+            value = row[0] if stored is None or row[0] is None else stored(row[0])
+            if value in delete_set:
+                uCursor.deleteRow()
+                deleted[value] += 1
+    Record_Rows(read=scanned, written=sum(deleted.values()))
+    for value, count in deleted.iteritems():
+        arcpy.AddMessage("Deleting the following from {}...........................{} ({} deleted)".format(FC,delete_set[value],count))
+        print "Deleting the following from {}...........................{} ({} deleted)".format(FC,delete_set[value],count)
+
+
+class Edit_Checkpoint(object):
+    '''
+    Progress checkpoint for a sync that is saved in chunks (Update_Fields_Chunked).  The figures of every saved chunk are
+    written to a small json file in the Budding_GDB_Checkpoints folder in the arcpy scratch folder.  The file name is a
+    hash of the job (source, target, key fields and fields), so running the same job again after a failure picks up the
+    checkpoint and skips the figures that were already saved.  The file is deleted when the job finishes.
+
+    Required input:
+        Dictionary that describes the job.  Jobs with the same dictionary share a checkpoint.
+    Optional input:
+        Stamp of the source (i.e. Table_Stamp).  A checkpoint saved with a different stamp is dropped with a warning, so
+        the figures are all checked again when the source changed since the failed run.
+
+    *Note*
+    Without a stamp the figures that were saved before the failure are not checked again on the resumed run.
+    '''
+    def __init__(self, job, stamp=None):
+        self.job = job
+        self.stamp = stamp
+        self.job_id = hashlib.md5(json.dumps(job, sort_keys=True, default=unicode)).hexdigest()
+        scratch = getattr(arcpy.env, 'scratchFolder', None) or tempfile.gettempdir()
+        self.path = os.path.join(scratch, 'Budding_GDB_Checkpoints', "{}.checkpoint.json".format(self.job_id))
+        self.saved = set()
+        for path in (self.path, self.path + ".tmp"):
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    checkpoint = json.load(f)
+                if stamp is not None and checkpoint.get('stamp') != stamp:
+                    print "The source changed since the checkpoint {} was saved.  Every figure is checked again.".format(path)
+                    arcpy.AddWarning("The source changed since the checkpoint {} was saved.  Every figure is checked again.".format(path))
+                else:
+                    self.saved = set(checkpoint['figures'])
+                break
+
+    def remaining(self, figures):
+        #Figures that were not saved by an earlier run, in the same order.
+        return [figure for figure in figures if Figure_Key(figure) not in self.saved]
+
+    def commit(self, figures):
+        #Mark a saved chunk of figures.  The new file is written next to the old one first, so a failure never leaves half a
+        #checkpoint.
+        self.saved.update(Figure_Key(figure) for figure in figures)
+        folder = os.path.dirname(self.path)
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, 'wb') as f:
+            json.dump({'job': self.job, 'stamp': self.stamp, 'saved': datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 'figures': sorted(self.saved)},
+                      f, default=unicode)
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        os.rename(temp_path, self.path)
+
+    def finish(self):
+        for path in (self.path, self.path + ".tmp"):
+            if os.path.exists(path):
+                os.remove(path)
+        self.saved = set()
 
 
 def Extract_Field_Name(fc):
     '''
     Return a list of fields name from a FC.
     '''
-    fields = [f.name for f in arcpy.ListFields(fc)]
+    fields = [f.name for f in List_Fields(fc)]
     return fields
 
 
 #Extract field name and type
 def Extract_Field_NameType(fc):
     field_info=[]
-    for field in arcpy.ListFields(fc):
+    for field in List_Fields(fc):
         if field.name == 'Shape' or field.name == 'Shape_Length' or field.name == 'OBJECTID' or field.name == 'RID':
             pass
         else:
@@ -195,19 +1338,6 @@ def Extract_Field_NameType(fc):
     return field_info
 
 
-#Load a .csv file and that is convereted into a list of tuples
-def Extract_File_Records(filename, tuple_list=''):
-    fp = open(filename, 'Ur')
-    data_list = []
-    for line in fp:#reader:
-        if not tuple_list:
-            data_list.append(tuple(line.strip().split(',')))
-        else:
-            data_list.append(line.strip().split(','))
-    fp.close()
-    return data_list
-
-
 def extract_list_columns(input_list,index_list, tuple_list=''):
     my_items = operator.itemgetter(*index_list)
     new_list = [my_items(x) for x in input_list]
@@ -221,20 +1351,34 @@ def extract_list_columns(input_list,index_list, tuple_list=''):
 #Load a ArcMap table and that is convereted into a list of tuples
 def Extract_Table_Records(fc, fields=''):
     if fields: # User has provided a list of fields for extraction
-        records=[]
-        with arcpy.da.SearchCursor(fc, fields) as cursor:
-            for row in cursor:
-                records.append(row)
+        records = list(Read_Rows(fc, fields))
+        Record_Rows(read=len(records))
         return records
     else: #User has not provided a list. Will default to all fields.
         fields = Remove_DBMS_Specific_Fields(fc)
-        records=[]
-        with arcpy.da.SearchCursor(fc, fields) as cursor:
-            for row in cursor:
-                records.append(row)
+        records = list(Read_Rows(fc, fields))
+        Record_Rows(read=len(records))
         return records
 
 
+def Extract_Table_Columns(fc, fields, field_types=None):
+    '''
+    Columnar version of Extract_Table_Records.  Returns a list of numpy columns, one per field (see Records_To_Columns).
+
+    Required input:
+        Path to Table or Feature Class
+        List of fields ('OID@' is accepted)
+    Optional input:
+        List of field types.  Read from the table when not provided.
+    '''
+    if field_types is None:
+        types = dict((f.name.upper(), f.type) for f in List_Fields(fc))
+        field_types = ['OID' if field == 'OID@' else types[field.upper()] for field in fields]
+    columns = Records_To_Columns(Read_Rows(fc, fields), field_types)
+    Record_Rows(read=len(columns[0]) if columns else 0)
+    return columns
+
+
 def Extract_input_fields_from_csv(selection_fields, ParentField, header):
     input_fields = list()
     field_selection = selection_fields.split(";")
@@ -270,6 +1414,58 @@ def FC_Exist(FCname, DatasetPath, Template):
         return arcpy.CreateFeatureclass_management(DatasetPath, FCname, FCtype, Template, "SAME_AS_TEMPLATE", "SAME_AS_TEMPLATE", Template)
 
 
+#Smallest and largest value each numeric field type can store.  Validate_File_Records reports the values outside the range.
+Field_Value_Ranges = {'SmallInteger': (-32768, 32767),
+                      'Integer': (-2147483648, 2147483647),
+                      'Single': (-3.4028235e38, 3.4028235e38)}
+
+
+def Field_Value_Converter(field_type):
+    '''
+    Return a function that converts a text value from a .csv file to the python type that ArcGIS expects for
+    the field type (i.e. the field type returned from get_Data_Type_FromGIS).  Empty values are converted to None and
+    Single values are rounded to single precision (Single_Value).  A ValueError is raised when a value can not be converted.
+    '''
+    if field_type in ('Integer', 'SmallInteger', 'OID'):
+        def convert(value):
+            if value == '':
+                return None
+            try:
+                return int(value)
+            except ValueError:
+                number = float(value)
+                if not number.is_integer():
+                    raise ValueError("{} is not a whole number".format(value))
+                return int(number)
+    elif field_type == 'Double':
+        def convert(value):
+            return float(value) if value != '' else None
+    elif field_type == 'Single':
+        def convert(value):
+            return Single_Value(float(value)) if value != '' else None
+    elif field_type == 'Date':
+        date_formats = ('%m/%d/%Y', '%m/%d/%Y %H:%M:%S', '%m/%d/%Y %I:%M:%S %p', '%m/%d/%Y %H:%M',
+                        '%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M:%S.%f', '%Y/%m/%d')
+        def convert(value):
+            if value == '':
+                return None
+            for date_format in date_formats:
+                try:
+                    return datetime.strptime(value.strip(), date_format)
+                except ValueError:
+                    pass
+            raise ValueError("{} is not a recognized date".format(value))
+    else:
+        def convert(value):
+            if value == '':
+                return None
+            try:
+                return value.decode('utf-8')
+            except UnicodeDecodeError:
+                return value.decode('cp1252')
+    return convert
+
+
 def FieldExist(FC,field_to_check):
     fields = [field.name for field in arcpy.ListFields(FC)]
     if field_to_check in fields:
@@ -277,42 +1473,501 @@ def FieldExist(FC,field_to_check):
     else:
       return False
 
-def Find_New_Features(Layer_To_Checkp, Initial_Checkp, Intermediate_Checkp, Final_Check, clause, in_count):
-    #Make Feature Layer output names for all FC of interest and then run make feature layer tool
-    Layer_To_Check = arcpy.Describe(Layer_To_Checkp).name+"_layer"
-    Initial_Check = arcpy.Describe(Initial_Checkp).name +"_layer"
-    Intermediate_Check = arcpy.Describe(Intermediate_Checkp).name +"_layer"
-
-    Create_FL(Layer_To_Check, Layer_To_Checkp, clause)
-    Create_FL(Initial_Check, Initial_Checkp, clause)
-    Create_FL(Intermediate_Check, Intermediate_Checkp, clause)
-
-    #Select all features in the in bucket layer and append to temporary point check FC
-    arcpy.SelectLayerByLocation_management(Initial_Check, "INTERSECT", Initial_Check, "", "NEW_SELECTION")
-    arcpy.Append_management(Initial_Check, Intermediate_Check,"NO_TEST","","")
-    #Select all samples in the Report Sample FC
-    arcpy.SelectLayerByLocation_management(Layer_To_Check, "INTERSECT", Layer_To_Check, "", "NEW_SELECTION")
-    #Select Features from Bucket FC that intersect the Report Sample FC and invert
-    arcpy.SelectLayerByLocation_management(Intermediate_Check, "INTERSECT", Layer_To_Check, "", "NEW_SELECTION")
-    arcpy.SelectLayerByLocation_management(Intermediate_Check, "INTERSECT", Intermediate_Check, "", "SWITCH_SELECTION")
-    arcpy.AddMessage("Selecting the new features that fall inside the figure")
-    print "Selecting the new features that fall inside the figure"
-    #Append selected features to Report Sample Location FC
-    arcpy.Append_management(Intermediate_Check, Final_Check,"NO_TEST","","")
-    out_count = int(arcpy.GetCount_management(Final_Check).getOutput(0))
-    print "Number of new features found in the figure: " + str(out_count - in_count)
-    arcpy.AddMessage("Number of new features found in the figure: " + str(out_count - in_count))
-    arcpy.AddMessage("Added the new features to " + Final_Check)
-    print "Added the new features to " + Final_Check
-    return out_count
-
-##    #Search for locations that are intersect existing points.
-##    FigureGeometryCheck(Layer_To_Checkp, Initial_Checkp, Final_Checkp,clause)
-
-    #Delete Feature Layers
-    arcpy.Delete_management(Intermediate_Check)
-    arcpy.Delete_management(Initial_Check)
-    arcpy.Delete_management(Layer_To_Check)
+
+def Feature_Fingerprint(geometry, values):
+    '''
+    Return an md5 hex digest of a feature's geometry (WKT) and attribute values.
+    '''
+    digest = hashlib.md5(repr(tuple(values)))
+    if geometry is not None:
+        digest.update(geometry.WKT)
+    return digest.hexdigest()
+
+
+def Figure_Fingerprints(paths, key_field, figures, attributes=False):
+    '''
+    Return a dictionary with the figure name as the key and a fingerprint of the figure's polygons as the value.  The
+    polygons from every path (i.e. figure extent and secondary boundary) tied to the figure are included.  When
+    attributes is True the attribute values and the fields (name, type and length) of each path are included as well,
+    for results that carry the figure attributes (i.e. the Add New Geometry spatial join).
+    '''
+    figures = set(Figure_Key(figure) for figure in figures)
+    shapes = dict((figure, []) for figure in figures)
+    for path in paths:
+        if not attributes:
+            for oid, figure, geometry in Read_Geometry_Rows(path, key_field, figures):
+                shapes[figure].append(os.path.basename(path) + geometry.WKT)
+            continue
+        fields = [f for f in arcpy.ListFields(path) if f.type not in ('OID', 'Geometry', 'GlobalID', 'Raster', 'Blob')
+                  and f.name.upper() not in ('SHAPE_LENGTH', 'SHAPE_AREA')]
+        schema = repr([(f.name, f.type, f.length) for f in fields])
+        for figure in figures:
+            shapes[figure].append(os.path.basename(path) + schema)
+        read = 0
+        with arcpy.da.SearchCursor(path, [key_field, "SHAPE@"] + [f.name for f in fields]) as cursor:
+            for row in cursor:
+                read += 1
+                figure = Figure_Key(row[0])
+                if row[1] is not None and figure in figures:
+                    shapes[figure].append(os.path.basename(path) + Feature_Fingerprint(row[1], row[2:]))
+        Record_Rows(read=read)
+    return dict((figure, hashlib.md5("".join(sorted(wkt))).hexdigest()) for figure, wkt in shapes.iteritems())
+
+
+@contextmanager
+def Figure_Extent_Pushdown(LayerName, figure_path):
+    '''
+    Spatial pushdown for a spatial join against the selected figures.  Within the with block the geoprocessing extent
+    (arcpy.env.extent) is set to the envelope of the figures and the layer only has the features that intersect a
+    figure selected, so the join only reads and writes candidate features rather than the whole feature class.
+
+    Required input:
+        Feature layer to filter (e.g. a layer of the Parent FC)
+        Path to the selected figures
+
+    Yields the number of candidate features.  The geoprocessing extent is put back when the block ends.
+
+    *Note*
+    When no feature intersects a figure the layer is replaced with an empty layer of the same name.
+    '''
+    envelope = None
+    with arcpy.da.SearchCursor(figure_path, ["SHAPE@"]) as cursor:
+        for row in cursor:
+            if row[0] is None:
+                continue
+            extent = Geometry_Extent(row[0])
+            envelope = extent if envelope is None else (min(envelope[0], extent[0]), min(envelope[1], extent[1]),
+                                                        max(envelope[2], extent[2]), max(envelope[3], extent[3]))
+    saved = arcpy.env.extent
+    if envelope is not None:
+        arcpy.env.extent = arcpy.Extent(*envelope)
+    try:
+        arcpy.SelectLayerByLocation_management(LayerName, "INTERSECT", figure_path, "", "NEW_SELECTION")
+        count = int(arcpy.GetCount_management(LayerName).getOutput(0))
+        if count == 0:
+            #Tools treat an empty selection as every feature, so the layer is swapped for one with no features.
+            Create_FL_From_OIDs(LayerName, arcpy.Describe(LayerName).catalogPath, [])
+        yield count
+    finally:
+        arcpy.env.extent = saved
+
+
+def Select_Figures(figure_extent_path, key_field, figures, output_path, cache=None, figure_hash=None):
+    '''
+    Copy the selected figures from the Figure Extent FC to a standalone feature class (the Add New Geometry figure
+    selection).  The figure list is compiled in to as few clauses as possible (usually one).
+
+    Required input:
+        Path to the Figure Extent FC
+        Figure key field
+        List of figures
+        Path to the output feature class
+    Optional input:
+        Join_Cache and the hash of the selected figures (Figure_Fingerprints with attributes).  A cached selection is
+        reused, otherwise the selection is written straight in to the cache.
+
+    Returns the path to the figure selection (the cached feature class when a cache is passed in).
+    '''
+    if cache is not None:
+        key = Join_Cache.key("Figure Selection", figure_hash)
+        cached = cache.get(key)
+        if cached is not None:
+            _Message("Reusing the figure selection from an earlier run: {}".format(cached))
+            return cached
+        output_path = cache.output_path(key)
+    layer = os.path.basename(figure_extent_path) + "_Layer"
+    Create_FL(layer, figure_extent_path, "")
+    for clause in buildWhereClause_Set(layer, key_field, figures):
+        arcpy.SelectLayerByAttribute_management(layer, "ADD_TO_SELECTION", clause)
+    arcpy.CopyFeatures_management(layer, output_path)
+    arcpy.Delete_management(layer)
+    _Message("Successfully created the Features Class, {}, which contains the figures to be updated.".format(os.path.basename(output_path)))
+    if cache is not None:
+        output_path = cache.put(key, output_path)
+    return output_path
+
+
+def Spatial_Join_Figures(LayerName, figure_path, output_path, cache=None, figure_hash=None):
+    '''
+    Part 1 spatial join of Add New Geometry.  The features of a layer that intersect the selected figures are joined to
+    the figures (JOIN_ONE_TO_MANY).  Only the candidate features are read and written (Figure_Extent_Pushdown).  The layer
+    is deleted when the join is done.
+
+    Required input:
+        Feature layer to join (i.e. a layer of the Parent FC)
+        Path to the selected figures
+        Path to the join output
+    Optional input:
+        Join_Cache and the hash of the selected figures (Figure_Fingerprints with attributes).  The join is keyed on the
+        candidate features (Layer_Fingerprint of the layer selection) and the figure hash, so edits to Parent features
+        outside the figures do not throw the cached join away.  A cached join is reused, otherwise the join is written
+        straight in to the cache.
+
+    Returns the path to the join output (the cached feature class when a cache is passed in).
+    '''
+    try:
+        with Figure_Extent_Pushdown(LayerName, figure_path) as candidate_count:
+            _Message("{} feature(s) in {} fall within the extent of the selected figures".format(candidate_count, LayerName))
+            if cache is not None:
+                key = Join_Cache.key("Spatial Join", Layer_Fingerprint(LayerName), figure_hash)
+                cached = cache.get(key)
+                if cached is not None:
+                    _Message("Reusing the spatial join from an earlier run: {}".format(cached))
+                    return cached
+                output_path = cache.output_path(key)
+            arcpy.SpatialJoin_analysis(LayerName, figure_path, output_path, "JOIN_ONE_TO_MANY", "KEEP_ALL", "", "INTERSECT", "", "")
+        if cache is not None:
+            output_path = cache.put(key, output_path)
+        return output_path
+    finally:
+        arcpy.Delete_management(LayerName)
+
+
+def Figure_Membership(features, polygon_index):
+    '''
+    Return a dictionary with the feature id as the key and the set of figures the feature falls inside as the value.
+    Every feature is checked once against a Spatial_Index of figure extent or secondary boundary polygons.
+
+    Required input:
+        Iterable of feature rows - (Feature ID, Figure Name, Geometry)
+        Spatial_Index built from (Figure Name, Geometry) polygon rows
+
+    *Note*
+    When a feature row already carries a figure name (i.e. it came out of the Part 1 spatial join), only polygons
+    of that figure are tested.  Pass None as the figure name to test the feature against every figure.
+    '''
+    membership = dict()
+    for fid, figure, geometry in features:
+        figure = Figure_Key(figure) if figure is not None else None
+        inside = set()
+        for poly_figure, polygon in polygon_index.query(Geometry_Extent(geometry)):
+            if poly_figure in inside or (figure is not None and poly_figure != figure):
+                continue
+            if not polygon.disjoint(geometry):
+                inside.add(poly_figure)
+        membership[fid] = inside
+    return membership
+
+
+def Figure_Key(value):
+    '''
+    Normalize a figure name so figure names typed in by the user match the values stored in the key field.
+    Whole number floats and integers are compared by their text value.
+    '''
+    if isinstance(value, basestring):
+        return value.strip().strip("'")
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return unicode(value)
+
+
+def Fan_Out_Sync(snapshot, jobs, workers=1):
+    '''
+    Sync many child report feature classes from one Master_Snapshot.  The parent is only read once (when the snapshot
+    is made) and every child is updated from the snapshot by Sync_Child.  Children are synced by a pool of at most
+    workers processes, and each worker gets its own copy of the snapshot when it starts.  Children in the same
+    geodatabase are synced one after another by the same worker, since a file geodatabase can only be edited by
+    one process at a time.
+
+    Required input:
+        Master_Snapshot
+        List of child jobs (i.e. from Read_Sync_Manifest)
+    Optional input:
+        Number of worker processes.  1 syncs the children in this process, 0 uses one worker per CPU.
+
+    Returns a list of (child, {field: records updated}, change log path, error message) in manifest order.
+    '''
+    groups = []
+    group_index = dict()
+    for job in jobs:
+        workspace = get_geodatabase_path(InputCheck(job['Child'])[0]).lower()
+        if workspace not in group_index:
+            group_index[workspace] = len(groups)
+            groups.append([])
+        groups[group_index[workspace]].append(job)
+    if workers <= 0:
+        workers = multiprocessing.cpu_count()
+    workers = min(workers, len(groups))
+    print "Syncing {} child feature class(es) in {} geodatabase(s) with {} worker(s)".format(len(jobs), len(groups), workers)
+    arcpy.AddMessage("Syncing {} child feature class(es) in {} geodatabase(s) with {} worker(s)".format(len(jobs), len(groups), workers))
+
+    if workers <= 1:
+        results = [Sync_Child_Group(snapshot, group) for group in groups]
+    else:
+        with Worker_Pool(workers, _Fan_Out_Init, (snapshot,)) as pool:
+            results = pool.map(_Fan_Out_Worker, groups, 1)
+    by_child = dict((result[0], result) for group_results in results for result in group_results)
+    return [by_child[job['Child']] for job in jobs]
+
+
+_FAN_OUT_SNAPSHOT = None
+
+def _Fan_Out_Init(snapshot):
+    global _FAN_OUT_SNAPSHOT
+    _FAN_OUT_SNAPSHOT = snapshot
+
+
+def _Fan_Out_Worker(group):
+    return Sync_Child_Group(_FAN_OUT_SNAPSHOT, group)
+
+
+def Figure_Partitions(figures, partition_count):
+    '''
+    Split a list of figures in to at most partition_count lists.  Figures are dealt out round-robin so large and
+    small figures are spread across the partitions.
+    '''
+    partition_count = max(1, min(partition_count, len(figures)))
+    return [figures[i::partition_count] for i in xrange(partition_count)]
+
+
+def Find_New_Feature_Sets(candidates, existing_index):
+    '''
+    Return a dictionary with the figure name as the key and the list of new feature ids as the value.
+    A candidate is new when it does not intersect any existing feature tied to the same figure.  All figures
+    are worked out in one pass over the candidates.
+
+    Required input:
+        Iterable of candidate rows - (Feature ID, Figure Name, Geometry)
+        Spatial_Index built from the (Figure Name, Geometry) rows of the report feature class
+    '''
+    new_features = dict()
+    for fid, figure, geometry in candidates:
+        figure = Figure_Key(figure)
+        new_features.setdefault(figure, [])
+        for existing_figure, existing in existing_index.query(Geometry_Extent(geometry)):
+            if existing_figure == figure and not existing.disjoint(geometry):
+                break
+        else:
+            new_features[figure].append(fid)
+    return new_features
+
+
+def Find_New_Feature_Fingerprints(candidates, existing, tolerance=0.001):
+    '''
+    Unique ID version of Find_New_Feature_Sets.  The candidates of each figure are anti-joined against the report
+    features tied to the same figure on the unique ID with hash sets, so a feature whose geometry was edited in the
+    report is not found as new again.  Unlike the intersect check, a feature that is stacked on top of a different
+    feature that is already in the figure is found as new.  The geometry (snapped to a grid, Geometry_Fingerprint) is
+    only used to count the new features that are stacked on top of a report feature with a different unique ID, and to
+    match the features that have no unique ID.
+
+    Required input:
+        Iterable of candidate rows - (Feature ID, Figure Name, Geometry, Unique ID)
+        Iterable of report feature rows - (Feature ID, Figure Name, Geometry, Unique ID)
+    Optional input:
+        Grid size (map units) the geometry is snapped to
+
+    Returns a tuple of dictionaries with the figure name as the key: the list of new feature ids and the number of
+    new features that are stacked on top of a report feature with a different unique ID.
+    '''
+    def match_key(figure, unique_id, shape):
+        #Features without a unique ID can only be matched on the geometry.
+        return (figure, unique_id) if unique_id is not None else (figure, None, shape)
+
+    matches = dict()
+    locations = dict()
+    for fid, figure, geometry, unique_id in existing:
+        figure = Figure_Key(figure)
+        shape = Geometry_Fingerprint(geometry, tolerance)
+        key = match_key(figure, unique_id, shape)
+        matches[key] = matches.get(key, 0) + 1
+        locations.setdefault((figure, shape), set()).add(unique_id)
+    new_features = dict()
+    stacked = dict()
+    for fid, figure, geometry, unique_id in candidates:
+        figure = Figure_Key(figure)
+        new_features.setdefault(figure, [])
+        stacked.setdefault(figure, 0)
+        shape = Geometry_Fingerprint(geometry, tolerance)
+        key = match_key(figure, unique_id, shape)
+        #Each report feature matches one candidate, so duplicates in the candidates are still found.
+        if matches.get(key, 0) > 0:
+            matches[key] -= 1
+            continue
+        new_features[figure].append(fid)
+        if locations.get((figure, shape), set()) - set([unique_id]):
+            stacked[figure] += 1
+    return new_features, stacked
+
+
+def Find_New_Features_Indexed(Layer_To_Checkp, Initial_Checkp, Final_Checkp, key_field, figures, id_field=None, tolerance=0.001):
+    '''
+    Find the new features of every figure without a SelectLayerByLocation per figure.  The report feature class and the
+    candidate features are each read once, and the new features for every figure are appended to the final
+    output feature class in one cursor pass.
+
+    Required input:
+        Path to the report feature class
+        Path to the candidate feature class (secondary boundary selection)
+        Path to the final output feature class
+        Figure key field
+        List of figures to check
+    Optional input:
+        Unique ID field.  When one is passed in, the new features are found with Find_New_Feature_Fingerprints instead
+        of the intersect check, so stacked features are found as well.
+        Fingerprint grid size (map units)
+
+    Returns a dictionary with the figure name as the key and the number of new features as the value.
+    '''
+    figures = set(Figure_Key(figure) for figure in figures)
+    if id_field:
+        existing = Read_Geometry_Rows(Layer_To_Checkp, key_field, figures, id_field=id_field)
+        candidates = Read_Geometry_Rows(Initial_Checkp, key_field, figures, id_field=id_field)
+        new_features, stacked = Find_New_Feature_Fingerprints(candidates, existing, tolerance)
+        Stacked_Feature_Messages(stacked)
+    else:
+        existing = [(row[1], row[2]) for row in Read_Geometry_Rows(Layer_To_Checkp, key_field, figures)]
+        candidates = Read_Geometry_Rows(Initial_Checkp, key_field, figures)
+        new_features = Find_New_Feature_Sets(candidates, Spatial_Index(existing))
+    Copy_Features_By_OID(Initial_Checkp, Final_Checkp, [fid for fids in new_features.values() for fid in fids])
+    span = Current_Span()
+    if span is not None:
+        for figure in sorted(new_features):
+            span.record(figure, 'figure', rows_written=len(new_features[figure]))
+    return dict((figure, len(fids)) for figure, fids in new_features.iteritems())
+
+
+_METRIC_SPANS = []
+
+#Change logs and run metrics that have not been closed yet.  See Close_Open_Logs.
+_OPEN_LOGS = []
+
+class Master_Snapshot(object):
+    '''
+    Read-once snapshot of the keys and attributes of the parent (master) feature class.  Used by Fan_Out_Sync so a
+    site with many project geodatabases reads the parent once instead of once per project.  The snapshot is a plain
+    dictionary of row tuples keyed on the key field, so it can be handed to worker processes.
+
+    Required input:
+        Path to the parent Feature Class or Table
+        Parent key field
+        List of fields to keep.  Fields that are not in the parent are dropped.
+    '''
+    def __init__(self, Sourcepath, key_field, fields):
+        self.path, self.name = InputCheck(Sourcepath)
+        self.key_field = key_field
+        field_types = dict((f.name, f.type) for f in arcpy.ListFields(self.path))
+        if key_field not in field_types:
+            raise ValueError("The field {} does not exist in {}".format(key_field, self.name))
+        self.fields = []
+        for field in fields:
+            if field in field_types and field != key_field and field not in self.fields:
+                self.fields.append(field)
+        self.types = dict((field, field_types[field]) for field in [key_field] + self.fields)
+        self.rows = dict((row[0], row[1:]) for row in Read_Rows(self.path, [key_field] + self.fields))
+        Record_Rows(read=len(self.rows))
+        self._columns = dict()
+        print "Read {} record(s) and {} field(s) from {}".format(len(self.rows), len(self.fields), self.name)
+        arcpy.AddMessage("Read {} record(s) and {} field(s) from {}".format(len(self.rows), len(self.fields), self.name))
+
+    def source_rows(self, fields):
+        #Dictionary of row tuples for a subset of the snapshot fields, keyed on the key field.
+        index = [self.fields.index(field) for field in fields]
+        return dict((key, tuple(row[i] for i in index)) for key, row in self.rows.iteritems())
+
+    def source_columns(self, fields):
+        #Numpy columns (Records_To_Columns) of the key field and a subset of the snapshot fields.  The columns are built
+        #once per set of fields and kept, so the chunks of Update_Fields_Chunked share them.
+        fields = tuple(fields)
+        if fields not in self._columns:
+            index = [self.fields.index(field) for field in fields]
+            rows = ((key,) + tuple(row[i] for i in index) for key, row in self.rows.iteritems())
+            self._columns[fields] = Records_To_Columns(rows, [self.types[self.key_field]] + [self.types[field] for field in fields])
+        return self._columns[fields]
+
+
+class CSV_Snapshot(Master_Snapshot):
+    '''
+    Master_Snapshot of a .csv parent.  The .csv file is streamed once in to the keyed dictionary of row tuples and the
+    values are converted to the field types of the target as they are read (Single values rounded to single precision,
+    so they compare equal to the target values), so the parent is never written to a table in the scratch GDB.  Pass it
+    to Update_Fields as the snapshot.
+
+    Required input:
+        Path to the .csv file (Master)
+        Parent key field (column in the .csv file)
+        List of fields to keep.  Fields that are not columns in the .csv file or fields in the target are dropped.
+        Path to the target Feature Class or Table
+        Target key field.  The parent keys are converted to the type of this field.
+    '''
+    def __init__(self, csv_path, key_field, fields, target_path, target_key_field):
+        self.path = csv_path
+        self.name = os.path.basename(csv_path)
+        self.key_field = key_field
+        header = Space2Underscore(get_csv_headers(csv_path))
+        if key_field not in header:
+            raise ValueError("The field {} is not in {}".format(key_field, self.name))
+        field_types = dict((f.name, f.type) for f in arcpy.ListFields(target_path))
+        self.fields = []
+        for field in fields:
+            if field in header and field in field_types and field != key_field and field not in self.fields:
+                self.fields.append(field)
+        if not self.fields:
+            raise ValueError("None of the fields to update are in {}".format(self.name))
+        self.types = dict((field, field_types[field]) for field in self.fields)
+        self.types[key_field] = field_types.get(target_key_field)
+        field_info = [[field, self.types[field], None] for field in [key_field] + self.fields if self.types[field]]
+        self.rows = dict((row[0], row[1:]) for chunk in Stream_File_Records(csv_path, [key_field] + self.fields, field_info) for row in chunk)
+        self._columns = dict()
+        print "Read {} record(s) and {} field(s) from {}".format(len(self.rows), len(self.fields), self.name)
+        arcpy.AddMessage("Read {} record(s) and {} field(s) from {}".format(len(self.rows), len(self.fields), self.name))
+
+
+class Metric_Span(object):
+    '''
+    A timed section of a tool run.  Spans nest (run -> part -> figure -> field) and record the wall time, rows
+    read/written, rows/sec and peak memory.  Rows counted with Record_Rows are added to the innermost open span
+    and rolled up to the parent span when it is closed.
+
+    Figures and fields that are worked out in a single pass are added with record(); they carry row counts but
+    no wall time of their own.
+    '''
+    def __init__(self, name, kind, parent=None):
+        self.name = name
+        self.kind = kind
+        self.parent = parent
+        self.children = []
+        self.rows_read = 0
+        self.rows_written = 0
+        self.startTime = datetime.now()
+        self.wall_seconds = None
+        self.peak_memory = None
+
+    def path(self):
+        names = []
+        span = self
+        while span is not None:
+            names.append(unicode(span.name))
+            span = span.parent
+        return " / ".join(reversed(names))
+
+    def record(self, name, kind, rows_read=0, rows_written=0):
+        child = Metric_Span(name, kind, self)
+        child.rows_read = rows_read
+        child.rows_written = rows_written
+        self.children.append(child)
+        return child
+
+    def close(self):
+        self.wall_seconds = (datetime.now() - self.startTime).total_seconds()
+        self.peak_memory = Peak_Memory()
+        if self.parent is not None:
+            self.parent.rows_read += self.rows_read
+            self.parent.rows_written += self.rows_written
+
+    def as_dict(self):
+        rows = max(self.rows_read, self.rows_written)
+        return {'span': self.path(), 'name': unicode(self.name), 'kind': self.kind,
+                'start': self.startTime.isoformat(), 'wall_seconds': self.wall_seconds,
+                'rows_read': self.rows_read, 'rows_written': self.rows_written,
+                'rows_per_sec': int(rows / self.wall_seconds) if self.wall_seconds else None,
+                'peak_memory_bytes': self.peak_memory}
+
+    def walk(self):
+        yield self
+        for child in self.children:
+            for span in child.walk():
+                yield span
 
 
 def make_unicode(input):
@@ -420,6 +2075,24 @@ def get_geodatabase_path(input_table):
     return os.path.dirname(workspace)
 
 
+def Geometry_Fingerprint(geometry, tolerance=0.001):
+    '''
+    Return a hashable fingerprint of a geometry: the number of points and the extent snapped to a grid of tolerance map
+    units.  Two copies of the same feature have the same fingerprint even when the coordinates picked up floating point
+    noise on the way through a spatial join or copy.
+    '''
+    extent = geometry.extent
+    return (geometry.pointCount,) + tuple(int(math.floor(value / tolerance + 0.5)) for value in (extent.XMin, extent.YMin, extent.XMax, extent.YMax))
+
+
+def Geometry_Extent(geometry):
+    '''
+    Return the extent of a geometry as a (XMin, YMin, XMax, YMax) tuple.
+    '''
+    extent = geometry.extent
+    return (extent.XMin, extent.YMin, extent.XMax, extent.YMax)
+
+
 #Check if there is a filepath from the input layers. If not, pre-pend the path. Also extract the FC names.
 def InputCheck(Input_Layer):
     if arcpy.Exists(Input_Layer):
@@ -431,18 +2104,317 @@ def InputCheck(Input_Layer):
     return InputPath, InputName
 
 
+class Join_Cache(object):
+    '''
+    Content addressed cache of geoprocessing results (i.e. the Add New Geometry figure selection and Part 1 spatial join) in
+    the scratch GDB.  Each result is stored as a feature class named <name>_Cache_<key> and listed (by name) in the
+    <name>_JoinCache table with the time it was created and last used.  The key is a hash of the inputs (Join_Cache.key), so
+    a result is only reused when none of its inputs changed.
+
+    Required input:
+        Path to the scratch GDB
+        Name used for the index table and the cached feature classes (i.e. the scratch feature dataset name)
+    Optional input:
+        Number of results to keep.  The least recently used results are deleted first.
+        Number of days a result is kept after it was created.
+
+    Usage:
+        cache = Join_Cache(scratch_gdb, Scratch_FD)
+        key = Join_Cache.key("Spatial Join", Layer_Fingerprint(Candidate_Layer), figure_hash)
+        path = cache.get(key)
+        if path is None:
+            path = cache.output_path(key)
+            ...                     #Write the result straight to path
+            path = cache.put(key, path)
+    '''
+    def __init__(self, scratch_gdb, name, max_entries=5, max_age_days=30):
+        self.scratch_gdb = scratch_gdb
+        self.name = name
+        self.index_table = os.path.join(scratch_gdb, name + "_JoinCache")
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        #Results (names) handed out by this cache are never evicted by it, since the run may still be using them.
+        self.in_use = set()
+
+    @staticmethod
+    def key(*parts):
+        #Hash of the inputs of a result.  Parts can be any json friendly values (dictionaries are hashed with sorted keys).
+        return hashlib.md5(json.dumps(parts, sort_keys=True, default=unicode)).hexdigest()
+
+    def _create_table(self):
+        if arcpy.Exists(self.index_table):
+            return
+        arcpy.CreateTable_management(*os.path.split(self.index_table))
+        for field_name, field_type, field_length in (("Cache_Key", "TEXT", 32), ("Output", "TEXT", 255), ("Created", "DATE", None),
+                                                     ("Last_Used", "DATE", None)):
+            arcpy.AddField_management(self.index_table, field_name, field_type, field_length=field_length)
+
+    def output_path(self, key):
+        #Path to the feature class that holds the result for a key.  Write a new result here to save put() a copy.
+        return os.path.join(self.scratch_gdb, "{}_Cache_{}".format(self.name, key[:12]))
+
+    def get(self, key):
+        '''
+        Return the path to the cached result for a key, or None when there is no result for the key.
+        '''
+        self._create_table()
+        path = None
+        clause = "{} = '{}'".format(arcpy.AddFieldDelimiters(self.index_table, "Cache_Key"), key)
+        with arcpy.da.UpdateCursor(self.index_table, ["Output", "Last_Used"], clause) as cursor:
+            for row in cursor:
+                if path is None and arcpy.Exists(os.path.join(self.scratch_gdb, row[0])):
+                    path = os.path.join(self.scratch_gdb, row[0])
+                    self.in_use.add(os.path.basename(path))
+                    cursor.updateRow([row[0], datetime.now()])
+                else:
+                    cursor.deleteRow()
+        return path
+
+    def put(self, key, path):
+        '''
+        Add a result to the cache and evict old results.  A result that is not already at output_path(key) is copied
+        there.  Returns the path to the cached result.
+        '''
+        self._create_table()
+        output = self.output_path(key)
+        if os.path.normcase(path) != os.path.normcase(output):
+            arcpy.CopyFeatures_management(path, output)
+        now = datetime.now()
+        #Only the feature class name is kept, so a long scratch GDB path always fits in the Output field.
+        with arcpy.da.InsertCursor(self.index_table, ["Cache_Key", "Output", "Created", "Last_Used"]) as cursor:
+            cursor.insertRow([key, os.path.basename(output), now, now])
+        self.in_use.add(os.path.basename(output))
+        self.evict()
+        return output
+
+    def evict(self):
+        #Delete results older than max_age_days and the least recently used results past max_entries, except the results in use.
+        entries = []
+        with arcpy.da.SearchCursor(self.index_table, ["Cache_Key", "Output", "Created", "Last_Used"]) as cursor:
+            for row in cursor:
+                entries.append(row)
+        entries.sort(key=lambda row: row[3], reverse=True)
+        keep = set(self.in_use)
+        for key, output, created, last_used in entries:
+            if len(keep) < self.max_entries and (datetime.now() - created).days < self.max_age_days:
+                keep.add(output)
+        evicted = 0
+        with arcpy.da.UpdateCursor(self.index_table, ["Output"]) as cursor:
+            for row in cursor:
+                if row[0] not in keep:
+                    cursor.deleteRow()
+        for key, output, created, last_used in entries:
+            if output not in keep and arcpy.Exists(os.path.join(self.scratch_gdb, output)):
+                arcpy.Delete_management(os.path.join(self.scratch_gdb, output))
+                evicted += 1
+        if evicted:
+            print "Removed {} old result(s) from the cache".format(evicted)
+            arcpy.AddMessage("Removed {} old result(s) from the cache".format(evicted))
+
+
+def Layer_Fingerprint(fc):
+    '''
+    Return an md5 hex digest of every feature in a feature class or layer (ObjectID, geometry and attributes), for
+    Join_Cache keys.  Only the selected features of a layer are read.
+    '''
+    skip_types = ('OID', 'Geometry', 'GlobalID', 'Raster', 'Blob')
+    fields = [f.name for f in arcpy.ListFields(fc) if f.type not in skip_types and f.name.upper() not in ('SHAPE_LENGTH', 'SHAPE_AREA')]
+    digest = hashlib.md5(repr(fields))
+    count = 0
+    with arcpy.da.SearchCursor(fc, ["OID@", "SHAPE@"] + fields) as cursor:
+        for row in cursor:
+            count += 1
+            digest.update("{}:{};".format(row[0], Feature_Fingerprint(row[1], row[2:])))
+    Record_Rows(read=count)
+    return digest.hexdigest()
+
+
 #Pull out records and make lists. Final List that is returned to variable
+def List_Fields(fc):
+    '''
+    Return the field objects of a table or FC (name, type, length, etc.) like arcpy.ListFields.  The fields are read with
+    fgdb_reader when the 'fgdb' read backend is on and the table is in a File Geodatabase.
+    '''
+    table = Open_FileGDB_Table(fc)
+    if table is None:
+        return arcpy.ListFields(fc)
+    with table:
+        return list(table.fields)
+
+
+def Open_FileGDB_Table(fc):
+    '''
+    Return an fgdb_reader.FileGDB_Table for a File Geodatabase table or FC path when the 'fgdb' read backend is on.
+    Returns None for anything the reader can not open (layers, other workspaces, unsupported tables) so the caller
+    falls back to arcpy.
+
+    *Note*
+    The reader only sees saved data.  Edits pending in an open edit session are not visible to it.
+    '''
+    if Read_Backend != 'fgdb' or not isinstance(fc, basestring) or fgdb_reader.Split_GDB_Path(fc) is None:
+        return None
+    try:
+        return fgdb_reader.Open_Table(fc)
+    except (fgdb_reader.FileGDB_Error, IOError, OSError):
+        return None
+
+
 def ListRecords(fc,fields):
-    records=[]
-    with arcpy.da.SearchCursor(fc,fields) as cursor:
-        for row in cursor:
-            records.append(row)
-        FigureHolder=[]
-        for FigureHolder in zip(*records):
-            FigureHolder
+    records=list(Read_Rows(fc,fields))
+    FigureHolder=[]
+    for FigureHolder in zip(*records):
+        FigureHolder
     return FigureHolder
 
 
+def Read_Geometry_Rows(fc, key_field, figures=None, clause='', id_field=None):
+    '''
+    Return a list of (ObjectID, Figure Name, Geometry) rows read with a single SearchCursor.  Optionally, a set of
+    figure names can be passed in to only keep the rows tied to those figures and a SQL clause to limit the rows read.
+    When a unique ID field is passed in, the rows are (ObjectID, Figure Name, Geometry, Unique ID).
+    '''
+    rows = []
+    read = 0
+    fields = ["OID@", key_field, "SHAPE@"] + ([id_field] if id_field else [])
+    with arcpy.da.SearchCursor(fc, fields, clause) as cursor:
+        for row in cursor:
+            read += 1
+            if row[2] is None:
+                continue
+            figure = Figure_Key(row[1])
+            if figures is None or figure in figures:
+                rows.append((row[0], figure) + tuple(row[2:]))
+    Record_Rows(read=read)
+    return rows
+
+
+def Read_Rows(fc, fields):
+    '''
+    Generator of row tuples for a list of fields, the same as an arcpy.da.SearchCursor.  The rows are read with fgdb_reader
+    when the 'fgdb' read backend is on and the table is in a File Geodatabase.
+    '''
+    table = Open_FileGDB_Table(fc)
+    if table is None:
+        with arcpy.da.SearchCursor(fc, fields) as cursor:
+            for row in cursor:
+                yield row
+    else:
+        with table:
+            for row in table.rows(fields):
+                yield row
+
+
+def Read_Sync_Manifest(manifest_path):
+    '''
+    Read the manifest for Fan_Out_Sync.  The manifest is a .csv file with one row per child report feature class:
+
+        Child               Path to the child report Feature Class (required)
+        Child_Key_Field     Key field in the child that matches the parent key field (required)
+        Fields              Fields to update, separated with a ; (required)
+        Figure_Extent       Path to the Figure Extent Feature Class
+        Figure_Key_Field    Figure key field in the Figure Extent and child
+        Figures             Figures to update, separated with a ;.  Leave blank to update all the figures.
+
+    When Figure_Extent is blank every row in the child is updated.  A child can only be listed once, since two workers
+    editing the same child at the same time would lock each other out.  Returns a list of dictionaries.
+    '''
+    required = ('Child', 'Child_Key_Field', 'Fields')
+    jobs = []
+    children = {}
+    with open(manifest_path, 'rb') as f:
+        reader = csv.DictReader(f)
+        missing = [column for column in required if column not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError("The manifest {} is missing the column(s): {}".format(manifest_path, ", ".join(missing)))
+        for line, row in enumerate(reader, 2):
+            job = dict((column, (row.get(column) or '').strip()) for column in required + ('Figure_Extent', 'Figure_Key_Field', 'Figures'))
+            if not job['Child']:
+                continue
+            if not job['Child_Key_Field'] or not job['Fields']:
+                raise ValueError("Line {} of the manifest {} needs a Child_Key_Field and Fields".format(line, manifest_path))
+            if job['Figure_Extent'] and not job['Figure_Key_Field']:
+                raise ValueError("Line {} of the manifest {} has a Figure_Extent but no Figure_Key_Field".format(line, manifest_path))
+            child = os.path.normcase(os.path.normpath(job['Child']))
+            if child in children:
+                raise ValueError("Line {} of the manifest {} repeats the Child {} from line {}".format(line, manifest_path, job['Child'], children[child]))
+            children[child] = line
+            job['Fields'] = convert_invalid_values(job['Fields'].split(";"))
+            jobs.append(job)
+    return jobs
+
+
+def Records_To_Columns(rows, field_types, chunk_size=50000):
+    '''
+    Convert an iterable of row tuples in to a list of numpy columns, one per field.  Only the numpy columns are kept, so
+    a million rows take a fraction of the memory of a list of tuples.
+
+        - Integer, SmallInteger and OID fields are int64 columns.  Nulls are stored as the smallest int64.
+        - Double and Single fields are float64 columns.  Nulls are stored as NaN.  Single values are rounded to single
+          precision first, so a .csv value and the value read back from a Single field compare equal.
+        - Date fields are datetime64 columns.  Nulls are stored as NaT.
+        - Everything else is a unicode column sized to the longest value.  Nulls are stored as u'\\uffff'.
+
+    Use Column_Value to get the python value back.  The rows are converted chunk_size rows at a time, so only one chunk
+    of python values is held at once.
+    '''
+    chunks = [[] for field_type in field_types]
+    rows = iter(rows)
+    while True:
+        block = list(itertools.islice(rows, chunk_size))
+        if not block and chunks[0]:
+            break
+        for field_type, column, values in itertools.izip(field_types, chunks, zip(*block) or [()] * len(field_types)):
+            column.append(_Numpy_Column(values, field_type))
+        del block
+        if len(chunks[0][-1]) < chunk_size:
+            break
+    return [column[0] if len(column) == 1 else np.concatenate(column) for column in chunks]
+
+
+def _Numpy_Column(values, field_type):
+    #One chunk of a Records_To_Columns column.
+    if field_type in ('SmallInteger', 'Integer', 'OID'):
+        return np.array([_INT_NULL if value is None else value for value in values], dtype=np.int64)
+    if field_type in ('Double', 'Single'):
+        #Adding 0.0 turns -0.0 in to 0.0 so the two compare equal.
+        column = np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+        if field_type == 'Single':
+            column = column.astype(np.float32).astype(np.float64)
+        return column + 0.0
+    if field_type == 'Date':
+        return np.array(values, dtype='datetime64[us]')
+    return np.array([_STR_NULL if value is None else unicode(value) for value in values], dtype=np.unicode_)
+
+
+def Record_Rows(read=0, written=0):
+    '''
+    Add to the rows read/written of the innermost open Metric_Span.  Does nothing when no Run_Metrics is open.
+    '''
+    if _METRIC_SPANS:
+        _METRIC_SPANS[-1].rows_read += read
+        _METRIC_SPANS[-1].rows_written += written
+
+
+def Current_Span():
+    '''
+    Return the innermost open Metric_Span or None when no Run_Metrics is open.
+    '''
+    return _METRIC_SPANS[-1] if _METRIC_SPANS else None
+
+
+def Peak_Memory():
+    '''
+    Return the peak memory in bytes.  Uses tracemalloc when it is tracing, otherwise the peak resident size of the
+    process when the resource module is available.  Returns None when neither is available (i.e. ArcMap on Windows).
+    '''
+    if tracemalloc is not None and tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[1]
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    return None
+
+
 # Replace a layer/table view name with a path to a dataset (which can be a layer file) or create the layer/table view within the script
 # The following inputs are layers or table views: "Report1_Sample_Locations"
 def RecordCount(fc):
@@ -452,7 +2424,7 @@ def RecordCount(fc):
 
 #Remove default fields
 def Remove_DBMS_Specific_Fields(fc):
-    fields = [f.name for f in arcpy.ListFields(fc)]
+    fields = [f.name for f in List_Fields(fc)]
     fields_to_remove = ['SHAPE_Area', 'SHAPE_Length', 'OBJECTID', 'GLOBALID', 'SHAPE', "RID"]
     for i,f in enumerate(fields):
         if f in fields_to_remove:
@@ -495,6 +2467,118 @@ def stop_edit_session(edit):
     edit.stopEditing(True)
     
 
+def Rows_Per_Second(row_count, startTime):
+    '''
+    Return the number of rows processed per second since startTime (a datetime).
+    '''
+    seconds = (datetime.now() - startTime).total_seconds()
+    return int(row_count / seconds) if seconds > 0 else row_count
+
+
+class Run_Metrics(object):
+    '''
+    Structured timing for a tool run.  Replaces the ad-hoc datetime.now() runtime prints.
+
+    Usage:
+        metrics = Run_Metrics("Add New Geometry")
+        metrics.start("Part 1")
+        ...
+        metrics.stop()          #Prints the Part runtime the same way the tools always have
+        metrics.close()         #Closes any open span and writes the JSON lines report
+
+    Every span is written as one line of JSON (span path, wall time, rows read/written, rows/sec and peak memory) to
+    <report folder>/<tool name>_<run id>.jsonl.  The report folder defaults to a Budding_GDB_Metrics folder in the
+    arcpy scratch folder.  Peak memory is traced with tracemalloc when it is available.
+    '''
+    def __init__(self, tool_name, report_folder=None, trace_memory=True):
+        self.tool_name = tool_name
+        self.run_id = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+        if not report_folder:
+            scratch = getattr(arcpy.env, 'scratchFolder', None) or tempfile.gettempdir()
+            report_folder = os.path.join(scratch, 'Budding_GDB_Metrics')
+        self.report_folder = report_folder
+        self.report_path = None
+        self._tracing = False
+        if trace_memory and tracemalloc is not None and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        self.run = Metric_Span(tool_name, 'run')
+        _METRIC_SPANS.append(self.run)
+        _OPEN_LOGS.append(self)
+
+    def start(self, name, kind='part'):
+        parent = _METRIC_SPANS[-1] if _METRIC_SPANS else self.run
+        span = Metric_Span(name, kind, parent)
+        parent.children.append(span)
+        _METRIC_SPANS.append(span)
+        return span
+
+    def stop(self):
+        span = _METRIC_SPANS.pop()
+        span.close()
+        if span.kind == 'part':
+            print "......................................................................{} Runtime: {} (Total Runtime: {})".format(span.name, datetime.now()-span.startTime, datetime.now()-self.run.startTime)
+            arcpy.AddMessage("......................................................................{} Runtime: {} (Total Runtime: {})".format(span.name, datetime.now()-span.startTime, datetime.now()-self.run.startTime))
+        return span
+
+    @contextmanager
+    def span(self, name, kind='part'):
+        span = self.start(name, kind)
+        try:
+            yield span
+        finally:
+            while span in _METRIC_SPANS:
+                self.stop()
+
+    def close(self):
+        if self in _OPEN_LOGS:
+            _OPEN_LOGS.remove(self)
+        if self.run not in _METRIC_SPANS:
+            return self.report_path
+        while _METRIC_SPANS[-1] is not self.run:
+            self.stop()
+        _METRIC_SPANS.pop()
+        self.run.close()
+        if self._tracing:
+            tracemalloc.stop()
+        print "Script Runtime: ", datetime.now()-self.run.startTime
+        arcpy.AddMessage("Script Runtime: " + str(datetime.now()-self.run.startTime))
+        try:
+            if not os.path.exists(self.report_folder):
+                os.makedirs(self.report_folder)
+            self.report_path = os.path.join(self.report_folder, "{}_{}.jsonl".format(self.tool_name.replace(' ', '_'), self.run_id))
+            with open(self.report_path, 'w') as report:
+                for span in self.run.walk():
+                    record = span.as_dict()
+                    record['run_id'] = self.run_id
+                    record['tool'] = self.tool_name
+                    report.write(json.dumps(record) + "\n")
+            arcpy.AddMessage("Run metrics saved to {}".format(self.report_path))
+        except (IOError, OSError) as e:
+            arcpy.AddWarning("Unable to save the run metrics report: {}".format(e))
+        return self.report_path
+
+
+def Close_Open_Logs():
+    '''
+    Close every Change_Log and Run_Metrics that is still open, newest first.  A tool that stops before its finally
+    block (or never had one) leaves them open, which keeps the change log thread and file and the tracemalloc trace
+    alive in a long running process such as the warm worker.  Returns the number of logs closed.
+    '''
+    closed = 0
+    while _OPEN_LOGS:
+        log = _OPEN_LOGS[-1]
+        try:
+            log.close()
+        except Exception, e:
+            arcpy.AddWarning("Unable to close {}: {}".format(type(log).__name__, e))
+        if _OPEN_LOGS and _OPEN_LOGS[-1] is log:
+            _OPEN_LOGS.pop()
+        closed += 1
+    del _METRIC_SPANS[:]
+    return closed
+
+
 def Select_and_Append(feature_selection_path, select_from_path, append_path, clause=''):
     Create_FL("Feature_Selection", feature_selection_path, clause)
     Create_FL("Select_From", select_from_path, clause)
@@ -509,6 +2593,350 @@ def Select_and_Append(feature_selection_path, select_from_path, append_path, cla
     arcpy.Delete_management("Select_From")
 
 
+def Select_and_Append_Indexed(feature_selection_path, select_from_path, append_path, key_field, figures):
+    '''
+    Indexed replacement for running Select_and_Append once per figure.  The selection polygons are loaded into a
+    Spatial_Index and every feature is given its figure membership in one pass.  Features that intersect a polygon
+    of their own figure are appended in one cursor pass.
+
+    Required input:
+        Path to the selection polygons (i.e. secondary boundary)
+        Path to the features to select from
+        Path to the feature class the selected features are appended to
+        Figure key field
+        List of figures to check
+
+    Returns a dictionary with the figure name as the key and the number of selected features as the value.
+    '''
+    figures = set(Figure_Key(figure) for figure in figures)
+    polygons = [(row[1], row[2]) for row in Read_Geometry_Rows(feature_selection_path, key_field, figures)]
+    features = Read_Geometry_Rows(select_from_path, key_field, figures)
+    membership = Figure_Membership(features, Spatial_Index(polygons))
+    counts = dict((figure, 0) for figure in figures)
+    selected = []
+    for fid, figure, geometry in features:
+        if membership[fid]:
+            selected.append(fid)
+            counts[figure] += 1
+    Copy_Features_By_OID(select_from_path, append_path, selected)
+    span = Current_Span()
+    if span is not None:
+        for figure in sorted(counts):
+            span.record(figure, 'figure', rows_written=counts[figure])
+
+    print "Selecting features from {} that intersect {} \nSelected features were appened to {}".format(os.path.basename(select_from_path),os.path.basename(feature_selection_path),os.path.basename(append_path))
+    arcpy.AddMessage("Selecting features from {} that intersect {} \nSelected features were appened to {}".format(os.path.basename(select_from_path),os.path.basename(feature_selection_path),os.path.basename(append_path)))
+    return counts
+
+
+def Select_and_Find_New_Features(feature_selection_path, select_from_path, report_path, key_field, figures, id_field=None, tolerance=0.001):
+    '''
+    Run Part 2 and Part 3 of Add New Geometry for a partition of figures without writing any intermediate feature
+    classes.  This is the worker for Select_and_Find_New_Features_Parallel, but it can be called on its own.
+
+    Required input:
+        Path to the selection polygons (i.e. secondary boundary)
+        Path to the features to select from (figure extent selection)
+        Path to the report feature class
+        Figure key field
+        List of figures in the partition
+    Optional input:
+        Unique ID field and fingerprint grid size.  See Find_New_Features_Indexed.
+
+    Returns a dictionary with:
+        selected - figure name: list of ObjectIDs (from select_from_path) inside the selection polygons
+        new      - figure name: list of ObjectIDs (from select_from_path) that are not in the report feature class
+        stacked  - figure name: number of new features stacked on top of a report feature (unique ID field only)
+        rows_read - number of rows read
+    '''
+    keys = set(Figure_Key(figure) for figure in figures)
+    rows_read = [0]
+    def read(fc, id_field=None):
+        clauses = buildWhereClause_Set(fc, key_field, figures)
+        rows = Read_Geometry_Rows(fc, key_field, keys, clauses[0] if len(clauses) == 1 else '', id_field)
+        rows_read[0] += len(rows)
+        return rows
+
+    polygons = [(row[1], row[2]) for row in read(feature_selection_path)]
+    features = read(select_from_path, id_field)
+    membership = Figure_Membership((row[:3] for row in features), Spatial_Index(polygons))
+    selected = dict((figure, []) for figure in keys)
+    candidates = []
+    for row in features:
+        if membership[row[0]]:
+            selected[row[1]].append(row[0])
+            candidates.append(row)
+    stacked = dict()
+    if id_field:
+        new_features, stacked = Find_New_Feature_Fingerprints(candidates, read(report_path, id_field), tolerance)
+    else:
+        existing = [(row[1], row[2]) for row in read(report_path)]
+        new_features = Find_New_Feature_Sets(candidates, Spatial_Index(existing))
+    for figure in keys:
+        new_features.setdefault(figure, [])
+    return {'selected': selected, 'new': new_features, 'stacked': stacked, 'rows_read': rows_read[0]}
+
+
+def _Select_and_Find_New_Features_Worker(args):
+    return Select_and_Find_New_Features(*args)
+
+
+def Select_and_Find_New_Features_Parallel(feature_selection_path, select_from_path, report_path, selection_output_path,
+                                          final_output_path, key_field, figures, workers=0, id_field=None, tolerance=0.001):
+    '''
+    Parallel Part 2 and Part 3 of Add New Geometry.  The figures are split in to partitions and each partition is
+    worked out by Select_and_Find_New_Features in a pool of worker processes.  Each worker only reads the rows of its
+    own figures and hands back ObjectIDs, so nothing is written until the main process merges the results: the
+    selected features are appended to the selection output (secondary boundary selection) and the new features are
+    appended to the final output.
+
+    Required input:
+        Path to the selection polygons (i.e. secondary boundary)
+        Path to the features to select from (figure extent selection)
+        Path to the report feature class
+        Path to the secondary boundary selection feature class (None skips writing the selected features)
+        Path to the final output feature class
+        Figure key field
+        List of figures to check
+    Optional input:
+        Number of worker processes.  0 uses one worker per CPU.
+        Unique ID field and fingerprint grid size.  See Find_New_Features_Indexed.
+
+    Returns a tuple of dictionaries with the figure name as the key and the number of selected features and new
+    features as the value.
+
+    *Note*
+    A file geodatabase can only be read by the worker processes once the edits to it are saved, so run this outside
+    of an edit session.  When the tool runs inside ArcMap, sys.executable is ArcMap.exe and the workers are started
+    with the pythonw.exe that ships with ArcGIS instead.
+    '''
+    if workers <= 0:
+        workers = multiprocessing.cpu_count()
+    #Several partitions per worker so a slow figure does not hold up the whole pool.
+    partitions = Figure_Partitions(list(figures), workers * 2)
+    jobs = [(feature_selection_path, select_from_path, report_path, key_field, partition, id_field, tolerance) for partition in partitions]
+    arcpy.AddMessage("Checking {} figure(s) in {} partition(s) with {} worker processes".format(len(figures), len(partitions), workers))
+    print "Checking {} figure(s) in {} partition(s) with {} worker processes".format(len(figures), len(partitions), workers)
+
+    with Worker_Pool(min(workers, len(partitions))) as pool:
+        results = pool.map(_Select_and_Find_New_Features_Worker, jobs)
+
+    return Merge_Figure_Results(results, select_from_path, selection_output_path, final_output_path)
+
+
+def Merge_Figure_Results(results, select_from_path, selection_output_path, final_output_path):
+    '''
+    Merge the results of Select_and_Find_New_Features and append the features to the output feature classes.
+
+    Required input:
+        List of results from Select_and_Find_New_Features
+        Path to the features that were selected from (figure extent selection)
+        Path to the secondary boundary selection feature class.  None skips writing the selected features.
+        Path to the final output feature class
+
+    Returns a tuple of dictionaries with the figure name as the key and the number of selected features and new
+    features as the value.
+    '''
+    selected = dict()
+    new_features = dict()
+    stacked = dict()
+    for result in results:
+        Record_Rows(read=result['rows_read'])
+        selected.update(result['selected'])
+        new_features.update(result['new'])
+        stacked.update(result.get('stacked', {}))
+    Stacked_Feature_Messages(stacked)
+    if selection_output_path:
+        Copy_Features_By_OID(select_from_path, selection_output_path, [fid for fids in selected.values() for fid in fids])
+    Copy_Features_By_OID(select_from_path, final_output_path, [fid for fids in new_features.values() for fid in fids])
+    span = Current_Span()
+    if span is not None:
+        for figure in sorted(new_features):
+            span.record(figure, 'figure', rows_written=len(selected[figure]) + len(new_features[figure]))
+    return (dict((figure, len(fids)) for figure, fids in selected.iteritems()),
+            dict((figure, len(fids)) for figure, fids in new_features.iteritems()))
+
+
+def Set_Read_Backend(backend):
+    '''
+    Set the backend for attribute reads: 'arcpy' (default) or 'fgdb' (fgdb_reader for File Geodatabase tables).
+    '''
+    global Read_Backend
+    if backend not in ('arcpy', 'fgdb'):
+        raise ValueError("Unknown read backend: {}".format(backend))
+    Read_Backend = backend
+    os.environ['BUDDING_GDB_READ_BACKEND'] = backend
+
+
+def Single_Value(value):
+    '''
+    Round a float to the single precision value a Single field stores, so it compares equal to the value read back from
+    the field.  Values too large for a Single field are returned as-is (Validate_File_Records reports them).
+    '''
+    if abs(value) > Field_Value_Ranges['Single'][1] and not math.isinf(value):
+        return value
+    return struct.unpack('f', struct.pack('f', value))[0]
+
+
+def Sort_Merge_Diff(left_rows, right_rows, memory_rows=None, removed=False, spill_folder=None):
+    '''
+    Out of core anti-join of two streams of row tuples, for diffs that do not fit in memory as sets.  Each side is
+    sorted in runs of memory_rows rows that are spilled to temporary files, the runs are merged and the two sorted sides
+    are merge-joined.  Only one run is held in memory at a time.
+
+    Required input:
+        Iterable of row tuples (i.e. the .csv rows, converted to the table field types by Stream_File_Records)
+        Iterable of row tuples to compare against (i.e. the table rows)
+    Optional input:
+        Number of rows sorted in memory at a time.  Defaults to Diff_Spill_Rows.
+        True to also yield the rows that are only in the right side.
+        Folder for the spill files.  Defaults to the scratch folder.
+
+    Yields ('new', row) for each distinct row in the left side that is not in the right side and, when removed is True,
+    ('removed', row) for each distinct row in the right side that is not in the left side.  The rows come out in sorted
+    order.  Both sides are read to the end before the first row is yielded, so the right side can be a cursor on the table
+    the new rows are written to.  The spill files are deleted when the generator finishes or is closed.
+    '''
+    memory_rows = memory_rows or Diff_Spill_Rows
+    folder = tempfile.mkdtemp(prefix="Budding_GDB_Diff_", dir=spill_folder or getattr(arcpy.env, 'scratchFolder', None) or tempfile.gettempdir())
+    end = object()
+    try:
+        left = _Sorted_Row_Keys(left_rows, memory_rows, folder)
+        right = _Sorted_Row_Keys(right_rows, memory_rows, folder)
+        l, r = next(left, end), next(right, end)
+        last_new = last_removed = end
+        while l is not end or r is not end:
+            if r is end or (l is not end and l < r):
+                if l != last_new:
+                    last_new = l
+                    yield ('new', _Key_Row(l))
+                l = next(left, end)
+            elif l is end or r < l:
+                if removed and r != last_removed:
+                    last_removed = r
+                    yield ('removed', _Key_Row(r))
+                r = next(right, end)
+            else:
+                key = l
+                while l is not end and l == key:
+                    l = next(left, end)
+                while r is not end and r == key:
+                    r = next(right, end)
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def _Row_Key(row):
+    #Sort key for a row.  Each value is paired with a flag so None sorts first and is never compared to a date or number.
+    return tuple((value is not None, value) for value in row)
+
+
+def _Key_Row(key):
+    return tuple(value for flag, value in key)
+
+
+def _Sorted_Row_Keys(rows, memory_rows, folder):
+    '''
+    Sort a stream of rows for Sort_Merge_Diff.  Returns an iterator of sorted row keys (_Row_Key).  When the rows fit in
+    one run they are sorted in memory, otherwise every run is spilled to a file in the folder and the files are merged.
+    '''
+    runs = []
+    run = []
+    for row in rows:
+        run.append(_Row_Key(row))
+        if len(run) >= memory_rows:
+            run.sort()
+            runs.append(_Spill_Run(run, folder))
+            run = []
+    run.sort()
+    if not runs:
+        return iter(run)
+    if run:
+        runs.append(_Spill_Run(run, folder))
+    return heapq.merge(*[_Read_Run(path) for path in runs])
+
+
+def _Spill_Run(keys, folder, block_size=10000):
+    #Write a sorted run to a spill file in blocks of block_size keys.  Returns the path to the file.
+    descriptor, path = tempfile.mkstemp(suffix=".run", dir=folder)
+    with os.fdopen(descriptor, 'wb') as f:
+        for start in xrange(0, len(keys), block_size):
+            cPickle.dump(keys[start:start + block_size], f, cPickle.HIGHEST_PROTOCOL)
+    return path
+
+
+def _Read_Run(path):
+    #Generator of the keys in a spill file, one block in memory at a time.
+    with open(path, 'rb') as f:
+        while True:
+            try:
+                block = cPickle.load(f)
+            except EOFError:
+                return
+            for key in block:
+                yield key
+
+
+def Sync_Child(snapshot, job, change_log=None):
+    '''
+    Update one child report feature class from a Master_Snapshot.  The figures are checked the same way as the
+    Update Attributes tool: figures that are not in the child are skipped and the rest are updated in a single pass
+    of Update_Fields inside one edit session.
+
+    Required input:
+        Master_Snapshot
+        Child job (i.e. one item from Read_Sync_Manifest)
+    Optional input:
+        Change_Log
+
+    Returns a dictionary with the field name as the key and the number of updated records as the value.
+    '''
+    childpath, childFC = InputCheck(job['Child'])
+    print "."*25 + "Syncing {}".format(childFC)
+    arcpy.AddMessage("."*25 + "Syncing {}".format(childFC))
+    figures = None
+    if job.get('Figure_Extent'):
+        if not FieldExist(childpath, job['Figure_Key_Field']):
+            raise ValueError("The field {} does not exist in {}".format(job['Figure_Key_Field'], childFC))
+        FigureExtentpath, FigureExtentFC = InputCheck(job['Figure_Extent'])
+        child_figures = set(Figure_Key(figure) for figure in unique_values(childpath, job['Figure_Key_Field']))
+        figures = [figure for figure in Get_Figure_List(FigureExtentpath, job['Figure_Key_Field'], job.get('Figures', ''))
+                   if Figure_Key(figure) in child_figures]
+        if not figures:
+            arcpy.AddMessage("None of the figures are in {}.  Skipping to the next child.".format(childFC))
+            return dict()
+    edit_session = start_edit_session(childpath)
+    try:
+        field_updates = Update_Fields(snapshot.path, childpath, snapshot.key_field, job['Child_Key_Field'], job['Fields'],
+                                      job.get('Figure_Key_Field', ''), figures, change_log, snapshot=snapshot)
+    except Exception:
+        edit_session.abortOperation()
+        edit_session.stopEditing(False)
+        raise
+    stop_edit_session(edit_session)
+    return field_updates
+
+
+def Sync_Child_Group(snapshot, jobs):
+    '''
+    Sync a list of children (from the same geodatabase) one after another with Sync_Child.  Each child gets its own
+    Change_Log.  An error in one child is reported and the rest of the children are still synced.
+
+    Returns a list of (child, {field: records updated}, change log path, error message).
+    '''
+    results = []
+    for job in jobs:
+        change_log = Change_Log("Update Attributes Batch {}".format(os.path.basename(job['Child'])))
+        error = None
+        field_updates = dict()
+        try:
+            field_updates = Sync_Child(snapshot, job, change_log)
+        except Exception, e:
+            error = "{}: {}".format(type(e).__name__, e)
+        results.append((job['Child'], field_updates, change_log.close(), error))
+    return results
+
+
 def Space2Underscore(fields):
     '''
     Replace spaces in strings with an underscore.
@@ -524,56 +2952,527 @@ def Space2Underscore(fields):
     return field_update
 
 
+class Spatial_Index(object):
+    '''
+    Sort-Tile-Recursive (STR) packed R-tree used to look up polygons by extent without running a
+    SelectLayerByLocation for every figure.
+
+    Required input:
+        List of (Item, Geometry) pairs.  Geometries only need an extent (XMin, YMin, XMax, YMax), so
+        arcpy geometry objects or any in-memory stand-in will work.
+
+    query(extent) returns the (Item, Geometry) pairs whose extent overlaps the extent passed in.  The
+    caller is responsible for the exact geometry check (i.e. geometry.disjoint()).
+    '''
+    def __init__(self, entries, node_capacity=16):
+        self.node_capacity = max(2, node_capacity)
+        self.size = 0
+        level = []
+        for entry in entries:
+            level.append((Geometry_Extent(entry[1]), True, entry))
+            self.size += 1
+        # Pack each level into parent nodes until a single root node is left.
+        while len(level) > self.node_capacity:
+            level = self._pack(level)
+        self.root = (self._union([node[0] for node in level]), False, level) if level else None
+
+    def __len__(self):
+        return self.size
+
+    def _pack(self, nodes):
+        capacity = self.node_capacity
+        leaf_count = int(math.ceil(len(nodes) / float(capacity)))
+        slice_count = int(math.ceil(math.sqrt(leaf_count)))
+        slice_size = slice_count * capacity
+        nodes = sorted(nodes, key=lambda n: n[0][0] + n[0][2])
+        packed = []
+        for i in xrange(0, len(nodes), slice_size):
+            vertical_slice = sorted(nodes[i:i + slice_size], key=lambda n: n[0][1] + n[0][3])
+            for j in xrange(0, len(vertical_slice), capacity):
+                children = vertical_slice[j:j + capacity]
+                packed.append((self._union([child[0] for child in children]), False, children))
+        return packed
+
+    @staticmethod
+    def _union(extents):
+        return (min(e[0] for e in extents), min(e[1] for e in extents),
+                max(e[2] for e in extents), max(e[3] for e in extents))
+
+    def query(self, extent):
+        results = []
+        if self.root is None:
+            return results
+        xmin, ymin, xmax, ymax = extent
+        stack = [self.root]
+        while stack:
+            node_extent, is_leaf, payload = stack.pop()
+            if node_extent[0] > xmax or node_extent[2] < xmin or node_extent[1] > ymax or node_extent[3] < ymin:
+                continue
+            if is_leaf:
+                results.append(payload)
+            else:
+                stack.extend(payload)
+        return results
+
+
+def Stacked_Feature_Messages(stacked):
+    #Report the new features that are stacked on top of a report feature with a different unique ID.
+    for figure in sorted(stacked):
+        if stacked[figure]:
+            print "{} of the new features in figure {} are stacked on top of features that are already in the figure".format(stacked[figure], figure)
+            arcpy.AddMessage("{} of the new features in figure {} are stacked on top of features that are already in the figure".format(stacked[figure], figure))
+
+
+def Stream_File_Records(filename, fields, field_info=None, chunk_size=10000):
+    '''
+    Generator that reads a .csv file and yields chunks (lists) of row tuples of the requested columns, optionally
+    converted to the field types of a Feature Class or Table.
+
+    Required input:
+        Path to .csv file
+        List of field names to extract.  Spaces in the header are replaced with underscores before matching.
+    Optional input:
+        List of field information from get_Data_Type_FromGIS - [Field Name, Field Type, Field Length]
+        Number of rows per chunk
+    '''
+    converters = dict((info[0], Field_Value_Converter(info[1])) for info in (field_info or []))
+    with open(filename, 'Ur') as fp:
+        reader = csv.reader(fp)
+        header = Space2Underscore(reader.next())
+        field_index = get_column_index(header, fields)
+        columns = [(index, converters.get(field)) for field, index in zip(fields, field_index)]
+        chunk = []
+        for row in reader:
+            if not row:
+                continue
+            try:
+                chunk.append(tuple(convert(row[index]) if convert else row[index] for index, convert in columns))
+            except (ValueError, IndexError) as e:
+                raise ValueError("Unable to read line {} of {}: {}".format(reader.line_num, os.path.basename(filename), e))
+            if len(chunk) >= chunk_size:
+                Record_Rows(read=len(chunk))
+                yield chunk
+                chunk = []
+        if chunk:
+            Record_Rows(read=len(chunk))
+            yield chunk
+
+
 def unique_values(fc,field):
-    with arcpy.da.SearchCursor(fc,[field])as cur:
-        return sorted({row[0] for row in cur})
-
-# TODO
-
-#def FigureGeometryCheck(fc1,fc2,fc3,expression):
-#	fc1_lyr1 = "lyr1"
-#	fcl_lyr2 = "lyr2"
-#	fcl_lyr3 = "lyr3"
-#	Create_FL(fc1_lyr1,fc1,expression)
-#	Create_FL(fcl_lyr2,fc2,expression)
-#	Create_FL(fcl_lyr3,fc3,expression)
-#	fc1_count = RecordCount(fc1_lyr1)
-#	fc2_count = RecordCount(fcl_lyr2)
-#	field = "Location_ID"
-#	if fc1_count == fc2_count:
-#		pass
-#	else:
-#		fc1_list = unique_values(fc1_lyr1,field)
-#		fc2_list = unique_values(fcl_lyr2,field)
-#		fc3_list = unique_values(fcl_lyr3,field)
-#		difference = list(set(fc2_list) - set(fc1_list)- set(fc3_list))
-#		if len(difference) != 0:
-#			print str(len(difference)) + " additional locations have been found that intersect previous locations that are in the figure. They are:\n"
-#			arcpy.AddMessage(str(len(difference)) + " additional locations have been found that intersect previous locations that are in the figure. They are:\n")
-#			for record in difference:
-#				clause =  '"' + field + '"' + " = '" + record + "'"
-#				arcpy.SelectLayerByAttribute_management(fcl_lyr2,"ADD_TO_SELECTION",clause)
-#				arcpy.AddMessage(str(record))
-#				print str(record)
-#			arcpy.Append_management(fcl_lyr2, fcl_lyr3,"NO_TEST","","")
-
-
-#FigureGeometryCheck(Layer_To_Checkp, Initial_Checkp, Final_Checkp,clause)
-#def Check_Coincident_Features(Layer_To_Check, Initial_Check, Final_Check):
-       
-#    #Get field names:
-#    field1 = Remove_DBMS_Specific_Fields(Layer_To_Check) #[f.name for f in arcpy.ListFields(Layer_To_Checkp)]
-#    field2 = Remove_DBMS_Specific_Fields(Final_Check) #[f.name for f in arcpy.ListFields(Final_Checkp)]
-#    fields = list(set(field1)&set(field2))
-#    fields.remove("SHAPE")
-
-#    table1 = Extract_Table_Records(Layer_To_Checkp, fields)
-#    table2 = Extract_Table_Records(Initial_Checkp, fields)
-#    table3 = Extract_Table_Records(Final_Checkp, fields)
-#    difference = list(set(table1) - set(table3) - set(table2))
-    
-#    if len(difference) != 0:
-#        arcpy.AddMessage("{} features have been found which were coincident".format(len(difference)))
-#        #arcpy.Append_management()
+    return sorted({row[0] for row in Read_Rows(fc,[field])})
+
 
-    #append difference to final check
\ No newline at end of file
+def Update_Fields(Sourcepath, targetpath, SourceTableField, TargetTableField, fields, figure_field='', figures=None, change_log=None, plan=None,
+                  snapshot=None):
+    '''
+    Update a list of fields in the target so they match the source in a single pass.  The source is read once into
+    a dictionary of row tuples keyed on the join field, and the target is read once with an UpdateCursor that
+    compares every field at the same time.  Only rows that changed are written back.  When numpy is available the
+    changed rows are found ahead of time with Array_Changed_Rows (from the snapshot columns when a snapshot is passed in)
+    and the UpdateCursor only visits those rows.
+
+    Required input:
+        Path to source Feature Class or Table (Master)
+        Path to target Feature Class or Table
+        Source key field
+        Target key field
+        List of fields to update
+    Optional input:
+        Figure key field and a list of figures.  Only target rows tied to those figures are updated.
+        Change_Log for the changed values.  When one is not passed in, the changes are not logged.
+        Change_Plan.  When a plan is passed in, the changed values are recorded in the plan and the target is not updated.
+        Master_Snapshot (or CSV_Snapshot) of the source.  When a snapshot is passed in, the source is not read again.  In
+        the warm worker the snapshot is taken from Cached_Master_Snapshot.
+
+    Returns a dictionary with the field name as the key and the number of updated records as the value.
+    '''
+    targetFCpath, targetFC = InputCheck(targetpath)
+    if snapshot is None:
+        SourceFCpath, SourceFC = InputCheck(Sourcepath)
+        snapshot = Cached_Master_Snapshot(SourceFCpath, SourceTableField, fields)
+    else:
+        SourceFCpath, SourceFC = snapshot.path, snapshot.name
+
+    #Drop fields that are not in the source or that do not have matching data types.
+    if snapshot is not None:
+        if SourceTableField != snapshot.key_field:
+            raise ValueError("The snapshot of {} is keyed on {}, not {}".format(SourceFC, snapshot.key_field, SourceTableField))
+        #The snapshot rows do not hold the key field as a value.
+        source_types = dict(snapshot.types)
+        source_key_type = source_types.pop(SourceTableField)
+    else:
+        source_types = dict((f.name, f.type) for f in arcpy.ListFields(SourceFCpath))
+        source_key_type = source_types.get(SourceTableField)
+    target_types = dict((f.name, f.type) for f in arcpy.ListFields(targetFCpath))
+    sync_fields = []
+    for field in fields:
+        if field not in source_types:
+            arcpy.AddMessage(("{} is not in {}.  Skipping to next field.".format(field,SourceFC)))
+        elif source_types[field] != target_types.get(field):
+            arcpy.AddWarning("....\n.... \
+                             \nThe field, {}, in {} and {} do not have matching data types. Please correct by updating the field data type to {} for the field, {}, in {}. \
+                             \nSkipping to next field................. \
+                             \n....\n....".format(field, SourceFC, targetFC, str(source_types[field]), field, targetFC))
+        else:
+            sync_fields.append(field)
+    if not sync_fields:
+        return dict()
+
+    print "."*25 + "Updating the following field(s): " + ", ".join(sync_fields)
+    arcpy.AddMessage("."*25 + "Updating the following field(s): " + ", ".join(sync_fields))
+
+    cursor_fields = [TargetTableField] + sync_fields
+    clause = ''
+    figure_index = None
+    if figures is not None:
+        figure_clauses = buildWhereClause_Set(targetFCpath, figure_field, figures)
+        if len(figure_clauses) == 1:
+            clause = figure_clauses[0]
+        figures = set(Figure_Key(figure) for figure in figures)
+        #The figure field is only added when it is not already in the cursor (i.e. it is one of the fields being updated).
+        if figure_field not in cursor_fields:
+            cursor_fields.append(figure_field)
+        figure_index = cursor_fields.index(figure_field)
+
+    if np is not None and source_key_type == target_types.get(TargetTableField):
+        #Columnar diff: the changed rows are found with Array_Changed_Rows and only those rows are kept in source_rows.
+        #When the changed ObjectIDs fit in one clause, the UpdateCursor only visits the changed rows.
+        if snapshot is not None:
+            source_columns = snapshot.source_columns(sync_fields)
+        else:
+            source_columns = Extract_Table_Columns(SourceFCpath, [SourceTableField] + sync_fields,
+                                                   [source_key_type] + [source_types[field] for field in sync_fields])
+        #With a figure clause (i.e. one chunk of Update_Fields_Chunked) only the rows of those figures are read, unless
+        #the fgdb backend reads the whole table faster.
+        target_cursor = arcpy.da.SearchCursor(targetFCpath, ["OID@"] + cursor_fields, clause) if clause and Read_Backend != 'fgdb' else None
+        target_rows = target_cursor if target_cursor is not None else Read_Rows(targetFCpath, ["OID@"] + cursor_fields)
+        if figures is not None:
+            target_rows = (row for row in target_rows if Figure_Key(row[figure_index + 1]) in figures)
+        target_columns = Records_To_Columns(target_rows, ['OID'] + [target_types[TargetTableField]] + [target_types[field] for field in sync_fields])
+        del target_cursor
+        Record_Rows(read=len(target_columns[0]))
+        source_keys, target_keys = Align_Columns(source_columns[:1], target_columns[1:2])
+        source_values, target_values = Align_Columns(source_columns[1:], target_columns[2:])
+        target_index, source_index = Array_Changed_Rows(source_keys, source_values, target_keys, target_values)
+        source_rows = dict((Column_Value(source_columns[0], i), tuple(Column_Value(column, i) for column in source_columns[1:]))
+                           for i in source_index)
+        if len(target_index) == 0:
+            clause = None
+        else:
+            oid_field = [f.name for f in arcpy.ListFields(targetFCpath) if f.type == 'OID'][0]
+            oid_clauses = Compile_Where_Clauses(arcpy.AddFieldDelimiters(targetFCpath, oid_field), 'OID', target_columns[0][target_index].tolist())
+            if len(oid_clauses) == 1:
+                clause = oid_clauses[0]
+    elif snapshot is not None:
+        source_rows = snapshot.source_rows(sync_fields)
+    else:
+        source_rows = dict((r[0], r[1:]) for r in arcpy.da.SearchCursor(SourceFCpath, [SourceTableField] + sync_fields))
+        Record_Rows(read=len(source_rows))
+    field_updates = dict((field, 0) for field in sync_fields)
+    figure_updates = dict()
+    scanned = 0
+    updated = 0
+    if clause is not None:
+        cursor = arcpy.da.UpdateCursor if plan is None else arcpy.da.SearchCursor
+        with cursor(targetFCpath, cursor_fields, clause) as updateRows:
+            for updateRow in updateRows:
+                scanned += 1
+                #The figure the row was tied to before it was updated.
+                figure = Figure_Key(updateRow[figure_index]) if figures is not None else None
+                if figures is not None and figure not in figures:
+                    continue
+                source_row = source_rows.get(updateRow[0])
+                if source_row is None:
+                    continue
+                updateRow = list(updateRow)
+                row_changes = []
+                for i, field in enumerate(sync_fields):
+                    if updateRow[i + 1] != source_row[i]:
+                        row_changes.append((field, updateRow[i + 1], source_row[i]))
+                        updateRow[i + 1] = source_row[i]
+                        field_updates[field] += 1
+                if row_changes:
+                    if plan is not None:
+                        plan.update(targetFCpath, TargetTableField, updateRow[0], row_changes)
+                    else:
+                        if change_log is not None:
+                            for field, old_value, new_value in row_changes:
+                                change_log.record('update', targetFC, updateRow[0], field, old_value, new_value, figure)
+                        updateRows.updateRow(updateRow)
+                    updated += 1
+                    if figures is not None:
+                        figure_updates[figure] = figure_updates.get(figure, 0) + 1
+
+    Record_Rows(read=scanned, written=updated)
+    span = Current_Span()
+    if span is not None:
+        for figure in sorted(figure_updates):
+            span.record(figure, 'figure', rows_written=figure_updates[figure])
+        for field in sync_fields:
+            span.record(field, 'field', rows_written=field_updates[field])
+
+    verb = "updated" if plan is None else "planned for update"
+    for field in sync_fields:
+        if field_updates[field] == 0:
+            print ("There are no records to update in {}".format(field))
+            arcpy.AddMessage(("There are no records to update in {}".format(field)))
+        else:
+            print ("{} record(s) {} in {}".format(field_updates[field], verb, field))
+            arcpy.AddMessage(("{} record(s) {} in {}".format(field_updates[field], verb, field)))
+    for figure in sorted(figure_updates):
+        print ("{} record(s) {} in figure {}".format(figure_updates[figure], verb, figure))
+        arcpy.AddMessage(("{} record(s) {} in figure {}".format(figure_updates[figure], verb, figure)))
+    return field_updates
+
+
+def Update_Fields_Chunked(Sourcepath, targetpath, SourceTableField, TargetTableField, fields, figure_field, figures, chunk_figures=25,
+                          chunk_rows=0, change_log=None, snapshot=None):
+    '''
+    Update_Fields in chunks of figures.  Each chunk is updated and saved in its own edit session and the saved figures are
+    written to an Edit_Checkpoint, so a failure only loses the chunk that was being edited and running the same job again
+    resumes after the last saved chunk, unless the source changed in between.  The source is read once (Master_Snapshot) for all the chunks, and each chunk is
+    compared with the snapshot columns (see Update_Fields).  The changes of a chunk are held in a Change_Buffer and only
+    written to the change log once the chunk is saved.  When a chunk fails, an abort record is logged in their place.
+
+    Required input:
+        Path to source Feature Class or Table (Master)
+        Path to target Feature Class or Table
+        Source key field
+        Target key field
+        List of fields to update
+        Figure key field and the list of figures to update
+    Optional input:
+        Number of figures per chunk.  0 for no limit.
+        Number of target rows per chunk.  Figures are added to a chunk until it holds about this many rows (a figure is
+        never split).  0 for no limit.  With both limits at 0 all the figures are saved in one chunk.
+        Change_Log for the changed values.  When one is not passed in, the changes are not logged.
+        Master_Snapshot (or CSV_Snapshot) of the source
+
+    Returns a dictionary with the field name as the key and the number of updated records as the value (for this run).
+    '''
+    targetFCpath, targetFC = InputCheck(targetpath)
+    if snapshot is None:
+        SourceFCpath = InputCheck(Sourcepath)[0]
+        snapshot = Cached_Master_Snapshot(SourceFCpath, SourceTableField, fields) or Master_Snapshot(SourceFCpath, SourceTableField, fields)
+    #The stamp of the source drops the checkpoint of a failed run when the source changed since.  A .csv parent is stamped
+    #with its size and modified time.
+    stamp = Table_Stamp(snapshot.path)
+    if stamp is None and os.path.isfile(snapshot.path):
+        stamp = "{}:{!r}".format(os.path.getsize(snapshot.path), os.path.getmtime(snapshot.path))
+    checkpoint = Edit_Checkpoint({'source': snapshot.path, 'target': targetFCpath, 'source_key': SourceTableField,
+                                  'target_key': TargetTableField, 'fields': list(fields), 'figure_field': figure_field,
+                                  'figures': sorted(Figure_Key(figure) for figure in figures)}, stamp)
+    remaining = checkpoint.remaining(figures)
+    if len(remaining) < len(figures):
+        print "Resuming an earlier run: {} of {} figure(s) were saved by that run and are not checked again (checkpoint {})".format(len(figures) - len(remaining), len(figures), checkpoint.path)
+        arcpy.AddWarning("Resuming an earlier run: {} of {} figure(s) were saved by that run and are not checked again (checkpoint {})".format(len(figures) - len(remaining), len(figures), checkpoint.path))
+
+    figure_rows = dict()
+    if chunk_rows:
+        for row in Read_Rows(targetFCpath, [figure_field]):
+            figure_rows[Figure_Key(row[0])] = figure_rows.get(Figure_Key(row[0]), 0) + 1
+    chunks = []
+    chunk = []
+    row_count = 0
+    for figure in remaining:
+        if chunk and ((chunk_figures and len(chunk) >= chunk_figures) or (chunk_rows and row_count + figure_rows.get(Figure_Key(figure), 0) > chunk_rows)):
+            chunks.append(chunk)
+            chunk = []
+            row_count = 0
+        chunk.append(figure)
+        row_count += figure_rows.get(Figure_Key(figure), 0)
+    if chunk:
+        chunks.append(chunk)
+
+    field_updates = dict()
+    for number, chunk in enumerate(chunks, 1):
+        pending = Change_Buffer() if change_log is not None else None
+        edit_session = start_edit_session(targetFCpath)
+        try:
+            chunk_updates = Update_Fields(snapshot.path, targetFCpath, SourceTableField, TargetTableField, fields, figure_field, chunk,
+                                          pending, snapshot=snapshot)
+        except Exception:
+            edit_session.abortOperation()
+            edit_session.stopEditing(False)
+            if pending is not None and pending.records:
+                change_log.record('abort', targetFC, None, new_value="Chunk {} of {} ({} figure(s)) was rolled back, {} change(s) were not saved".format(
+                                  number, len(chunks), len(chunk), len(pending.records)))
+            raise
+        stop_edit_session(edit_session)
+        if pending is not None:
+            pending.flush(change_log)
+        checkpoint.commit(chunk)
+        for field, count in chunk_updates.iteritems():
+            field_updates[field] = field_updates.get(field, 0) + count
+        print "Saved chunk {} of {} ({} figure(s))".format(number, len(chunks), len(chunk))
+        arcpy.AddMessage("Saved chunk {} of {} ({} figure(s))".format(number, len(chunks), len(chunk)))
+    checkpoint.finish()
+    return field_updates
+
+
+def Validate_File_Records(filename, field_info, field_lengths=None, sample_size=10):
+    '''
+    Check every value in a .csv file against the type and range of the table fields before anything is added to the
+    table.  Every problem is collected rather than stopping at the first one.
+
+    Required input:
+        Path to .csv file
+        List of field information - [Field Name, Field Type] (i.e. from Extract_Field_NameType)
+    Optional input:
+        Dictionary with the text field names as the keys and the field lengths as the values.  Longer values are reported.
+        Number of example lines listed for each bad column.
+
+    Returns a list of problem messages, empty when the file matches the table.
+    '''
+    field_info = [info for info in field_info if info[1] not in ('OID', 'Geometry', 'GlobalID', 'Raster', 'Blob')]
+    field_lengths = field_lengths or dict()
+    problems = []
+    with open(filename, 'Ur') as fp:
+        reader = csv.reader(fp)
+        header = Space2Underscore(reader.next())
+        missing = [info[0] for info in field_info if info[0] not in header]
+        if missing:
+            problems.append("Missing the following fields from the input .csv file: {}".format(", ".join(missing)))
+        columns = [(info[0], info[1], header.index(info[0]), Field_Value_Converter(info[1]), field_lengths.get(info[0]))
+                   for info in field_info if info[0] in header]
+        width = max([column[2] for column in columns] or [-1]) + 1
+        short_lines = []
+        bad_values = dict((column[0], [0, []]) for column in columns)
+        for row in reader:
+            if not row:
+                continue
+            if len(row) < width:
+                short_lines.append(reader.line_num)
+                continue
+            for name, field_type, index, convert, length in columns:
+                value = row[index]
+                try:
+                    converted = convert(value)
+                    if length and converted is not None and len(converted) > length:
+                        raise ValueError("longer than {} characters".format(length))
+                    if isinstance(converted, float) and (math.isnan(converted) or math.isinf(converted)):
+                        raise ValueError("not a finite number")
+                    if converted is not None and field_type in Field_Value_Ranges:
+                        low, high = Field_Value_Ranges[field_type]
+                        if not low <= converted <= high:
+                            raise ValueError("outside the {} range of {} to {}".format(field_type, low, high))
+                except Exception, e:
+                    bad = bad_values[name]
+                    bad[0] += 1
+                    if len(bad[1]) < sample_size:
+                        bad[1].append("line {}: {!r} ({})".format(reader.line_num, value if len(value) <= 50 else value[:50] + "...", e))
+    if short_lines:
+        problems.append("{} row(s) are missing values (line(s) {})".format(len(short_lines), ", ".join(str(line) for line in short_lines[:sample_size])))
+    for name, field_type, index, convert, length in columns:
+        count, examples = bad_values[name]
+        if count:
+            problems.append("{} ({}): {} value(s) can not be stored in the field\n    {}".format(name, field_type, count, "\n    ".join(examples)))
+    Record_Rows(read=reader.line_num - 1)
+    return problems
+
+
+@contextmanager
+def Worker_Pool(processes, initializer=None, initargs=()):
+    '''
+    Pool of worker processes for the parallel helpers.  The pool is closed and joined when the with block ends, or
+    terminated when the block raises.
+
+    *Note*
+    When the tool runs inside ArcMap, sys.executable is ArcMap.exe and the workers are started with the pythonw.exe
+    that ships with ArcGIS instead.  The pool_worker module stands in for __main__ while the workers start, so the
+    tool script (or the warm worker) is not re-run in every worker on Windows.  Both are put back as soon as the pool
+    has started.
+    '''
+    import pool_worker
+    from multiprocessing import forking
+    executable = getattr(forking, '_python_exe', None)
+    if executable is not None and not os.path.basename(sys.executable).lower().startswith('python'):
+        forking.set_executable(os.path.join(sys.exec_prefix, 'pythonw.exe'))
+    main = sys.modules['__main__']
+    sys.modules['__main__'] = pool_worker
+    try:
+        pool = multiprocessing.Pool(processes, initializer, initargs)
+    finally:
+        sys.modules['__main__'] = main
+        if executable is not None:
+            forking.set_executable(executable)
+    try:
+        yield pool
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+
+def Table_Stamp(path):
+    '''
+    Return a stamp (size and modified time of the table files) of a table or feature class in a File Geodatabase.  The
+    stamp changes whenever the table is edited, but not when other tables in the geodatabase are.  Returns None for
+    anything that is not in a File Geodatabase.
+    '''
+    split = fgdb_reader.Split_GDB_Path(path) if isinstance(path, basestring) else None
+    if split is None:
+        return None
+    try:
+        table_path = fgdb_reader.FileGDB(split[0]).table_path(split[1])
+        files = [table_path, os.path.splitext(table_path)[0] + '.gdbtablx']
+        return ";".join("{}:{!r}".format(os.path.getsize(f), os.path.getmtime(f)) for f in files)
+    except (fgdb_reader.FileGDB_Error, IOError, OSError):
+        return None
+
+
+def Tool_Setting(name, default, tool=None, choices=None):
+    '''
+    Hard coded tool setting that can be changed without editing the tool script, the same way as Read_Backend.  The
+    setting is read from the BUDDING_GDB_<TOOL>_<NAME> environment variable (i.e. BUDDING_GDB_UPDATE_ATTRIBUTES_SYNC_MODE)
+    and then from BUDDING_GDB_<NAME> (i.e. BUDDING_GDB_SYNC_MODE), and the text is converted to the type of the
+    default.  True/False settings take 1/0, true/false or yes/no.
+
+    Required input:
+        Setting name (i.e. 'Sync_Mode')
+        Default value
+    Optional input:
+        Tool name for the tool specific variable
+        List of the allowed values
+
+    A value that can not be converted or is not one of the choices is reported and the default is used.
+    '''
+    names = ["BUDDING_GDB_{}".format(name.upper())]
+    if tool:
+        names.insert(0, "BUDDING_GDB_{}_{}".format(tool.upper().replace(' ', '_'), name.upper()))
+    for variable in names:
+        if variable not in os.environ:
+            continue
+        text = os.environ[variable].strip()
+        try:
+            if isinstance(default, bool):
+                if text.lower() not in ('1', '0', 'true', 'false', 'yes', 'no'):
+                    raise ValueError("{} is not true or false".format(text))
+                value = text.lower() in ('1', 'true', 'yes')
+            elif isinstance(default, (int, float)):
+                value = type(default)(text)
+            else:
+                value = text
+            if choices is not None and value not in choices:
+                raise ValueError("{} is not one of {}".format(text, ", ".join(str(choice) for choice in choices)))
+        except ValueError, e:
+            arcpy.AddWarning("Ignoring the {} environment variable ({}).  Using {} = {}".format(variable, e, name, default))
+            return default
+        _Message("{} = {} (from the {} environment variable)".format(name, value, variable))
+        return value
+    return default
+
+
+def Workspace_Stamp(path):
+    '''
+    Return a stamp (file count and latest modified time) of the File Geodatabase that holds a dataset.  The stamp
+    changes whenever a table in the geodatabase is edited or its schema changes, so it is used to tell when a cached
+    snapshot or schema is out of date.  Returns None for anything that is not in a File Geodatabase.
+    '''
+    workspace = get_geodatabase_path(path)
+    if not workspace.lower().endswith('.gdb') or not os.path.isdir(workspace):
+        return None
+    names = os.listdir(workspace)
+    return (len(names), max(os.path.getmtime(os.path.join(workspace, name)) for name in names) if names else 0)
@@ -0,0 +1,11 @@
+#..............................................................................................................................
+# Creator - Seth Docherty
+# Purpose - Entry module for the worker processes started by helper.Worker_Pool.
+#
+#           On Windows multiprocessing starts each worker with a fresh python and re-imports the __main__ module of the
+#           parent.  The parent can be a tool script, ArcMap or the warm worker, and none of those should run again in a
+#           worker.  Worker_Pool stands this module in for __main__ while the pool starts, so the workers only import
+#           this module and helper, which holds the worker functions.
+#
+#..............................................................................................................................
+import helper
@@ -0,0 +1,254 @@
+#..............................................................................................................................
+# Creator - Seth Docherty
+# Purpose - Warm worker for the Budding GDB toolset.  A long-lived local process that keeps arcpy and helper imported, caches
+#           the ListFields/Describe results and the parent snapshots (helper.Snapshot_Cache), and runs the tool scripts
+#           for thin clients.  Re-running a tool on the same project skips the start up cost and the parent reads.
+#
+#           Start the worker with the ArcGIS python (the add-in starts it when ArcMap loads the add-in):
+#               C:\Python27\ArcGIS10.x\pythonw.exe warm_worker.py
+#           Stop it with:
+#               C:\Python27\ArcGIS10.x\python.exe warm_worker.py --stop
+#
+#           Each tool script starts with a thin client:
+#               import warm_worker
+#               status = warm_worker.Run_In_Worker(__file__)
+#               if status is not None:
+#                   sys.exit(status)
+#
+#           Run_In_Worker sends the script path and the tool parameters to the worker, relays the worker's messages to the
+#           geoprocessing window and returns the exit status.  When no worker is running (or BUDDING_GDB_WARM_WORKER is set
+#           to 0) it returns None and the tool runs in its own process as usual.
+#
+#           The worker only listens on localhost and the clients have to know the key in the key file
+#           (~/.budding_gdb_worker_key) that the worker writes when it starts.  Jobs are run one at a time.  pythonw.exe
+#           has no console, so the worker writes its own messages and errors to ~/.budding_gdb_worker.log.
+#
+#           Cached schema and snapshots are only kept for File Geodatabases, and are dropped as soon as a file in the
+#           geodatabase changes (helper.Workspace_Stamp), so edits made in ArcMap between runs are always picked up.
+#
+#..............................................................................................................................
+import os
+import sys
+import runpy
+import traceback
+from datetime import datetime
+from multiprocessing.connection import Listener, Client
+
+ADDRESS = ('localhost', int(os.environ.get('BUDDING_GDB_WORKER_PORT', 47211)))
+KEY_FILE = os.path.join(os.path.expanduser('~'), '.budding_gdb_worker_key')
+LOG_FILE = os.path.join(os.path.expanduser('~'), '.budding_gdb_worker.log')
+#The log file is started over when a worker starts listening and the file is bigger than this (in bytes).
+LOG_FILE_SIZE = 1024 * 1024
+
+#Set in the worker process so the tool scripts run there do not hand the run back to the worker.
+IN_WORKER_VARIABLE = 'BUDDING_GDB_IN_WORKER'
+
+
+def Worker_Key():
+    '''
+    Return the key that clients use to connect to the worker.  The worker saves a new random key each time it starts.
+    Returns None when there is no key file.
+    '''
+    if not os.path.exists(KEY_FILE):
+        return None
+    with open(KEY_FILE) as f:
+        return f.read().strip()
+
+
+def Connect():
+    #Connection to the worker, or None when no worker is running.
+    key = Worker_Key()
+    if key is None:
+        return None
+    try:
+        return Client(ADDRESS, authkey=key)
+    except Exception:
+        return None
+
+
+def Run_In_Worker(script_path, argv=None):
+    '''
+    Thin client.  Run a tool script in the warm worker and relay the messages to the geoprocessing window.
+
+    Required input:
+        Path to the tool script (i.e. __file__)
+    Optional input:
+        List of tool parameters as text.  Defaults to the script arguments (sys.argv), which is how ArcGIS passes the
+        parameters to a script tool.
+
+    Returns the exit status of the script, or None when the script was not run in the worker.
+    '''
+    if os.environ.get(IN_WORKER_VARIABLE) or os.environ.get('BUDDING_GDB_WARM_WORKER', '1') == '0':
+        return None
+    connection = Connect()
+    if connection is None:
+        return None
+    if argv is None:
+        argv = sys.argv[1:]
+    import arcpy
+    relay = {'message': arcpy.AddMessage, 'warning': arcpy.AddWarning, 'error': arcpy.AddError}
+    try:
+        #The tool settings (helper.Tool_Setting) are read from BUDDING_GDB_ environment variables, so the client's are sent along.
+        environment = dict((name, value) for name, value in os.environ.items() if name.startswith('BUDDING_GDB_'))
+        connection.send({'command': 'run', 'script': os.path.abspath(script_path), 'argv': list(argv), 'environment': environment})
+        while True:
+            reply = connection.recv()
+            if reply[0] == 'done':
+                return reply[1]
+            relay[reply[1]](reply[2])
+    except EOFError:
+        arcpy.AddError("The warm worker stopped before {} finished".format(os.path.basename(script_path)))
+        return 1
+    finally:
+        connection.close()
+
+
+def Stop_Worker():
+    #Ask a running worker to stop.  Returns True when a worker was running.
+    connection = Connect()
+    if connection is None:
+        return False
+    try:
+        connection.send({'command': 'stop'})
+        connection.recv()
+    except EOFError:
+        pass
+    finally:
+        connection.close()
+    return True
+
+
+def _Cache_Schema(function, helper):
+    #Cache a schema lookup (arcpy.ListFields, arcpy.Describe) for datasets in a File Geodatabase until the geodatabase changes.
+    cache = dict()
+    def cached(dataset, *args):
+        stamp = helper.Workspace_Stamp(dataset) if isinstance(dataset, basestring) else None
+        if stamp is None:
+            return function(dataset, *args)
+        key = (dataset.lower(), args)
+        hit = cache.get(key)
+        if hit is None or hit[0] != stamp:
+            hit = (stamp, function(dataset, *args))
+            cache[key] = hit
+        return list(hit[1]) if isinstance(hit[1], list) else hit[1]
+    return cached
+
+
+def _Log(text):
+    #Write a time stamped line to the worker log (sys.stdout is the log file once the worker is serving).
+    print "{} {}".format(datetime.now().strftime('%Y-%m-%d %H:%M:%S'), text)
+
+
+def _Open_Log():
+    #Send stdout and stderr to the log file.  Under pythonw.exe they are not connected to anything and writing to them fails.
+    sys.stdout = sys.stderr = open(LOG_FILE, 'a', 1)
+
+
+def _Run_Job(connection, job, arcpy, helper):
+    '''
+    Run a tool script in this process.  The tool parameters are served from the job and the messages are sent to
+    the client as they are added.  Any change log or run metrics the script left open are closed when it is done, so
+    they do not carry over in to the next job.  Returns the exit status.
+    '''
+    #When the client goes away the script still runs to the end, so an edit is not left half done.
+    connected = [True]
+    def relay(level):
+        def send(message):
+            if connected[0]:
+                try:
+                    connection.send(('message', level, message if isinstance(message, basestring) else str(message)))
+                except EnvironmentError:
+                    connected[0] = False
+        return send
+    argv = job['argv']
+    saved = (arcpy.AddMessage, arcpy.AddWarning, arcpy.AddError, arcpy.GetParameterAsText, sys.argv, sys.stdout)
+    #The job runs with the client's BUDDING_GDB_ environment variables in place of the worker's own.
+    environment = dict((name, value) for name, value in os.environ.items() if name.startswith('BUDDING_GDB_'))
+    for name in environment:
+        if name != IN_WORKER_VARIABLE:
+            del os.environ[name]
+    os.environ.update(job.get('environment', {}))
+    os.environ[IN_WORKER_VARIABLE] = '1'
+    arcpy.AddMessage, arcpy.AddWarning, arcpy.AddError = relay('message'), relay('warning'), relay('error')
+    #ArcGIS passes '#' for an optional parameter that was left empty, where GetParameterAsText returns ''.
+    arcpy.GetParameterAsText = lambda index: argv[index] if index < len(argv) and argv[index] != '#' else ''
+    sys.argv = [job['script']] + argv
+    #The scripts print the same messages they add, so the prints are dropped.
+    sys.stdout = open(os.devnull, 'w')
+    status = 0
+    try:
+        runpy.run_path(job['script'], run_name='__main__')
+    except SystemExit, e:
+        status = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except Exception:
+        arcpy.AddError(traceback.format_exc())
+        status = 1
+    finally:
+        left_open = helper.Close_Open_Logs()
+        sys.stdout.close()
+        arcpy.AddMessage, arcpy.AddWarning, arcpy.AddError, arcpy.GetParameterAsText, sys.argv, sys.stdout = saved
+        if left_open:
+            _Log("Closed {} change log(s)/run metrics left open by {}".format(left_open, os.path.basename(job['script'])))
+        for name in [name for name in os.environ if name.startswith('BUDDING_GDB_')]:
+            del os.environ[name]
+        os.environ.update(environment)
+    return status
+
+
+def Serve():
+    '''
+    Run the warm worker until it is asked to stop.  Exits right away when another worker is already listening.
+    '''
+    _Open_Log()
+    os.environ[IN_WORKER_VARIABLE] = '1'
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import arcpy
+    import helper
+    arcpy.ListFields = _Cache_Schema(arcpy.ListFields, helper)
+    arcpy.Describe = _Cache_Schema(arcpy.Describe, helper)
+    helper.Snapshot_Cache = dict()
+
+    key = os.urandom(32).encode('hex')
+    try:
+        listener = Listener(ADDRESS, authkey=key)
+    except EnvironmentError, e:
+        _Log("A warm worker is already running on {}:{} ({})".format(ADDRESS[0], ADDRESS[1], e))
+        return
+    if os.path.getsize(LOG_FILE) > LOG_FILE_SIZE:
+        sys.stdout.truncate(0)
+    descriptor = os.open(KEY_FILE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0600)
+    with os.fdopen(descriptor, 'w') as f:
+        f.write(key)
+    _Log("Warm worker listening on {}:{}".format(*ADDRESS))
+    try:
+        while True:
+            try:
+                connection = listener.accept()
+            except Exception, e:
+                #Clients with the wrong key are turned away.
+                _Log("Refused a connection: {}".format(e))
+                continue
+            try:
+                job = connection.recv()
+                if job.get('command') == 'stop':
+                    connection.send(('done', 0))
+                    break
+                if job.get('command') == 'run':
+                    _Log("Running {}".format(job['script']))
+                    connection.send(('done', _Run_Job(connection, job, arcpy, helper)))
+            except (EOFError, IOError), e:
+                _Log("Lost the connection to a client: {}".format(e))
+            finally:
+                connection.close()
+    finally:
+        listener.close()
+        if os.path.exists(KEY_FILE):
+            os.remove(KEY_FILE)
+        _Log("Warm worker stopped")
+
+
+if __name__ == '__main__':
+    if '--stop' in sys.argv[1:]:
+        print "Stopped the warm worker" if Stop_Worker() else "The warm worker is not running"
+    else:
+        Serve()